@@ -16,13 +16,14 @@ choose_run_form()
 with st.expander("Visualize Policy"):
     if "run_name" in st.session_state:
         evaluate_state_form()
-        policy, _ = load_data.load_summary_policy(st.session_state["run_name"])
+        table, canonical = load_data.load_policy(st.session_state["run_name"])
 
         if "state" in st.session_state:
             fig = plots.plot_policy_state(
                 st.session_state["state"],
                 agent_mark=st.session_state["agent_mark"],
-                qs=policy
+                table=table,
+                canonical=canonical
             )
             if fig is None:
                 st.error("State was not visited during run!")
@@ -32,8 +33,12 @@ with st.expander("Visualize Policy"):
 
 with st.expander("Visualize Training Run"):
     if "run_name" in st.session_state:
-        _, summary = load_data.load_summary_policy(st.session_state["run_name"])
-        summary_fig, parsed = plots.plot_summary(summary)
+        run_name = st.session_state["run_name"]
+        summary = load_data.load_summary(run_name)
+        summary_fig, parsed = plots.plot_summary(
+            summary,
+            load_data.load_run_episodes(run_name, summary)
+        )
 
         st.plotly_chart(summary_fig)
         st.markdown(
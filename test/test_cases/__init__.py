@@ -1,3 +1,24 @@
 from .test_game import TestGame
 from .random_player_tests import RandomPlayerTest
 from .q_learn_player_test import QLearnPlayerTest
+from .state_space_test import StateSpaceTest
+from .vec_game_test import VecGameTest
+from .q_table_test import QTableTest
+from .policy_io_test import PolicyIOTest
+from .compiled_player_test import CompiledPlayerTest
+from .hogwild_test import HogwildTest
+from .sweep_test import SweepTest
+from .episode_log_test import EpisodeLogTest
+from .checkpoint_test import CheckpointTest
+from .random_stream_test import RandomStreamTest
+from .monitor_test import MonitorTest
+from .tablebase_test import TablebaseTest
+from .analysis_test import AnalysisTest
+from .replay_test import ReplayTest
+from .deferred_update_test import DeferredUpdateTest
+from .metrics_test import MetricsTest
+from .bench_test import BenchTest
+from .profiling_test import ProfilingTest
+from .tournament_test import TournamentTest
+from .sprt_test import SPRTTest
+from .plots_test import PlotsTest
@@ -0,0 +1,81 @@
+from unittest import TestCase
+
+import numpy as np
+
+from tic_tac_toe import state_space as ss
+from tic_tac_toe.schemas import GameSettings
+from tic_tac_toe.tablebase import load_tablebase
+from tic_tac_toe.players.random import RandomPlayer
+from tic_tac_toe.players.q_learn import QLearnPlayer
+from tic_tac_toe.players.schemas import TDSettings
+from tic_tac_toe.players.compiled import CompiledPlayer, compile_policy
+from tic_tac_toe.training import analysis
+from tic_tac_toe.training.train_agent import run_vectorized
+from tic_tac_toe.training.evaluation import play_matches
+
+
+class AnalysisTest(TestCase):
+    """
+    Tests for the exact analysis of policies.
+    """
+
+    def test_random_play(self):
+        """
+        Test the known outcome probabilities of random play.
+        """
+        result = analysis.analyze_strategy(analysis.uniform_strategy(), "random")
+        self.assertAlmostEqual(result.as_x.win, 737 / 1260)
+        self.assertAlmostEqual(result.as_x.draw, 8 / 63)
+        self.assertAlmostEqual(result.as_x.loss, 121 / 420)
+        self.assertGreater(result.exploitability, 0.4)
+
+    def test_perfect_play(self):
+        """
+        Test that perfect play cannot be exploited and never loses.
+        """
+        perfect = analysis.one_hot_strategy(load_tablebase().moves)
+        for opponent in analysis.OPPONENTS:
+            result = analysis.analyze_strategy(perfect, opponent)
+            self.assertAlmostEqual(result.exploitability, 0.0)
+            self.assertAlmostEqual(result.overall.loss, 0.0)
+        self.assertAlmostEqual(
+            analysis.analyze_strategy(perfect, "perfect").overall.draw,
+            1.0
+        )
+
+        with self.assertRaises(KeyError):
+            analysis.analyze_strategy(perfect, "unknown")
+
+    def test_matches_sampled_games(self):
+        """
+        Test that the exact results of a trained greedy policy agree with
+        the greedy player's moves and with sampled games.
+        """
+        for canonical in (False, True):
+            agent = QLearnPlayer(
+                "X",
+                TDSettings(canonicalize=canonical, random_seed=4)
+            )
+            run_vectorized(
+                GameSettings(),
+                agent,
+                RandomPlayer("O", 5),
+                total_episodes=3000,
+                n_envs=64,
+                show_progress=False,
+            )
+            strategy = analysis.policy_strategy(agent.dump_q_values())
+            moves = compile_policy(agent)
+            playable = np.flatnonzero(moves >= 0)
+            self.assertTrue(np.all(strategy[playable, moves[playable]] == 1.0))
+            np.testing.assert_allclose(strategy.sum(axis=1), ss.LEGAL_MASK.any(axis=1))
+
+            exact = analysis.analyze_strategy(strategy, "random")
+            sampled = play_matches(
+                CompiledPlayer("X", moves),
+                RandomPlayer("O", 6),
+                20000
+            )
+            self.assertAlmostEqual(exact.overall.win, sampled.wins / 20000, delta=0.02)
+            self.assertAlmostEqual(exact.overall.loss, sampled.losses / 20000, delta=0.02)
+            self.assertGreaterEqual(exact.exploitability, 0.0)
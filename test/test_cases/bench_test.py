@@ -0,0 +1,61 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from tic_tac_toe import bench
+
+
+class BenchTest(TestCase):
+    """
+    Tests for the benchmark suite.
+    """
+
+    def test_suite(self):
+        """
+        Test that every benchmark runs and does the same work on every run.
+        """
+        report = bench.run_suite(repeats=1, scale=0.01, show_progress=False)
+        self.assertListEqual(
+            [r.name for r in report.results],
+            [b.name for b in bench.BENCHMARKS]
+        )
+        again = bench.run_suite(
+            only="make_move",
+            repeats=2,
+            scale=0.01,
+            show_progress=False
+        )
+        self.assertEqual(len(again.results), 1)
+        self.assertEqual(again.results[0].ops, report.by_name()["game.make_move"].ops)
+        for result in report.results:
+            self.assertGreater(result.ops, 0)
+            self.assertGreater(result.ops_per_sec, 0.0)
+
+    def test_compare(self):
+        """
+        Test that results are saved, loaded and compared with a baseline.
+        """
+        report = bench.run_suite(
+            only="update",
+            repeats=1,
+            scale=0.01,
+            show_progress=False
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "baseline.json"
+            bench.save_report(report, path)
+            baseline = bench.load_report(path)
+        self.assertEqual(baseline, report)
+
+        slower = report.model_copy(update={"results": [
+            r.model_copy(update={"best_seconds": r.best_seconds * 2})
+            for r in report.results
+        ]})
+        comparison = bench.compare(slower, baseline, tolerance=0.2)
+        self.assertEqual(len(comparison), 2)
+        for c in comparison:
+            self.assertAlmostEqual(c.ratio, 0.5)
+            self.assertTrue(c.regressed)
+        self.assertFalse(any(
+            c.regressed for c in bench.compare(baseline, slower, tolerance=0.2)
+        ))
@@ -0,0 +1,199 @@
+import tempfile
+from pathlib import Path
+from typing import List, Optional
+from unittest import TestCase
+
+import numpy as np
+
+from tic_tac_toe.schemas import GameSettings
+from tic_tac_toe.players.q_learn import QLearnPlayer
+from tic_tac_toe.players.random import RandomPlayer
+from tic_tac_toe.players.schemas import TDSettings
+from tic_tac_toe.training.monitor import EvalMonitor
+from tic_tac_toe.training.schemas import EvalRecord, EvalSettings
+from tic_tac_toe.training.train_agent import play_episodes
+from tic_tac_toe.training.episode_log import EpisodeWriter, load_episodes
+from tic_tac_toe.training.checkpoint import Checkpointer, load_checkpoint
+
+
+class Interrupted(Exception):
+    pass
+
+
+class CrashingCheckpointer(Checkpointer):
+    """
+    Checkpointer that interrupts the run after a number of episodes.
+    """
+
+    def __init__(self, folder, every_episodes, crash_at):
+        super().__init__(folder, every_episodes=every_episodes)
+        self.crash_at = crash_at
+
+    def due(self, episodes_done: int) -> bool:
+        if episodes_done >= self.crash_at:
+            raise Interrupted()
+        return super().due(episodes_done)
+
+
+class CheckpointTest(TestCase):
+    """
+    Tests for training checkpoints and exact resumes.
+    """
+
+    total_episodes = 250
+
+    def run_episodes(
+            self,
+            folder: Path,
+            n_envs: Optional[int],
+            checkpointer: Optional[Checkpointer] = None,
+            resume: bool = False,
+            replay_size: Optional[int] = None,
+            eval_settings: Optional[EvalSettings] = None):
+        agent = QLearnPlayer(
+            "X",
+            TDSettings(random_seed=7, replay_size=replay_size, replay_batch=8)
+        )
+        rival = RandomPlayer("O", random_seed=3)
+        checkpoint = load_checkpoint(folder) if resume else None
+        keep = checkpoint.episodes_done if resume else None
+        monitor = None
+        if eval_settings is not None:
+            monitor = EvalMonitor(eval_settings, GameSettings(), agent, keep or 0)
+
+        with EpisodeWriter(folder / "episodes", keep=keep) as writer:
+            try:
+                play_episodes(
+                    game_settings=GameSettings(),
+                    agent=agent,
+                    rival=rival,
+                    total_episodes=self.total_episodes,
+                    writer=writer,
+                    n_envs=n_envs,
+                    random_seed=7,
+                    show_progress=False,
+                    checkpointer=checkpointer,
+                    resume_from=checkpoint,
+                    monitor=monitor,
+                )
+                records = [] if monitor is None else monitor.finish(
+                    agent,
+                    (keep or 0) + writer.count
+                )
+            finally:
+                if monitor is not None:
+                    monitor.close()
+        return agent, load_episodes(folder / "episodes", mmap=False), records
+
+    def check_resume(
+            self,
+            n_envs: Optional[int],
+            replay_size: Optional[int] = None,
+            eval_settings: Optional[EvalSettings] = None,
+            crash_at: int = 150) -> List[EvalRecord]:
+        with tempfile.TemporaryDirectory() as tmp:
+            full_dir, resumed_dir = Path(tmp) / "full", Path(tmp) / "resumed"
+            full_agent, full_eps, full_records = self.run_episodes(
+                full_dir,
+                n_envs,
+                replay_size=replay_size,
+                eval_settings=eval_settings
+            )
+
+            with CrashingCheckpointer(resumed_dir, 64, crash_at=crash_at) as ckpt:
+                with self.assertRaises(Interrupted):
+                    self.run_episodes(
+                        resumed_dir,
+                        n_envs,
+                        checkpointer=ckpt,
+                        replay_size=replay_size,
+                        eval_settings=eval_settings
+                    )
+
+            checkpoint = load_checkpoint(resumed_dir)
+            self.assertGreaterEqual(checkpoint.episodes_done, 64)
+            self.assertLess(checkpoint.episodes_done, crash_at)
+            self.assertGreater(
+                len(load_episodes(resumed_dir / "episodes")),
+                checkpoint.episodes_done
+            )
+
+            agent, episodes, records = self.run_episodes(
+                resumed_dir,
+                n_envs,
+                resume=True,
+                replay_size=replay_size,
+                eval_settings=eval_settings
+            )
+
+        self.assertTrue(np.array_equal(
+            agent.agent_q_vals.values,
+            full_agent.agent_q_vals.values
+        ))
+        self.assertTrue(np.array_equal(
+            agent.agent_q_vals.visited,
+            full_agent.agent_q_vals.visited
+        ))
+        self.assertEqual(len(episodes), len(full_eps))
+        for column, full_column in zip(episodes, full_eps):
+            self.assertTrue(np.array_equal(column, full_column))
+        self.assertListEqual(records, full_records)
+        return records
+
+    def test_resume_sequential(self):
+        """
+        Test that a resumed sequential run matches an uninterrupted one.
+        """
+        self.check_resume(None)
+
+    def test_resume_vectorized(self):
+        """
+        Test that a resumed vectorized run matches an uninterrupted one.
+        """
+        self.check_resume(16)
+
+    def test_resume_replay(self):
+        """
+        Test that resumed runs with experience replay match uninterrupted
+        ones.
+        """
+        self.check_resume(None, replay_size=200)
+        self.check_resume(16, replay_size=200)
+
+    def test_resume_evaluations(self):
+        """
+        Test that resumed runs keep the evaluations from before the
+        checkpoint, including those still pending when it was taken.
+        """
+        settings = EvalSettings(every=40, games=20, benchmarks=["random"], patience=None)
+        records = self.check_resume(None, eval_settings=settings)
+        self.assertListEqual(
+            [r.episodes for r in records],
+            [40 * k for k in range(1, 7)] + [self.total_episodes]
+        )
+        self.assertGreater(len(self.check_resume(16, eval_settings=settings)), 3)
+
+    def test_resume_early_stop(self):
+        """
+        Test that runs stop at the same episode whether or not they are
+        resumed: evaluations are collected when the next one is due, however
+        long they take.
+        """
+        # Every evaluation counts as converged, so the third one stops the
+        # run when it is collected, at the fourth.
+        settings = EvalSettings(every=30, games=20, patience=3, q_tolerance=1e9)
+        records = self.check_resume(None, eval_settings=settings, crash_at=100)
+        self.assertListEqual([r.episodes for r in records], [30, 60, 90, 120])
+        self.check_resume(16, eval_settings=settings, crash_at=100)
+
+    def test_due(self):
+        """
+        Test the checkpoint schedule by episodes.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            with Checkpointer(tmp, every_episodes=10, episodes_done=5) as ckpt:
+                self.assertFalse(ckpt.due(14))
+                self.assertTrue(ckpt.due(15))
+
+        with self.assertRaises(ValueError):
+            Checkpointer("unused")
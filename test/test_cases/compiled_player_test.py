@@ -0,0 +1,69 @@
+from unittest import TestCase
+
+import numpy as np
+
+from tic_tac_toe.game import Game
+from tic_tac_toe import state_space as ss
+from tic_tac_toe.schemas import GameSettings
+from tic_tac_toe.players.random import RandomPlayer
+from tic_tac_toe.players.q_learn import QLearnPlayer
+from tic_tac_toe.players.schemas import TDSettings
+from tic_tac_toe.players.compiled import CompiledPlayer, compile_policy
+
+
+class CompiledPlayerTest(TestCase):
+    """
+    Tests for compiled greedy players.
+    """
+
+    def trained_player(self, canonical: bool) -> QLearnPlayer:
+        settings = TDSettings(canonicalize=canonical, random_seed=3)
+        agent = QLearnPlayer("X", settings)
+        rival = RandomPlayer("O", 5)
+        for _ in range(300):
+            game = Game(GameSettings(), agent, rival)
+            while game.make_move() is None:
+                pass
+
+        agent.epsilon_greedy = False
+        return agent
+
+    def test_matches_greedy_player(self):
+        """
+        Test that the compiled table plays the same moves as the greedy
+        player in every state.
+        """
+        for canonical in (False, True):
+            agent = self.trained_player(canonical)
+            moves = compile_policy(agent)
+            views = np.flatnonzero(ss.LEGAL_MASK.any(axis=1))
+            expected = [agent.select_action_id(v) for v in views.tolist()]
+
+            self.assertListEqual(moves[views].tolist(), expected)
+            self.assertTrue(np.all(moves[~ss.LEGAL_MASK.any(axis=1)] == -1))
+
+    def test_play(self):
+        """
+        Test that compiled players make the same moves through all the
+        interfaces.
+        """
+        compiled = CompiledPlayer.from_player(self.trained_player(False))
+        compiled.mark = "O"
+        sid = ss.NEXT_STATE[ss.EMPTY_ID, 4]
+        view = ss.SWAP_ID[sid]
+
+        self.assertEqual(compiled.make_move_id(0.0, sid), compiled.moves[view])
+        self.assertEqual(
+            compiled.make_move(0.0, ss.BOARDS[sid], ss.LEGAL_MOVES[sid]),
+            compiled.moves[view]
+        )
+        self.assertListEqual(
+            compiled.select_actions(np.array([view])).tolist(),
+            [compiled.moves[view]]
+        )
+
+        rival = RandomPlayer("X", 1)
+        for _ in range(20):
+            game = Game(GameSettings(), rival, compiled)
+            while game.make_move() is None:
+                pass
@@ -0,0 +1,93 @@
+from unittest import TestCase
+
+import numpy as np
+
+from tic_tac_toe.schemas import GameSettings
+from tic_tac_toe.game import Game
+from tic_tac_toe.players.q_learn import QLearnPlayer
+from tic_tac_toe.players.e_sarsa import ESarsaPlayer
+from tic_tac_toe.players.random import RandomPlayer
+from tic_tac_toe.players.schemas import TDSettings
+from tic_tac_toe.random_stream import RandomStream
+from tic_tac_toe.training.train_agent import run_game, run_vectorized
+
+
+class DeferredUpdateTest(TestCase):
+    """
+    Tests for the end-of-episode updates of the TD players.
+    """
+
+    def train(self, player_cls, n_episodes: int, **settings):
+        agent = player_cls("X", TDSettings(random_seed=3, **settings))
+        rival = RandomPlayer("O", random_seed=4)
+        seats = RandomStream(5)
+        for _ in range(n_episodes):
+            run_game(GameSettings(), agent, rival, seats)
+        return agent
+
+    def test_one_step_matches_online(self):
+        """
+        Test that deferred one-step updates learn the same values as the
+        updates after every move, which also bootstrap from values not yet
+        updated in the episode.
+        """
+        for player_cls in (QLearnPlayer, ESarsaPlayer):
+            online = self.train(player_cls, 500)
+            deferred = self.train(player_cls, 500, deferred_updates=True)
+            self.assertTrue(np.array_equal(
+                online.agent_q_vals.visited,
+                deferred.agent_q_vals.visited
+            ))
+            self.assertTrue(np.allclose(
+                online.agent_q_vals.values,
+                deferred.agent_q_vals.values,
+                atol=1e-4
+            ))
+
+    def test_monte_carlo(self):
+        """
+        Test that with a trace decay of 1 every move is updated towards the
+        final reward.
+        """
+        agent = QLearnPlayer("X", TDSettings(
+            step_size=1.0,
+            deferred_updates=True,
+            trace_decay=1.0,
+            epsilon_greedy=False,
+        ))
+        rival = RandomPlayer("O", random_seed=1)
+        game = Game(GameSettings(), x_player=agent, o_player=rival)
+        winner = None
+        while winner is None:
+            winner = game.make_move()
+
+        final = {"X": 1.0, "O": -1.0, "-": 0.0}[winner]
+        values = agent.agent_q_vals.values
+        visited = np.flatnonzero(agent.agent_q_vals.visited)
+        self.assertGreater(visited.size, 2)
+        for sid in visited.tolist():
+            updated = np.isfinite(values[sid]) & (values[sid] != 0.0)
+            self.assertTrue(np.all(values[sid][updated] == final))
+        self.assertEqual(
+            int(np.sum(np.isfinite(values) & (values != 0.0))),
+            0 if final == 0.0 else visited.size
+        )
+
+    def test_settings(self):
+        """
+        Test that deferred updates are not combined with replay nor with
+        vectorized runs.
+        """
+        with self.assertRaises(ValueError):
+            TDSettings(deferred_updates=True, replay_size=100)
+
+        agent = QLearnPlayer("X", TDSettings(deferred_updates=True))
+        with self.assertRaises(ValueError):
+            run_vectorized(
+                GameSettings(),
+                agent,
+                RandomPlayer("O"),
+                total_episodes=10,
+                n_envs=4,
+                show_progress=False
+            )
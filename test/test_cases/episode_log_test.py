@@ -0,0 +1,163 @@
+import tempfile
+import numpy as np
+from pathlib import Path
+from unittest import TestCase
+
+from tic_tac_toe import state_space as ss
+from tic_tac_toe.schemas import GameSettings
+from tic_tac_toe.training import episode_log
+from tic_tac_toe.players.random import RandomPlayer
+from tic_tac_toe.players.q_learn import QLearnPlayer
+from tic_tac_toe.players.schemas import TDSettings
+from tic_tac_toe.training.train_agent import run_vectorized
+from tic_tac_toe.training.schemas import TrainSummary
+from ttt_visualize.plots import parse_summary
+
+
+class EpisodeLogTest(TestCase):
+    """
+    Tests for streamed, columnar episode logs.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.folder = Path(self.tmp.name) / episode_log.EPISODES_DIR
+        self.episodes = run_vectorized(
+            GameSettings(),
+            QLearnPlayer("X", TDSettings()),
+            RandomPlayer("O", 3),
+            total_episodes=300,
+            n_envs=32,
+            show_progress=False,
+        )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def summary(self, **kwargs) -> TrainSummary:
+        return TrainSummary(
+            total_episodes=len(self.episodes),
+            game_settings=GameSettings(),
+            td_settings=TDSettings(),
+            agent_type="q_learn",
+            rival_type="random",
+            agent_class="QLearnPlayer",
+            rival_class="RandomPlayer",
+            **kwargs
+        )
+
+    def test_round_trip(self):
+        """
+        Test that episodes are read back in order, across chunks and appends.
+        """
+        with episode_log.EpisodeWriter(self.folder, chunk_size=7) as writer:
+            writer.extend(self.episodes[:100])
+            self.assertEqual(writer.count, 100)
+
+        with episode_log.EpisodeWriter(self.folder, append=True) as writer:
+            writer.extend(self.episodes[100:])
+
+        for mmap in (True, False):
+            columns = episode_log.load_episodes(self.folder, mmap=mmap)
+            self.assertEqual(len(columns), 300)
+            read = episode_log.iter_episodes(columns, "QLearnPlayer", "RandomPlayer")
+            self.assertListEqual(list(read), self.episodes)
+
+        self.assertEqual((self.folder / "end_board.bin").stat().st_size, 4 * 300)
+
+    def test_batches(self):
+        """
+        Test that batches of state ids are packed like single episodes.
+        """
+        end_ids = np.flatnonzero(ss.REACHABLE & (ss.WINNER != ss.ONGOING))[:50]
+        with episode_log.EpisodeWriter(self.folder) as writer:
+            writer.write_batch(end_ids, ss.WINNER[end_ids], np.ones(50))
+
+        columns = episode_log.load_episodes(self.folder)
+        boards = [episode_log.unpack_board(b) for b in columns.end_board.tolist()]
+        self.assertListEqual(boards, [ss.BOARDS[i] for i in end_ids])
+        self.assertListEqual(columns.winner.tolist(), ss.WINNER[end_ids].tolist())
+
+    def test_records(self):
+        """
+        Test that episode records are written like summaries, in order with
+        batches, and that invalid records are rejected when written.
+        """
+        records = [
+            episode_log.EpisodeRecord(
+                ss.WINNER_MARKS.index(ep.winner),
+                1 if ep.agent_mark == "X" else 2,
+                ss.BOARD_TO_ID[ep.end_board],
+            )
+            for ep in self.episodes
+        ]
+        self.assertEqual(
+            records[0].to_summary("QLearnPlayer", "RandomPlayer"),
+            self.episodes[0]
+        )
+
+        with episode_log.EpisodeWriter(self.folder, chunk_size=64) as writer:
+            for record in records[:150]:
+                writer.write_record(record)
+            writer.write_batch(
+                np.array([r.end_id for r in records[150:]]),
+                np.array([r.winner for r in records[150:]]),
+                np.array([r.agent_mark for r in records[150:]]),
+            )
+            self.assertEqual(writer.count, 300)
+
+        columns = episode_log.load_episodes(self.folder)
+        read = episode_log.iter_episodes(columns, "QLearnPlayer", "RandomPlayer")
+        self.assertListEqual(list(read), self.episodes)
+
+        with episode_log.EpisodeWriter(self.folder) as writer:
+            writer.write_record(records[0]._replace(agent_mark=0))
+            with self.assertRaises(ValueError):
+                writer.flush()
+            writer.write_record(records[0]._replace(end_id=ss.EMPTY_ID))
+            with self.assertRaises(ValueError):
+                writer.flush()
+            with self.assertRaises(ValueError):
+                writer.write_batch(np.array([ss.N_STATES]), np.ones(1), np.ones(1))
+
+    def test_partial_chunk(self):
+        """
+        Test that episodes with missing columns are not loaded.
+        """
+        with episode_log.EpisodeWriter(self.folder) as writer:
+            writer.extend(self.episodes[:10])
+        with open(self.folder / "winner.bin", "ab") as f:
+            f.write(b"\x01")
+        self.assertEqual(len(episode_log.load_episodes(self.folder)), 10)
+
+    def test_keep(self):
+        """
+        Test that resumed logs drop the episodes after the kept ones, and
+        that an empty log can be resumed before any column is written.
+        """
+        with episode_log.EpisodeWriter(self.folder, keep=0) as writer:
+            writer.extend(self.episodes[:100])
+        with episode_log.EpisodeWriter(self.folder, keep=60) as writer:
+            writer.extend(self.episodes[100:])
+
+        columns = episode_log.load_episodes(self.folder)
+        read = episode_log.iter_episodes(columns, "QLearnPlayer", "RandomPlayer")
+        self.assertListEqual(list(read), self.episodes[:60] + self.episodes[100:])
+        with self.assertRaises(ValueError):
+            episode_log.EpisodeWriter(self.folder, keep=1000)
+
+    def test_parse_summary(self):
+        """
+        Test that runs parse the same from inline episodes and columnar logs.
+        """
+        with episode_log.EpisodeWriter(self.folder) as writer:
+            writer.extend(self.episodes)
+
+        inline = parse_summary(self.summary(episodes=self.episodes))
+        summary = self.summary(episodes_file=episode_log.EPISODES_DIR)
+        columns = episode_log.load_run_episodes(self.tmp.name, summary)
+        parsed = parse_summary(summary, columns)
+        self.assertEqual(parsed["total_episodes"], 300)
+        self.assertEqual(parsed["played_as_x"], inline["played_as_x"])
+        for key in ("agent_wins", "agent_losses", "agent_draws"):
+            self.assertTrue(np.array_equal(parsed[key], inline[key]))
@@ -0,0 +1,105 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import numpy as np
+
+from tic_tac_toe import state_space as ss
+from tic_tac_toe.schemas import GameSettings
+from tic_tac_toe.players.q_table import QTable
+from tic_tac_toe.players.q_learn import QLearnPlayer
+from tic_tac_toe.players.schemas import TDSettings
+from tic_tac_toe.training import hogwild
+from tic_tac_toe.training.episode_log import load_episodes
+
+
+class HogwildTest(TestCase):
+    """
+    Tests for multi-process training over shared Q-tables.
+    """
+
+    def test_share_attach(self):
+        """
+        Test that attached tables see the shared values.
+        """
+        table = QTable(default_q=0.5)
+        table.values[ss.EMPTY_ID, 4] = 2.0
+        table.visit(ss.EMPTY_ID)
+
+        shared, shm = hogwild.share_q_table(table)
+        attached, other = hogwild.attach_q_table(shm.name, 0.5)
+        attached.values[ss.EMPTY_ID, 0] = 3.0
+
+        self.assertEqual(shared.values[ss.EMPTY_ID, 4], 2.0)
+        self.assertEqual(shared.values[ss.EMPTY_ID, 0], 3.0)
+        self.assertTrue(attached.visited[ss.EMPTY_ID])
+        self.assertEqual(table.values[ss.EMPTY_ID, 0], 0.5)
+
+        del shared, attached
+        other.close()
+        shm.close()
+        shm.unlink()
+
+    def run_training(self, n_workers: int, rival: bool):
+        settings = TDSettings(random_seed=11)
+        agent = QLearnPlayer("X", settings)
+        rival_player = QLearnPlayer("O", settings) if rival else None
+        with tempfile.TemporaryDirectory() as tmp:
+            log_file = Path(tmp) / "episodes"
+            self.run_hogwild(
+                settings,
+                agent,
+                rival_player,
+                n_workers,
+                log_file
+            )
+            episodes = load_episodes(log_file, mmap=False)
+            self.assertListEqual(list(Path(tmp).iterdir()), [log_file])
+        return agent, rival_player, episodes
+
+    @staticmethod
+    def run_hogwild(settings, agent, rival_player, n_workers, log_file):
+        rival = rival_player is not None
+        hogwild.run_hogwild(
+            game_settings=GameSettings(),
+            agent_type="q_learn",
+            agent=agent,
+            td_settings=settings,
+            rival_type="q_learn" if rival else "random",
+            rival=rival_player,
+            rival_td_settings=settings if rival else None,
+            total_episodes=301,
+            n_workers=n_workers,
+            episodes_file=log_file,
+        )
+
+    def test_run(self):
+        """
+        Test that the workers' episodes and learned values are collected.
+        """
+        agent, rival, episodes = self.run_training(2, rival=True)
+        self.assertEqual(len(episodes), 301)
+        self.assertGreater(len(agent.agent_q_vals), 0)
+        self.assertGreater(len(rival.agent_q_vals), 0)
+        self.assertTrue(np.any(agent.agent_q_vals.values[ss.LEGAL_MASK] != 0.0))
+
+    def test_deterministic(self):
+        """
+        Test that a single worker gives the same results on every run.
+        """
+        first, _, eps_first = self.run_training(1, rival=False)
+        second, _, eps_second = self.run_training(1, rival=False)
+        self.assertTrue(np.array_equal(
+            first.agent_q_vals.values,
+            second.agent_q_vals.values
+        ))
+        for first_col, second_col in zip(eps_first, eps_second):
+            self.assertTrue(np.array_equal(first_col, second_col))
+
+    def test_worker_seeds(self):
+        """
+        Test that workers of runs with adjacent seeds get different seeds.
+        """
+        seeds = {hogwild.worker_seed(s, i) for s in range(10) for i in range(8)}
+        self.assertEqual(len(seeds), 80)
+        self.assertEqual(hogwild.worker_seed(3, 1), hogwild.worker_seed(3, 1))
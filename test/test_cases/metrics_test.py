@@ -0,0 +1,85 @@
+import json
+import time
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from tic_tac_toe.schemas import GameSettings
+from tic_tac_toe.players.q_learn import QLearnPlayer
+from tic_tac_toe.players.random import RandomPlayer
+from tic_tac_toe.players.schemas import TDSettings
+from tic_tac_toe.training import metrics as mt
+from tic_tac_toe.training.train_agent import play_episodes
+from tic_tac_toe.training.episode_log import EpisodeWriter
+
+
+class MetricsTest(TestCase):
+    """
+    Tests for the instrumentation of training runs.
+    """
+
+    def test_nested_timers(self):
+        """
+        Test that timers exclude the time of the timers nested in them.
+        """
+        agent = QLearnPlayer("X", TDSettings())
+        instruments = mt.Instrumentation(agent)
+        inner = instruments.wrap(lambda: time.sleep(0.02), mt.TD_UPDATE)
+        outer = instruments.wrap(lambda: inner() or inner(), mt.MOVE_SELECTION)
+        outer()
+
+        timers = instruments.finish(0).timers
+        self.assertEqual(timers[mt.MOVE_SELECTION].calls, 1)
+        self.assertEqual(timers[mt.TD_UPDATE].calls, 2)
+        self.assertGreaterEqual(timers[mt.TD_UPDATE].seconds, 0.04)
+        self.assertLess(timers[mt.MOVE_SELECTION].seconds, 0.01)
+
+    def test_run(self):
+        """
+        Test the metrics of a short run, and that the players are left as
+        they were.
+        """
+        agent = QLearnPlayer("X", TDSettings(random_seed=1))
+        rival = RandomPlayer("O", random_seed=2)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / mt.METRICS_FILE
+            with mt.Instrumentation(agent, every=100, path=path) as instruments:
+                instruments.instrument_players(agent, rival)
+                self.assertIn("make_move_id", vars(agent))
+                with EpisodeWriter(Path(tmp) / "episodes") as writer:
+                    play_episodes(
+                        GameSettings(),
+                        agent,
+                        rival,
+                        total_episodes=500,
+                        writer=writer,
+                        show_progress=False,
+                        metrics=instruments,
+                    )
+                metrics = instruments.finish(500)
+
+            with open(path, "r") as f:
+                samples = [json.loads(line) for line in f]
+
+        self.assertNotIn("make_move_id", vars(agent))
+        self.assertNotIn("update", vars(agent))
+        self.assertNotIn("make_move_id", vars(rival))
+
+        self.assertEqual(metrics.episodes, 500)
+        self.assertEqual(metrics.timers[mt.GAME_STEP].calls, 500)
+        self.assertGreater(metrics.timers[mt.TD_UPDATE].calls, 500)
+        self.assertGreater(metrics.timers[mt.MOVE_SELECTION].calls, 1000)
+        self.assertAlmostEqual(
+            sum(t.seconds for t in metrics.timers.values()),
+            metrics.seconds,
+            places=6
+        )
+        self.assertEqual(metrics.states_visited, len(agent.agent_q_vals))
+        self.assertGreater(metrics.bytes_per_state, 0.0)
+
+        self.assertListEqual(
+            [s["episodes"] for s in samples],
+            [100, 200, 300, 400, 500]
+        )
+        visited = [s.states_visited for s in metrics.samples]
+        self.assertListEqual(visited, sorted(visited))
@@ -0,0 +1,87 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import numpy as np
+
+from tic_tac_toe import solver
+from tic_tac_toe import state_space as ss
+from tic_tac_toe.schemas import GameSettings
+from tic_tac_toe.players.q_learn import QLearnPlayer
+from tic_tac_toe.players.random import RandomPlayer
+from tic_tac_toe.players.schemas import TDSettings
+from tic_tac_toe.players.compiled import CompiledPlayer
+from tic_tac_toe.training.schemas import EvalSettings
+from tic_tac_toe.training.evaluation import evaluate_benchmarks
+from tic_tac_toe.training.monitor import EvalMonitor, max_q_change
+from tic_tac_toe.training.train_agent import play_episodes
+from tic_tac_toe.training.episode_log import EpisodeWriter
+
+
+class MonitorTest(TestCase):
+    """
+    Tests for the perfect-play benchmark and the evaluations during training.
+    """
+
+    def test_perfect_play(self):
+        """
+        Test that the solved game is a draw and perfect play never loses.
+        """
+        self.assertEqual(solver.solve()[ss.EMPTY_ID], 0)
+        perfect = CompiledPlayer("X", solver.optimal_moves())
+        results = evaluate_benchmarks(perfect, ["random", "perfect"], 500)
+        self.assertEqual(results["random"].losses, 0)
+        self.assertEqual(results["perfect"].draws, 500)
+
+        # Deterministic players meet deterministic benchmarks once per seat.
+        results = evaluate_benchmarks(perfect, ["perfect"], 500, deterministic=True)
+        self.assertEqual(results["perfect"].games, 2)
+        self.assertEqual(results["perfect"].draws, 2)
+
+        # Perfect play takes an immediate win: X to move on 'XX-OO----'.
+        sid = ss.BOARD_TO_ID["XX-OO----"]
+        self.assertEqual(solver.optimal_moves()[sid], 2)
+        self.assertGreater(solver.view_scores(np.array([sid]))[0], 0)
+
+        with self.assertRaises(KeyError):
+            evaluate_benchmarks(perfect, ["unknown"], 10)
+
+    def test_max_q_change(self):
+        """
+        Test that illegal actions are ignored in the Q-value change.
+        """
+        previous = np.array([[0.0, -np.inf], [1.0, 2.0]])
+        current = np.array([[0.5, -np.inf], [1.0, 1.0]])
+        self.assertEqual(max_q_change(previous, current), 1.0)
+
+    def test_early_stop(self):
+        """
+        Test that training stops once the evaluations plateau, and that the
+        evaluations are recorded in order.
+        """
+        agent = QLearnPlayer("X", TDSettings(random_seed=1))
+        settings = EvalSettings(every=100, games=50, patience=2, min_delta=1.0)
+        with tempfile.TemporaryDirectory() as tmp:
+            with EvalMonitor(settings, GameSettings(), agent) as monitor:
+                with EpisodeWriter(Path(tmp) / "episodes") as writer:
+                    play_episodes(
+                        game_settings=GameSettings(),
+                        agent=agent,
+                        rival=RandomPlayer("O", random_seed=2),
+                        total_episodes=100000,
+                        writer=writer,
+                        n_envs=8,
+                        show_progress=False,
+                        monitor=monitor,
+                    )
+                records = monitor.finish(agent, writer.count)
+
+        self.assertTrue(monitor.stop)
+        self.assertLess(writer.count, 100000)
+        self.assertGreaterEqual(len(records), 3)
+        self.assertListEqual(
+            [r.episodes for r in records],
+            sorted(r.episodes for r in records)
+        )
+        self.assertEqual(records[-1].episodes, writer.count)
+        self.assertSetEqual(set(records[0].results), {"random", "perfect"})
@@ -0,0 +1,87 @@
+from unittest import TestCase
+
+import numpy as np
+
+from tic_tac_toe.schemas import GameSettings
+from tic_tac_toe.players.schemas import TDSettings
+from tic_tac_toe.training.schemas import TrainSummary
+from tic_tac_toe.training.episode_log import EpisodeColumns
+from ttt_visualize import plots
+
+
+class PlotsTest(TestCase):
+    """
+    Tests for the plots of training runs.
+    """
+
+    def test_minmax_downsample(self):
+        """
+        Test that downsampled curves keep their ends and extremes, and stay
+        within the point budget.
+        """
+        values = np.sin(np.linspace(0, 20, 100003))
+        values[777] = 5.0
+        values[4321] = -5.0
+        for max_points in (10, 100, 2000):
+            idx = plots.minmax_downsample(values, max_points)
+            self.assertLessEqual(idx.size, max_points)
+            self.assertTrue(np.all(np.diff(idx) > 0))
+            self.assertEqual(idx[0], 0)
+            self.assertEqual(idx[-1], values.size - 1)
+            self.assertIn(777, idx)
+            self.assertIn(4321, idx)
+
+        self.assertTrue(np.array_equal(
+            plots.minmax_downsample(values[:50], 100),
+            np.arange(50)
+        ))
+
+    def test_rolling_rate(self):
+        """
+        Test the rolling rates against the mean over each window.
+        """
+        outcome = np.random.default_rng(1).random(500) < 0.3
+        for window in (1, 7, 100, 1000):
+            expected = [
+                outcome[max(0, i + 1 - window):i + 1].mean()
+                for i in range(outcome.size)
+            ]
+            self.assertTrue(np.allclose(
+                plots.rolling_rate(outcome, window),
+                expected,
+                atol=1e-6
+            ))
+
+    def test_plot_summary(self):
+        """
+        Test that long runs are plotted with a bounded number of points, and
+        that the totals end at the run's counts.
+        """
+        n = 50000
+        rng = np.random.default_rng(2)
+        episodes = EpisodeColumns(
+            winner=rng.integers(1, 4, n).astype(np.int8),
+            agent_mark=rng.integers(1, 3, n).astype(np.int8),
+            end_board=np.zeros(n, dtype=np.uint32),
+        )
+        summary = TrainSummary(
+            total_episodes=n,
+            game_settings=GameSettings(),
+            td_settings=TDSettings(),
+            agent_type="q_learn",
+            rival_type="random",
+        )
+        fig, parsed = plots.plot_summary(summary, episodes, max_points=500)
+
+        self.assertEqual(len(fig.data), 6)
+        self.assertTrue(all(len(trace.x) <= 500 for trace in fig.data))
+        totals = {trace.name: trace.y[-1] for trace in fig.data}
+        for outcome in ("wins", "losses", "draws"):
+            self.assertEqual(
+                totals["total_" + outcome],
+                np.count_nonzero(parsed["agent_" + outcome])
+            )
+        self.assertEqual(
+            sum(totals["total_" + o] for o in ("wins", "losses", "draws")),
+            n
+        )
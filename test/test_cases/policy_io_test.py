@@ -0,0 +1,122 @@
+import os
+import json
+import tempfile
+from unittest import TestCase
+
+import numpy as np
+
+from tic_tac_toe import state_space as ss
+from tic_tac_toe.players import policy_io
+from tic_tac_toe.players.q_table import QTable
+from tic_tac_toe.players.q_learn import QLearnPlayer
+from tic_tac_toe.players.schemas import TDSettings, TabularPolicy
+from ttt_visualize.plots import plot_policy_state
+
+
+class PolicyIOTest(TestCase):
+    """
+    Tests for the binary policy format.
+    """
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.policy = TabularPolicy(states={
+            "000000000": {str(a): 0.1 * a for a in range(9)},
+            "120000000": {str(a): -0.5 for a in range(2, 9)},
+        })
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def path(self, name: str) -> str:
+        return os.path.join(self.tmp.name, name)
+
+    def test_round_trip(self):
+        """
+        Test that tables are loaded back unchanged, with and without mmap.
+        """
+        table = QTable.from_policy(self.policy, default_q=0.25)
+        policy_io.save_binary_policy(table, self.path("p.qtab"), canonical=True)
+
+        for mmap in (True, False):
+            loaded, canonical = policy_io.load_binary_policy(
+                self.path("p.qtab"),
+                mmap=mmap
+            )
+            self.assertTrue(canonical)
+            self.assertEqual(loaded.default_q, 0.25)
+            self.assertTrue(np.array_equal(loaded.values, table.values))
+            self.assertTrue(np.array_equal(loaded.visited, table.visited))
+
+    def test_mmap_copy_on_write(self):
+        """
+        Test that writing to a memory mapped table leaves the file untouched.
+        """
+        path = self.path("p.qtab")
+        policy_io.save_binary_policy(QTable.from_policy(self.policy), path)
+
+        table, _ = policy_io.load_binary_policy(path)
+        table.values[ss.EMPTY_ID, 0] = 10.0
+        table.visit(ss.NEXT_STATE[ss.EMPTY_ID, 4])
+
+        fresh, _ = policy_io.load_binary_policy(path, mmap=False)
+        self.assertEqual(fresh.values[ss.EMPTY_ID, 0], 0.0)
+        self.assertEqual(len(fresh), 2)
+
+    def test_convert(self):
+        """
+        Test converting between the JSON and binary formats.
+        """
+        with open(self.path("p.json"), "w") as f:
+            json.dump(self.policy.model_dump(), f)
+
+        policy_io.convert_policy(self.path("p.json"), self.path("p.qtab"))
+        policy_io.convert_policy(self.path("p.qtab"), self.path("q.json"))
+
+        loaded = policy_io.load_tabular_policy(self.path("q.json"))
+        self.assertSetEqual(set(loaded.states), set(self.policy.states))
+        for state, qs in self.policy.states.items():
+            for a, q in qs.items():
+                self.assertAlmostEqual(loaded.states[state][a], q, places=6)
+
+    def test_player_from_table(self):
+        """
+        Test instantiating a player from a loaded table.
+        """
+        path = self.path("p.qtab")
+        policy_io.save_binary_policy(QTable.from_policy(self.policy), path)
+        table, canonical = policy_io.load_binary_policy(path)
+
+        settings = TDSettings(default_q=1.0, epsilon_greedy=False)
+        player = QLearnPlayer.from_q_table(table, canonical, "X", settings)
+        self.assertIs(player.agent_q_vals, table)
+        self.assertEqual(player.select_action("000000000"), 8)
+
+        unvisited = ss.NEXT_STATE[ss.EMPTY_ID, 4]
+        self.assertTrue(np.all(table.values[unvisited][ss.LEGAL_MASK[unvisited]] == 1.0))
+
+    def test_plot_policy_state(self):
+        """
+        Test that the visualizer reads action values straight from a mapped
+        table, for either mark and storage form.
+        """
+        legal = [0, 1, 3, 5, 6, 7, 8]
+        policy = TabularPolicy(states={"001020000": {str(a): 0.1 * a for a in legal}})
+        path = self.path("p.qtab")
+        policy_io.save_binary_policy(QTable.from_policy(policy), path)
+        table, canonical = policy_io.load_binary_policy(path)
+        folded = QTable.from_policy(policy, canonical=True)
+
+        expected = np.full(9, np.nan)
+        expected[legal] = [0.1 * a for a in legal]
+        for state, mark in (("--X-O----", "X"), ("--O-X----", "O")):
+            for tab, canon in ((table, canonical), (folded, True)):
+                fig = plot_policy_state(state, mark, tab, canon)
+                self.assertTrue(np.allclose(
+                    np.array(fig.data[0].z, dtype=float).ravel(),
+                    expected,
+                    equal_nan=True
+                ))
+
+        self.assertIsNone(plot_policy_state("--X-O----", "O", table, canonical))
+        self.assertIsNone(plot_policy_state("XXXX-----", "X", table, canonical))
@@ -0,0 +1,82 @@
+import pstats
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from tic_tac_toe.schemas import GameSettings
+from tic_tac_toe.players.q_learn import QLearnPlayer
+from tic_tac_toe.players.random import RandomPlayer
+from tic_tac_toe.players.schemas import TDSettings
+from tic_tac_toe.training import profiling as pf
+from tic_tac_toe.training.train_agent import play_episodes
+from tic_tac_toe.training.episode_log import EpisodeWriter
+
+
+class ProfilingTest(TestCase):
+    """
+    Tests for the profiling of training runs.
+    """
+
+    def test_window(self):
+        """
+        Test that the window is moved back to fit in short runs.
+        """
+        self.assertEqual(pf.profile_window(100, 50, 1000), range(100, 150))
+        self.assertEqual(pf.profile_window(100, 50, 120), range(70, 120))
+        self.assertEqual(pf.profile_window(100, 50, 30), range(0, 30))
+
+    def test_run(self):
+        """
+        Test the outputs of a profiled window, both one game at a time and
+        on a vectorized environment.
+        """
+        for n_envs in (None, 32):
+            agent = QLearnPlayer("X", TDSettings(random_seed=1))
+            rival = RandomPlayer("O", random_seed=2)
+            with tempfile.TemporaryDirectory() as tmp:
+                profiler = pf.EpisodeProfiler(
+                    tmp,
+                    pf.profile_window(300, 600, 1200),
+                    interval=0.001
+                )
+                with EpisodeWriter(Path(tmp) / "episodes") as writer:
+                    play_episodes(
+                        GameSettings(),
+                        agent,
+                        rival,
+                        total_episodes=1200,
+                        writer=writer,
+                        n_envs=n_envs,
+                        show_progress=False,
+                        profiler=profiler,
+                    )
+                self.assertFalse(profiler.running)
+                report = profiler.finish(1200)
+
+                stats = pstats.Stats(str(Path(tmp) / report.pstats_file))
+                functions = {name for _, _, name in stats.stats}
+                with open(Path(tmp) / report.collapsed_file, "r") as f:
+                    lines = f.read().splitlines()
+
+            self.assertGreaterEqual(report.first_episode, 300)
+            self.assertGreaterEqual(report.last_episode, 900)
+            self.assertLess(report.first_episode, 300 + (n_envs or 1))
+            self.assertAlmostEqual(
+                report.seconds_per_episode,
+                report.seconds / (report.last_episode - report.first_episode)
+            )
+            self.assertIn("update_batch" if n_envs else "update", functions)
+            self.assertEqual(
+                sum(int(line.rsplit(" ", 1)[1]) for line in lines),
+                report.samples
+            )
+
+    def test_not_reached(self):
+        """
+        Test that nothing is saved if the window is never reached.
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            profiler = pf.EpisodeProfiler(tmp, range(100, 200))
+            profiler.step(50)
+            self.assertIsNone(profiler.finish(50))
+            self.assertListEqual(list(Path(tmp).iterdir()), [])
@@ -1,11 +1,21 @@
 import unittest
 import numpy as np
 
+from tic_tac_toe import state_space as ss
 from tic_tac_toe.players.schemas import TDSettings
 from tic_tac_toe.players.q_learn import QLearnPlayer
 from tic_tac_toe.players.learned_base import StateActions
 
 
+#: Board where only the cells 0 to 3 are empty, and its translation for 'X'.
+BOARD = "----XOXOX"
+STATE = "000012121"
+
+#: Board after 'X' claims cell 1 and 'O' cell 0, and its translation for 'X'.
+NEXT_BOARD = "OX--XOXOX"
+NEXT_STATE = "210012121"
+
+
 class QLearnPlayerTest(unittest.TestCase):
     """
     Tests for QLearn Player Class.
@@ -25,10 +35,10 @@ class QLearnPlayerTest(unittest.TestCase):
         Test that states for a new value are initialized correctly.
         """
         player = QLearnPlayer(mark="X", settings=self.ql_settings)
-        self.assertDictEqual(
-            player.agent_q_vals,
-            {},
-            "Initialized with non-empty values dictionary!"
+        self.assertEqual(
+            len(player.agent_q_vals),
+            0,
+            "Initialized with non-empty values table!"
         )
 
         state = "0" * 9
@@ -59,7 +69,7 @@ class QLearnPlayerTest(unittest.TestCase):
         self.assertTrue(visited, "Did not identify known state!")
 
         # Add second state
-        state = "1" * 9
+        state = "1" + "0" * 8
         visited = player.check_visited_state(
             state,
             list(range(len(state)))
@@ -76,7 +86,7 @@ class QLearnPlayerTest(unittest.TestCase):
         Test that a greedy action can be chosen reliably.
         """
         qs = {
-            "000": StateActions(
+            STATE: StateActions(
                 actions=np.array([0, 1, 2, 3], dtype=np.int16),
                 q_vals=np.array([0.1, 0.2, 0.1, -2.0], dtype=np.float32),
             )
@@ -89,8 +99,8 @@ class QLearnPlayerTest(unittest.TestCase):
 
         for _ in range(30):
             self.assertEqual(
-                player.select_action("000"),
-                int(np.argmax(qs["000"]["q_vals"])),
+                player.select_action(STATE),
+                int(np.argmax(qs[STATE]["q_vals"])),
                 "Did not select greedy action!"
             )
 
@@ -99,7 +109,7 @@ class QLearnPlayerTest(unittest.TestCase):
         Test that the final update is performed correctly on ending a game.
         """
         qs = {
-            "000": StateActions(
+            STATE: StateActions(
                 actions=np.array([0, 1, 2, 3], dtype=np.int16),
                 q_vals=np.array([0.0, 1.0, 0.0, 0.0], dtype=np.float32),
             )
@@ -116,12 +126,12 @@ class QLearnPlayerTest(unittest.TestCase):
             settings=sets,
             agent_q_vals=qs
         )
-        player.make_move(0.0, "---", [0, 1, 2, 3])
-        player.end_game(2.0, "XOX")
+        player.make_move(0.0, BOARD, [0, 1, 2, 3])
+        player.end_game(2.0, "X---XOXOX")
 
         good = np.allclose(
             np.array([0.0, 1.9, 0.0, 0.0]),
-            player.agent_q_vals["000"]["q_vals"],
+            player.agent_q_vals[STATE]["q_vals"],
         )
         self.assertTrue(good, "Did not correctly update values on episode end!")
 
@@ -130,13 +140,13 @@ class QLearnPlayerTest(unittest.TestCase):
         Test that the final update is performed correctly on ending a game.
         """
         qs = {
-            "000": StateActions(
+            STATE: StateActions(
                 actions=np.array([0, 1, 2, 3], dtype=np.int16),
                 q_vals=np.array([0.0, 1.0, 0.0, 0.0], dtype=np.float32),
             ),
-            "100": StateActions(
-                actions=np.array([0, 1, 2, 3], dtype=np.int16),
-                q_vals=np.array([0.0, 1.0, 0.0, 0.0], dtype=np.float32),
+            NEXT_STATE: StateActions(
+                actions=np.array([2, 3], dtype=np.int16),
+                q_vals=np.array([1.0, 0.0], dtype=np.float32),
             )
         }
         sets = TDSettings(
@@ -151,12 +161,12 @@ class QLearnPlayerTest(unittest.TestCase):
             settings=sets,
             agent_q_vals=qs
         )
-        player.make_move(0.0, "---", [0, 1, 2, 3])
-        player.make_move(3.0, "X--", [0, 1, 2, 3])
+        player.make_move(0.0, BOARD, [0, 1, 2, 3])
+        player.make_move(3.0, NEXT_BOARD, [2, 3])
 
         good = np.allclose(
             np.array([0.0, 2.4, 0.0, 0.0]),
-            player.agent_q_vals["000"]["q_vals"],
+            player.agent_q_vals[STATE]["q_vals"],
         )
         self.assertTrue(good, "Did not correctly update values on move!")
 
@@ -166,13 +176,13 @@ class QLearnPlayerTest(unittest.TestCase):
         :return:
         """
         qs = {
-            "000": StateActions(
+            STATE: StateActions(
                 actions=np.array([0, 1, 2, 3], dtype=np.int16),
                 q_vals=np.array([0.0, 1.0, 0.0, 0.0], dtype=np.float32),
             ),
-            "100": StateActions(
-                actions=np.array([0, 1, 2, 3], dtype=np.int16),
-                q_vals=np.array([0.0, 1.0, 0.0, 0.0], dtype=np.float32),
+            NEXT_STATE: StateActions(
+                actions=np.array([2, 3], dtype=np.int16),
+                q_vals=np.array([1.0, 0.0], dtype=np.float32),
             )
         }
         sets = TDSettings(
@@ -183,17 +193,28 @@ class QLearnPlayerTest(unittest.TestCase):
             step_size=0.5
         )
         agent = QLearnPlayer(mark="X", settings=sets, agent_q_vals=qs)
-        agent.make_move(0.0, "---", [0, 1, 2, 3])
-        agent.end_game(10.0, "X--")
+        agent.make_move(0.0, BOARD, [0, 1, 2, 3])
+        agent.end_game(10.0, "OX--XOXOX")
 
         self.assertTrue(
-            np.allclose(np.array([0.0, 5.5, 0.0, 0.0]), agent.agent_q_vals["000"]["q_vals"]),
+            np.allclose(np.array([0.0, 5.5, 0.0, 0.0]), agent.agent_q_vals[STATE]["q_vals"]),
             "Did not correctly update values on game end!"
         )
 
         self.assertIsNone(agent.prev_state, "Did not clear previous state!")
         self.assertIsNone(agent.prev_action, "Did not clear previous action!")
 
+        # Frozen agents skip the updates during the game, but not the final
+        # one, as they always have.
+        qs[STATE]["q_vals"][:] = [0.0, 1.0, 0.0, 0.0]
+        frozen = QLearnPlayer(mark="X", settings=sets, agent_q_vals=qs, freeze=True)
+        frozen.make_move(0.0, BOARD, [0, 1, 2, 3])
+        frozen.end_game(10.0, "OX--XOXOX")
+        self.assertTrue(np.allclose(
+            np.array([0.0, 5.5, 0.0, 0.0]),
+            frozen.agent_q_vals[STATE]["q_vals"]
+        ))
+
     def test_egreedy_prob_compute(self):
         """
         Test that epsilon-greedy probabilities are computed correctly.
@@ -207,3 +228,39 @@ class QLearnPlayerTest(unittest.TestCase):
             "Did not compute probabilities correctly!"
         )
 
+
+    def test_canonical_states(self):
+        """
+        Test that symmetric states share q-values and that actions are
+        mapped back to the frame of the board.
+        """
+        sets = self.ql_settings.model_copy(update={"canonicalize": True})
+        player = QLearnPlayer(mark="O", settings=sets)
+        player.make_move(0.0, "X--------", list(range(1, 9)))
+        player.end_game(0.0, "X--------")
+        player.make_move(0.0, "--------X", list(range(8)))
+        player.end_game(0.0, "--------X")
+        self.assertEqual(
+            len(player.agent_q_vals),
+            1,
+            "Symmetric states stored separately!"
+        )
+
+        # Make the cell next to the corner the best move
+        sid, sym = player.stored_id(ss.KEY_TO_ID["200000000"])
+        best = ss.INVERSE_SYMMETRIES_LIST[sym][1]
+        player.agent_q_vals.values[sid, best] = 10.0
+
+        self.assertEqual(player.select_action("200000000"), 1)
+        self.assertIn(player.select_action("002000000"), (1, 5))
+        self.assertIn(player.select_action("000000002"), (5, 7))
+
+        policy = player.dump_q_values()
+        self.assertTrue(policy.canonical)
+        loaded = QLearnPlayer.from_policy(
+            policy,
+            mark="O",
+            settings=self.ql_settings
+        )
+        self.assertTrue(loaded.canonical, "Did not load canonical policy.")
+        self.assertEqual(loaded.dump_q_values(), policy)
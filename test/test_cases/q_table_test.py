@@ -0,0 +1,73 @@
+from unittest import TestCase
+
+import numpy as np
+
+from tic_tac_toe import state_space as ss
+from tic_tac_toe.players.q_table import QTable
+from tic_tac_toe.players.q_learn import QLearnPlayer
+from tic_tac_toe.players.schemas import TDSettings, TabularPolicy
+
+
+class QTableTest(TestCase):
+    """
+    Tests for the dense Q-table.
+    """
+
+    def test_init(self):
+        """
+        Test that legal actions start at the default value.
+        """
+        table = QTable(default_q=0.5)
+        self.assertEqual(len(table), 0)
+        self.assertTrue(np.all(table.values[ss.LEGAL_MASK] == 0.5))
+        self.assertTrue(np.all(np.isneginf(table.values[~ss.LEGAL_MASK])))
+
+        self.assertFalse(table.visit(ss.EMPTY_ID))
+        self.assertTrue(table.visit(ss.EMPTY_ID))
+        self.assertIn("0" * 9, table)
+        self.assertListEqual(
+            table["0" * 9]["actions"].tolist(),
+            list(range(9))
+        )
+
+    def test_policy_round_trip(self):
+        """
+        Test that serialized policies are loaded back unchanged.
+        """
+        policy = TabularPolicy(states={
+            "000000000": {str(a): 0.1 * a for a in range(9)},
+            "120000000": {str(a): -0.5 for a in range(2, 9)},
+        })
+        table = QTable.from_policy(policy, default_q=3.0)
+        self.assertEqual(len(table), 2)
+        self.assertEqual(
+            table.values[ss.KEY_TO_ID["120000000"], 0],
+            -np.inf
+        )
+        loaded = table.to_policy()
+        for state, qs in policy.states.items():
+            for a, q in qs.items():
+                self.assertAlmostEqual(loaded.states[state][a], q, places=6)
+
+        with self.assertRaises(KeyError):
+            QTable.from_policy(TabularPolicy(states={"111": {}}))
+
+    def test_batch_duplicates(self):
+        """
+        Test that repeated state-actions in a batch update like sequential
+        updates with equal targets.
+        """
+        sets = TDSettings(step_size=0.5, default_q=0.0, epsilon_greedy=False)
+        player = QLearnPlayer(mark="X", settings=sets)
+        views = np.array([ss.EMPTY_ID] * 3)
+        player.update_batch(
+            views,
+            np.array([4, 4, 4]),
+            np.array([1.0, 1.0, 1.0]),
+            views,
+            np.array([True, True, True])
+        )
+        self.assertAlmostEqual(
+            float(player.agent_q_vals.values[ss.EMPTY_ID, 4]),
+            0.875
+        )
@@ -1,6 +1,6 @@
 from unittest import TestCase
 
-from tic_tac_toe.players.random import RandomPlayer
+from tic_tac_toe.players.random import RandomPlayer, random_rival
 
 
 class RandomPlayerTest(TestCase):
@@ -53,3 +53,15 @@ class RandomPlayerTest(TestCase):
             1,
             "Selected invalid move."
         )
+
+    def test_random_rival(self):
+        """
+        Test that random rivals are reproducible, and do not share the
+        stream of a player seeded with the run's seed.
+        """
+        moves = list(range(9))
+        rivals = [random_rival(7), random_rival(7), RandomPlayer("O", 7)]
+        draws = [[p.make_move(0.0, "", moves) for _ in range(50)] for p in rivals]
+        self.assertListEqual(draws[0], draws[1])
+        self.assertNotEqual(draws[0], draws[2])
+        self.assertEqual(rivals[0].mark, "O")
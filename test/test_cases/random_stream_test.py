@@ -0,0 +1,47 @@
+from unittest import TestCase
+
+from tic_tac_toe.random_stream import RandomStream, stream_seed
+
+
+class RandomStreamTest(TestCase):
+    """
+    Tests for the block-prefetched random streams.
+    """
+
+    def test_reproducible(self):
+        """
+        Test that streams with the same seed give the same values, and
+        derived seeds give different ones.
+        """
+        first, second = RandomStream(3, block_size=7), RandomStream(3, block_size=7)
+        values = [first.random() for _ in range(20)]
+        self.assertListEqual(values, [second.random() for _ in range(20)])
+        self.assertTrue(all(0.0 <= v < 1.0 for v in values))
+
+        other = RandomStream(stream_seed(3, 1), block_size=7)
+        self.assertNotEqual(values, [other.random() for _ in range(20)])
+
+    def test_state(self):
+        """
+        Test that a restored stream continues where the original was, also
+        across block boundaries.
+        """
+        stream = RandomStream(5, block_size=4)
+        for _ in range(6):
+            stream.random()
+        state = stream.get_state()
+        expected = [stream.random() for _ in range(10)]
+
+        restored = RandomStream(0, block_size=4)
+        restored.set_state(state)
+        self.assertListEqual(expected, [restored.random() for _ in range(10)])
+
+    def test_choice(self):
+        """
+        Test that choices cover all the options and nothing else.
+        """
+        stream = RandomStream(1)
+        options = [2, 4, 6]
+        picks = {stream.choice(options) for _ in range(300)}
+        self.assertSetEqual(picks, set(options))
+        self.assertTrue(all(0 <= stream.below(5) < 5 for _ in range(300)))
@@ -0,0 +1,130 @@
+from unittest import TestCase
+
+import numpy as np
+
+from tic_tac_toe import state_space as ss
+from tic_tac_toe.schemas import GameSettings
+from tic_tac_toe.players.q_learn import QLearnPlayer
+from tic_tac_toe.players.e_sarsa import ESarsaPlayer
+from tic_tac_toe.players.random import RandomPlayer
+from tic_tac_toe.players.replay import ReplayBuffer
+from tic_tac_toe.players.schemas import TDSettings
+from tic_tac_toe.random_stream import RandomStream
+from tic_tac_toe.training.train_agent import run_game, run_vectorized
+from tic_tac_toe.training.evaluation import evaluate_benchmarks
+
+
+class ReplayTest(TestCase):
+    """
+    Tests for experience replay.
+    """
+
+    def test_ring_buffer(self):
+        """
+        Test that the buffer keeps the latest transitions.
+        """
+        buffer = ReplayBuffer(4, random_seed=1)
+        buffer.add(1, 2, 0.0, 3, False)
+        self.assertEqual(len(buffer), 1)
+
+        views = np.arange(10, 15)
+        buffer.add_batch(
+            views,
+            np.full(5, 4),
+            np.ones(5),
+            views + 1,
+            np.array([False, False, False, False, True])
+        )
+        self.assertEqual(len(buffer), 4)
+
+        batch = buffer.sample(200)
+        self.assertSetEqual(set(batch.view_ids.tolist()), {11, 12, 13, 14})
+        self.assertTrue(np.all(batch.actions == 4))
+        self.assertTrue(np.all(batch.done == (batch.view_ids == 14)))
+        self.assertTrue(np.all(batch.next_view_ids[batch.done] == -1))
+        self.assertTrue(np.all(
+            batch.next_view_ids[~batch.done] == batch.view_ids[~batch.done] + 1
+        ))
+
+    def test_state(self):
+        """
+        Test that a restored buffer samples as the original one.
+        """
+        buffer = ReplayBuffer(8, random_seed=2)
+        views = np.arange(6)
+        buffer.add_batch(views, views % 9, views * 0.5, views + 1, views == 5)
+        state = buffer.get_state()
+
+        other = ReplayBuffer(8, random_seed=3)
+        other.set_state(state)
+        for column, other_column in zip(buffer.sample(20), other.sample(20)):
+            self.assertTrue(np.array_equal(column, other_column))
+
+        with self.assertRaises(ValueError):
+            ReplayBuffer(1).sample(1)
+
+    def test_learn_from_batch(self):
+        """
+        Test that replayed terminal transitions move the values to the
+        rewards.
+        """
+        player = QLearnPlayer(
+            "X",
+            TDSettings(step_size=0.5, replay_size=16, replay_batch=4)
+        )
+        player.learn_from_batch()
+        self.assertEqual(player.agent_q_vals.values[ss.EMPTY_ID, 4], 0.0)
+
+        player.replay.add(ss.EMPTY_ID, 4, 1.0, -1, True)
+        for _ in range(10):
+            player.learn_from_batch()
+        self.assertAlmostEqual(
+            float(player.agent_q_vals.values[ss.EMPTY_ID, 4]),
+            1.0,
+            places=3
+        )
+
+    def test_frozen(self):
+        """
+        Test that frozen players neither store nor learn from transitions.
+        """
+        player = ESarsaPlayer(
+            "X",
+            TDSettings(replay_size=16),
+            freeze=True
+        )
+        values = player.agent_q_vals.values.copy()
+        player.make_move_id(0.0, ss.EMPTY_ID)
+        player.end_game(1.0, "X" * 9)
+        self.assertEqual(len(player.replay), 0)
+        self.assertTrue(np.array_equal(player.agent_q_vals.values, values))
+
+    def test_training(self):
+        """
+        Test that agents trained with replay learn to beat a random player,
+        both one game at a time and on a vectorized environment.
+        """
+        for n_envs in (None, 64):
+            agent = QLearnPlayer(
+                "X",
+                TDSettings(random_seed=5, replay_size=5000, replay_batch=16)
+            )
+            rival = RandomPlayer("O", random_seed=6)
+            if n_envs is None:
+                seats = RandomStream(7)
+                for _ in range(1500):
+                    run_game(GameSettings(), agent, rival, seats)
+            else:
+                run_vectorized(
+                    GameSettings(),
+                    agent,
+                    rival,
+                    total_episodes=1500,
+                    n_envs=n_envs,
+                    show_progress=False
+                )
+
+            self.assertEqual(len(agent.replay), 5000)
+            agent.epsilon_greedy = False
+            results = evaluate_benchmarks(agent, ["random"], 400)
+            self.assertGreater(results["random"].score, 0.7)
@@ -0,0 +1,91 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from tic_tac_toe.players.q_learn import QLearnPlayer
+from tic_tac_toe.players.random import RandomPlayer
+from tic_tac_toe.players.compiled import CompiledPlayer
+from tic_tac_toe.players.schemas import TDSettings
+from tic_tac_toe.players.policy_io import save_binary_policy
+from tic_tac_toe.tablebase import load_tablebase
+from tic_tac_toe.training import sprt
+from tic_tac_toe.training.schemas import EvaluationResult
+
+
+class SPRTTest(TestCase):
+    """
+    Tests for the sequential comparisons of players.
+    """
+
+    def test_llr(self):
+        """
+        Test the Elo conversions and the sign of the log-likelihood ratio.
+        """
+        for elo in (-300.0, 0.0, 35.0):
+            self.assertAlmostEqual(sprt.score_to_elo(sprt.elo_to_score(elo)), elo)
+
+        strong = EvaluationResult(games=100, wins=60, draws=20, losses=20)
+        even = EvaluationResult(games=100, wins=30, draws=40, losses=30)
+        self.assertGreater(sprt.sprt_llr(strong, 0.0, 20.0), 0.0)
+        self.assertLess(sprt.sprt_llr(even, 0.0, 20.0), 0.0)
+        self.assertAlmostEqual(
+            sprt.sprt_llr(strong, 0.0, 20.0),
+            -sprt.sprt_llr(strong, 20.0, 0.0)
+        )
+
+    def test_decisions(self):
+        """
+        Test that clear differences are decided after a batch, that even
+        players accept the null hypothesis, and that the test stops at the
+        maximum number of games.
+        """
+        perfect = CompiledPlayer("X", load_tablebase().moves)
+        out = sprt.run_sprt(perfect, RandomPlayer("O", random_seed=1))
+        self.assertEqual(out.decision, sprt.H1)
+        self.assertEqual(out.result.games, 200)
+        self.assertGreater(out.score_low, 0.5)
+        self.assertLessEqual(out.score_low, out.score)
+        self.assertLessEqual(out.score, out.score_high)
+
+        out = sprt.run_sprt(
+            RandomPlayer("X", random_seed=2),
+            RandomPlayer("O", random_seed=3),
+            elo1=50.0,
+            batch_games=100
+        )
+        self.assertEqual(out.decision, sprt.H0)
+        self.assertGreater(out.result.games, 100)
+
+        out = sprt.run_sprt(
+            RandomPlayer("X", random_seed=4),
+            RandomPlayer("O", random_seed=5),
+            batch_games=20,
+            max_games=50
+        )
+        self.assertEqual(out.decision, sprt.INCONCLUSIVE)
+        self.assertEqual(out.result.games, 50)
+
+        with self.assertRaises(ValueError):
+            sprt.run_sprt(perfect, perfect, elo0=10.0, elo1=0.0)
+
+    def test_load_player(self):
+        """
+        Test that players are loaded frozen from types and policy files.
+        """
+        trained = QLearnPlayer("X", TDSettings())
+        trained.agent_q_vals.values[0, 4] = 2.0
+        trained.agent_q_vals.visited[0] = True
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "policy.qtab"
+            save_binary_policy(trained.agent_q_vals, path)
+            player = sprt.load_player(str(path), epsilon=0.1)
+
+        self.assertIsInstance(player, QLearnPlayer)
+        self.assertTrue(player.frozen)
+        self.assertEqual(player.epsilon, 0.1)
+        self.assertEqual(float(player.agent_q_vals.values[0, 4]), 2.0)
+
+        self.assertFalse(sprt.load_player("expected_sarsa").epsilon_greedy)
+        self.assertIsInstance(sprt.load_player("random"), RandomPlayer)
+        with self.assertRaises(KeyError):
+            sprt.load_player("no_such_player")
@@ -0,0 +1,83 @@
+from unittest import TestCase
+
+import numpy as np
+
+from tic_tac_toe import state_space as ss
+from tic_tac_toe.game import Game
+from tic_tac_toe.schemas import GameSettings
+from tic_tac_toe.players.random import RandomPlayer
+
+
+class StateSpaceTest(TestCase):
+    """
+    Tests for the precomputed state table.
+    """
+
+    def setUp(self):
+        self.game = Game(
+            GameSettings(),
+            RandomPlayer("X", 1),
+            RandomPlayer("O", 2)
+        )
+
+    def test_counts(self):
+        """
+        Test the number of reachable positions.
+        """
+        self.assertEqual(
+            int(ss.REACHABLE.sum()),
+            5478,
+            "Wrong number of reachable positions."
+        )
+        self.assertEqual(ss.BOARDS[ss.EMPTY_ID], "-" * 9)
+
+    def test_tables(self):
+        """
+        Test that the tables agree with the string-based game methods.
+        """
+        for sid in range(ss.N_STATES):
+            board = ss.BOARDS[sid]
+            self.assertEqual(ss.KEY_TO_ID[ss.STATE_KEYS[sid]], sid)
+            self.assertEqual(
+                ss.WINNER_LIST[sid],
+                self.game.check_winner(board),
+                "Wrong winner for '%s'." % board
+            )
+            if ss.WINNER_LIST[sid] is None:
+                self.assertListEqual(
+                    ss.LEGAL_MOVES[sid],
+                    self.game.empty_cells(board),
+                    "Wrong legal moves for '%s'." % board
+                )
+            else:
+                self.assertListEqual(ss.LEGAL_MOVES[sid], [])
+
+            self.assertEqual(ss.SWAP_ID[ss.SWAP_ID[sid]], sid)
+
+    def test_transitions(self):
+        """
+        Test that transitions place the mark of the player to move.
+        """
+        sid = ss.BOARD_TO_ID["X-O-X----"]
+        nxt = ss.NEXT_STATE[sid, 8]
+        self.assertEqual(ss.BOARDS[nxt], "X-O-X---O")
+        self.assertEqual(ss.NEXT_STATE[sid, 0], -1, "Allowed illegal move.")
+
+        moves = ss.NEXT_STATE[ss.REACHABLE]
+        self.assertTrue(
+            np.all(ss.REACHABLE[moves[moves >= 0]]),
+            "Transition to unreachable state."
+        )
+
+    def test_view_ids(self):
+        """
+        Test that view ids match the translated boards of the players.
+        """
+        sid = ss.BOARD_TO_ID["XOX-O----"]
+        x_play = RandomPlayer("X")
+        o_play = RandomPlayer("O")
+        self.assertEqual(
+            ss.STATE_KEYS[x_play.view_id(sid)],
+            x_play.translate_board(ss.BOARDS[sid])
+        )
+        self.assertEqual(ss.STATE_KEYS[o_play.view_id(sid)], "212010000")
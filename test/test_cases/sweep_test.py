@@ -0,0 +1,90 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+from tic_tac_toe.players.random import RandomPlayer
+from tic_tac_toe.training import sweep
+from tic_tac_toe.training import schemas as sch
+from tic_tac_toe.training.evaluation import play_matches
+
+
+class SweepTest(TestCase):
+    """
+    Tests for hyperparameter sweeps and policy evaluation.
+    """
+
+    def settings(self, **kwargs) -> sch.SweepSettings:
+        return sch.SweepSettings(
+            params={
+                "td.step_size": {"values": [0.1, 0.2]},
+                "game.draw_reward": {"values": [0.0, 0.5, 1.0]},
+            },
+            **kwargs
+        )
+
+    def test_grid(self):
+        """
+        Test that grid sweeps run every combination of values.
+        """
+        trials = sweep.sample_trials(self.settings())
+        self.assertEqual(len(trials), 6)
+        self.assertIn({"td.step_size": 0.2, "game.draw_reward": 0.5}, trials)
+
+        td, game = sweep.trial_settings(self.settings(), trials[-1])
+        self.assertEqual(td.step_size, 0.2)
+        self.assertEqual(game.draw_reward, 1.0)
+
+    def test_random(self):
+        """
+        Test that random sweeps sample inside the search space.
+        """
+        settings = sch.SweepSettings(
+            params={
+                "td.epsilon": {"low": 0.01, "high": 0.5, "log": True},
+                "td.canonicalize": {"values": [True, False]},
+            },
+            n_trials=10,
+        )
+        trials = sweep.sample_trials(settings)
+        self.assertEqual(len(trials), 10)
+        self.assertListEqual(trials, sweep.sample_trials(settings))
+        for params in trials:
+            self.assertTrue(0.01 <= params["td.epsilon"] <= 0.5)
+            self.assertIn(params["td.canonicalize"], (True, False))
+
+        with self.assertRaises(ValueError):
+            sweep.sample_trials(settings.model_copy(update={"n_trials": None}))
+
+        with self.assertRaises(KeyError):
+            sweep.trial_settings(settings, {"td.nope": 1.0})
+
+    def test_play_matches(self):
+        """
+        Test that every evaluation game is counted once.
+        """
+        result = play_matches(RandomPlayer("X", 1), RandomPlayer("O", 2), 101)
+        self.assertEqual(result.wins + result.draws + result.losses, 101)
+        self.assertTrue(0.0 <= result.score <= 1.0)
+
+    def test_rungs(self):
+        """
+        Test that trials keep training from the previous rung.
+        """
+        settings = self.settings(eval_games=50, n_envs=64)
+        with tempfile.TemporaryDirectory() as tmp:
+            task = sweep.RungTask(
+                folder=Path(tmp),
+                trial="trial-000",
+                trial_id=0,
+                rung=0,
+                episodes=200,
+                params=sweep.sample_trials(settings)[0],
+                settings=settings,
+            )
+            first = sweep._run_rung(task)
+            second = sweep._run_rung(task._replace(rung=1, episodes=300))
+
+            self.assertEqual(first.episodes, 200)
+            self.assertEqual(second.episodes, 500)
+            self.assertEqual(second.evaluation.games, 50)
+            self.assertTrue((Path(tmp) / "policy.qtab").is_file())
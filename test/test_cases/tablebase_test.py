@@ -0,0 +1,78 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import numpy as np
+
+from tic_tac_toe.game import Game
+from tic_tac_toe import state_space as ss
+from tic_tac_toe import tablebase as tb
+from tic_tac_toe.schemas import GameSettings
+from tic_tac_toe.players.random import RandomPlayer
+from tic_tac_toe.players.schemas import TDSettings
+from tic_tac_toe.players.minimax import MinimaxPlayer
+from tic_tac_toe.players.learn_types import instantiate_agent
+from tic_tac_toe.constants import DEFAULT_TD_CFG
+
+
+class TablebaseTest(TestCase):
+    """
+    Tests for the tablebase and the perfect-play player.
+    """
+
+    def test_round_trip(self):
+        """
+        Test that a saved tablebase reads back the same.
+        """
+        built = tb.build_tablebase()
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "tablebase.ttb"
+            tb.save_tablebase(built, path)
+            loaded = tb.read_tablebase(path)
+            with open(path, "r+b") as f:
+                f.write(b"NOT-TBAS")
+            with self.assertRaises(ValueError):
+                tb.read_tablebase(path)
+
+        for array, expected in zip(loaded, built):
+            self.assertTrue(np.array_equal(array, expected))
+
+    def test_move_scores(self):
+        """
+        Test that the best moves have the best move scores.
+        """
+        table = tb.load_tablebase()
+        scores = table.move_scores()
+        playable = np.flatnonzero(table.moves >= 0)
+        best = scores[playable, table.moves[playable]]
+        self.assertTrue(np.array_equal(best, scores[playable].max(axis=1)))
+        self.assertTrue(np.array_equal(best, table.scores[playable]))
+        self.assertTrue(np.all(np.isneginf(scores[~ss.LEGAL_MASK])))
+
+    def test_never_loses(self):
+        """
+        Test that the minimax player never loses against a random player,
+        with either mark.
+        """
+        player = MinimaxPlayer("X", TDSettings())
+        rival = RandomPlayer("O", 7)
+        for i in range(200):
+            players = (player, rival) if i % 2 == 0 else (rival, player)
+            game = Game(GameSettings(), *players)
+            done = None
+            while done is None:
+                done = game.make_move()
+            self.assertIn(done, ("-", player.mark))
+
+    def test_player_type(self):
+        """
+        Test that the minimax player type ignores starting policies.
+        """
+        player, _ = instantiate_agent(
+            "minimax",
+            td_settings_file=DEFAULT_TD_CFG,
+            policy_file="missing-policy.json"
+        )
+        self.assertIsInstance(player, MinimaxPlayer)
+        self.assertFalse(player.epsilon_greedy)
+        self.assertTrue(player.frozen)
@@ -2,9 +2,26 @@ from unittest import TestCase
 
 from tic_tac_toe.game import Game
 from tic_tac_toe.schemas import GameSettings
+from tic_tac_toe.players import BasePlayer
 from tic_tac_toe.players.random import RandomPlayer
 
 
+class FixedPlayer(BasePlayer):
+    """
+    Player that always claims the same cell.
+    """
+
+    def __init__(self, mark, cell: int):
+        super().__init__(mark)
+        self.cell = cell
+
+    def make_move(self, reward, state, available_moves) -> int:
+        return self.cell
+
+    def end_game(self, reward, state):
+        pass
+
+
 class TestGame(TestCase):
     """
     Tests for the 'Game' class.
@@ -123,6 +140,21 @@ class TestGame(TestCase):
             "Did not update next turn."
         )
 
+    def test_illegal_moves(self):
+        """
+        Test that moves out of the board or on taken cells are rejected.
+        """
+        for cell in (-1, 9):
+            game = Game(self.game_settings, FixedPlayer("X", cell), self.o_player)
+            with self.assertRaises(ValueError):
+                game.make_move()
+
+        game = Game(self.game_settings, FixedPlayer("X", 0), FixedPlayer("O", 0))
+        game.make_move()
+        with self.assertRaises(ValueError):
+            game.make_move()
+        self.assertEqual(game.state[0], "X")
+
     def test_empty_cells(self):
         """
         Test that the game can correctly identify empty cells.
@@ -144,3 +176,28 @@ class TestGame(TestCase):
             self.game.empty_cells(board),
             "Did not identify empty cells."
         )
+
+    def test_bitboards_match_state(self):
+        """
+        Test that the bitboards and the incremental win check agree with the
+        board string over full games.
+        """
+        for seed in range(50):
+            game = Game(
+                self.game_settings,
+                RandomPlayer("X", seed),
+                RandomPlayer("O", seed + 1000)
+            )
+            done = None
+            while done is None:
+                done = game.make_move()
+                x_bits, o_bits = game.bitboards
+                for i, cell in enumerate(game.state):
+                    self.assertEqual(cell == "X", bool(x_bits & (1 << i)))
+                    self.assertEqual(cell == "O", bool(o_bits & (1 << i)))
+
+                self.assertEqual(
+                    done,
+                    game.check_winner(game.state),
+                    "Incremental win check disagrees with full check."
+                )
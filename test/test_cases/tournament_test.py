@@ -0,0 +1,123 @@
+import tempfile
+from pathlib import Path
+from unittest import TestCase
+
+import numpy as np
+
+from tic_tac_toe.schemas import GameSettings
+from tic_tac_toe.players.q_learn import QLearnPlayer
+from tic_tac_toe.players.random import RandomPlayer
+from tic_tac_toe.players.schemas import TDSettings
+from tic_tac_toe.players.policy_io import save_binary_policy
+from tic_tac_toe.random_stream import RandomStream
+from tic_tac_toe.training import tournament as tn
+from tic_tac_toe.training.train_agent import run_game
+
+
+class TournamentTest(TestCase):
+    """
+    Tests for round-robin tournaments.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        folder = Path(cls.tmp.name)
+        for k, episodes in enumerate((0, 200, 2000)):
+            agent = QLearnPlayer("X", TDSettings(random_seed=k))
+            rival = RandomPlayer("O", random_seed=k)
+            seats = RandomStream(k)
+            for _ in range(episodes):
+                run_game(GameSettings(), agent, rival, seats)
+
+            (folder / ("run-%d" % k)).mkdir()
+            save_binary_policy(
+                agent.agent_q_vals,
+                folder / ("run-%d" % k) / "policy.qtab"
+            )
+        cls.folder = folder
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def test_find_policies(self):
+        """
+        Test that entrants are found by run name, path and benchmark name.
+        """
+        found = tn.find_policies(runs_dir=self.folder)
+        self.assertListEqual(list(found), ["run-0", "run-1", "run-2"])
+
+        found = tn.find_policies(
+            "run-1,%s,perfect" % (self.folder / "run-2" / "policy.qtab"),
+            runs_dir=self.folder
+        )
+        self.assertListEqual(list(found), ["run-1", "run-2", "perfect"])
+        with self.assertRaises(FileNotFoundError):
+            tn.find_policies(["run-9"], runs_dir=self.folder)
+
+    def test_bradley_terry(self):
+        """
+        Test that the ratings match the win rates, and stay finite for
+        entrants that win all their games.
+        """
+        points = np.array([[0.0, 800.0], [200.0, 0.0]])
+        games = np.array([[0.0, 1000.0], [1000.0, 0.0]])
+        ratings, errors = tn.bradley_terry(points, games, prior_draws=1e-6)
+        self.assertAlmostEqual(ratings[0] - ratings[1], 400 * np.log10(4), places=3)
+        self.assertAlmostEqual(np.mean(ratings), tn.MEAN_RATING)
+        self.assertTrue(np.all(errors > 0.0))
+
+        points = np.array([[0.0, 2.0], [0.0, 0.0]])
+        games = np.array([[0.0, 2.0], [2.0, 0.0]])
+        ratings, _ = tn.bradley_terry(points, games)
+        self.assertTrue(np.all(np.isfinite(ratings)))
+        self.assertGreater(ratings[0], ratings[1])
+
+    def test_cached_outcomes(self):
+        """
+        Test that games between greedy policies are played once per seat,
+        and taken from the cache afterwards.
+        """
+        entrants = tn.find_policies(runs_dir=self.folder)
+        entrants["perfect"] = "perfect"
+        path = self.folder / tn.CACHE_FILE
+        cache = tn.OutcomeCache(path)
+        summary = tn.run_tournament(entrants, cache=cache, show_progress=False)
+        cache.save()
+
+        self.assertEqual(summary.cached_outcomes, 0)
+        self.assertEqual(len(cache), 12)
+        self.assertTrue(all(p.deterministic for p in summary.pairs))
+        self.assertTrue(all(s.games == 6 for s in summary.standings))
+        self.assertEqual(summary.standings[0].name, "perfect")
+        for s in summary.standings:
+            self.assertLess(s.ci_low, s.rating)
+            self.assertGreater(s.ci_high, s.rating)
+
+        cached = tn.run_tournament(
+            entrants,
+            cache=tn.OutcomeCache(path),
+            show_progress=False
+        )
+        self.assertEqual(cached.cached_outcomes, 12)
+        self.assertListEqual(cached.standings, summary.standings)
+
+    def test_stochastic(self):
+        """
+        Test that pairs with a stochastic entrant play a batch of games, and
+        that trained policies are rated above the random player.
+        """
+        entrants = tn.find_policies(["run-2", "random"], runs_dir=self.folder)
+        summary = tn.run_tournament(
+            entrants,
+            games=200,
+            workers=1,
+            show_progress=False
+        )
+        self.assertFalse(summary.pairs[0].deterministic)
+        self.assertEqual(summary.pairs[0].result.games, 200)
+        self.assertListEqual(
+            [s.name for s in summary.standings],
+            ["run-2", "random"]
+        )
@@ -0,0 +1,76 @@
+from unittest import TestCase
+
+import numpy as np
+
+from tic_tac_toe import state_space as ss
+from tic_tac_toe.game import Game
+from tic_tac_toe.schemas import GameSettings
+from tic_tac_toe.vec_game import VecGame, X_MARK, O_MARK
+from tic_tac_toe.players.random import RandomPlayer
+
+
+class VecGameTest(TestCase):
+    """
+    Tests for the 'VecGame' class.
+    """
+
+    def setUp(self):
+        self.settings = GameSettings(win_reward=2.0, lose_reward=-3.0)
+        self.game = Game(
+            self.settings,
+            RandomPlayer("X", 1),
+            RandomPlayer("O", 2)
+        )
+
+    def test_step(self):
+        """
+        Test that stepping the batch follows the game rules and resets
+        finished games.
+        """
+        vec = VecGame(3, self.settings)
+        boards = ["XX-OO----", "XOXXOOOX-", "X---O----"]
+        ids = np.array([ss.BOARD_TO_ID[b] for b in boards])
+        vec.state_ids[:] = ids
+        vec.next_turn[:] = [X_MARK, X_MARK, X_MARK]
+
+        result = vec.step(np.array([2, 8, 8]))
+        self.assertListEqual(
+            [ss.BOARDS[i] for i in result.state_ids],
+            ["XXXOO----", "XOXXOOOXX", "X---O---X"],
+        )
+        self.assertListEqual(result.done.tolist(), [True, True, False])
+        self.assertListEqual(
+            [ss.WINNER_MARKS[w] for w in result.winners],
+            ["X", "-", None],
+        )
+        self.assertListEqual(result.x_rewards.tolist(), [2.0, 0.0, 0.0])
+        self.assertListEqual(result.o_rewards.tolist(), [-3.0, 0.0, 0.0])
+
+        self.assertListEqual(
+            vec.state_ids.tolist(),
+            [ss.EMPTY_ID, ss.EMPTY_ID, result.state_ids[2]],
+            "Did not reset finished games."
+        )
+        self.assertListEqual(vec.next_turn.tolist(), [X_MARK, X_MARK, O_MARK])
+
+        with self.assertRaises(ValueError):
+            vec.step(np.array([0, 0, 0]))
+
+    def test_random_games(self):
+        """
+        Test that batched random play always makes legal moves.
+        """
+        vec = VecGame(64, self.settings, auto_reset=False)
+        player = RandomPlayer("X", 3)
+        finished = np.zeros(64, dtype=bool)
+        for _ in range(9):
+            moves = player.select_actions(vec.state_ids)
+            legal = vec.legal_mask[np.arange(64), moves]
+            self.assertTrue(np.all(legal[vec.active]), "Illegal move.")
+            result = vec.step(moves)
+            finished |= result.done
+            vec.deactivate(result.done)
+
+        self.assertTrue(np.all(finished), "Games did not finish.")
+        for sid in vec.state_ids:
+            self.assertIsNotNone(self.game.check_winner(ss.BOARDS[sid]))
@@ -1,6 +1,22 @@
 import fire
 
 from .play_terminal import play_against_bot
+from .training.sweep import run_sweep
+from .training.analysis import analyze_policy_file
+from .tablebase import write_tablebase
+from .bench import bench
+from .training.tournament import tournament
+from .training.sprt import evaluate
+from .players.policy_io import convert_policy
 
 
-fire.Fire({"play": play_against_bot})
+fire.Fire({
+    "play": play_against_bot,
+    "convert-policy": convert_policy,
+    "sweep": run_sweep,
+    "build-tablebase": write_tablebase,
+    "analyze": analyze_policy_file,
+    "bench": bench,
+    "tournament": tournament,
+    "evaluate": evaluate,
+})
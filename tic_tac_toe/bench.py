@@ -0,0 +1,494 @@
+"""
+Benchmark suite: microbenchmarks of the hot paths of the game and the
+players, and end-to-end training speed for the standard matchups. Every
+benchmark is seeded, so runs time the same work, and the results of a run
+can be compared against a stored baseline to catch regressions.
+"""
+import gc
+import sys
+import json
+import time
+import platform
+import tempfile
+import numpy as np
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Callable, List, NamedTuple, Optional, Tuple, Union
+
+from .game import Game
+from . import state_space as ss
+from .players import BasePlayer
+from .players.q_learn import QLearnPlayer
+from .players.e_sarsa import ESarsaPlayer
+from .players.random import RandomPlayer
+from .players.schemas import TDSettings
+from .players.learned_base import BaseTDPlayer
+from .players.learn_types import PLAYER_TYPES
+from .constants import OUTPUTS_DIR
+from .schemas import PLAYS, BenchReport, BenchResult, GameSettings
+from .training.train_agent import play_episodes
+from .training.episode_log import EpisodeWriter
+
+#: Default locations of the results of the last run and of the baseline.
+BENCH_DIR: Path = OUTPUTS_DIR / "bench"
+RESULTS_FILE: Path = BENCH_DIR / "results.json"
+BASELINE_FILE: Path = BENCH_DIR / "baseline.json"
+
+#: Seed of every random choice made by the benchmarks.
+SEED: int = 1234
+
+#: Makes a benchmark for a scale factor: returns a function that prepares
+#: a repetition (untimed) and returns the function to time, and the number
+#: of operations each repetition makes.
+Factory = Callable[[float], Tuple[Callable[[], Callable[[], None]], int]]
+
+
+class Benchmark(NamedTuple):
+    """
+    A benchmark of the suite.
+    """
+    name: str
+    kind: str  #: 'micro' or 'macro'
+    unit: str  #: What an operation is
+    factory: Factory
+
+
+class Comparison(NamedTuple):
+    """
+    Result of a benchmark compared with the baseline.
+    """
+    name: str
+    baseline_ops: float  #: Operations per second of the baseline
+    ops: float  #: Operations per second now
+    ratio: float  #: Speed relative to the baseline, above 1 if faster
+    regressed: bool
+
+
+def _sample_states(n: int, seed: int = SEED) -> np.ndarray:
+    """
+    Reachable positions where a player has to move, sampled uniformly.
+    """
+    playable = np.flatnonzero(ss.REACHABLE & (ss.WINNER == ss.ONGOING))
+    return np.random.default_rng(seed).choice(playable, n)
+
+
+def _ops(scale: float, n: int) -> int:
+    return max(1, int(n * scale))
+
+
+def _trained_player(player_cls, **settings) -> BaseTDPlayer:
+    """
+    Player with random Q-values, so its choices do not depend on ties.
+    """
+    player = player_cls("X", TDSettings(random_seed=SEED, **settings))
+    table = player.agent_q_vals
+    noise = np.random.default_rng(SEED).random(table.values.shape)
+    table.values[:] = np.where(
+        np.isfinite(table.values),
+        noise,
+        table.values
+    ).astype(np.float32)
+    table.visited[:] = True
+    return player
+
+
+class _ScriptedPlayer(BasePlayer):
+    """
+    Player with a cheap, deterministic choice of moves, so that game
+    benchmarks time the game itself.
+    """
+
+    def __init__(self, mark: PLAYS, turn: int = 0):
+        """
+        :param mark:
+        :param turn: Turn counter the choice of moves starts from.
+        """
+        super().__init__(mark)
+        self.turn = turn
+
+    def make_move(self, reward: float, state: str, available_moves: List[int]) -> int:
+        """
+        Cycle through the available moves as the turns go by.
+        :param reward:
+        :param state:
+        :param available_moves:
+        :return:
+        """
+        self.turn += 1
+        return available_moves[self.turn % len(available_moves)]
+
+    def make_move_id(self, reward: float, state_id: int) -> int:
+        """
+        Cycle through the legal moves of a state as the turns go by.
+        :param reward:
+        :param state_id:
+        :return:
+        """
+        self.turn += 1
+        legal = ss.LEGAL_MOVES[state_id]
+        return legal[self.turn % len(legal)]
+
+    def end_game(self, reward: float, state: str):
+        """
+        Dummy method in this case.
+        :param reward:
+        :param state:
+        :return:
+        """
+        pass
+
+
+def _play_scripted(x_player: _ScriptedPlayer, o_player: _ScriptedPlayer, turn: int) -> int:
+    """
+    Play a game between scripted players starting from the given turn.
+    :return: Number of moves made.
+    """
+    x_player.turn, o_player.turn = turn, turn
+    game = Game(GameSettings(), x_player=x_player, o_player=o_player)
+    moves, done = 0, None
+    while done is None:
+        done = game.make_move()
+        moves += 1
+    return moves
+
+
+def _bench_make_move(scale: float):
+    # Game g starts from turn g % 9, so there are only 9 distinct games, and
+    # the moves of the workload are counted from one game of each.
+    games = _ops(scale, 2000)
+    x_player, o_player = _ScriptedPlayer("X"), _ScriptedPlayer("O")
+    moves = [_play_scripted(x_player, o_player, turn) for turn in range(9)]
+
+    def run():
+        for g in range(games):
+            _play_scripted(x_player, o_player, g % 9)
+
+    return lambda: run, sum(moves[g % 9] for g in range(games))
+
+
+def _bench_check_winner(scale: float):
+    boards = [ss.BOARDS[i] for i in _sample_states(_ops(scale, 20000)).tolist()]
+    game = Game(GameSettings(), _ScriptedPlayer("X"), _ScriptedPlayer("O"))
+
+    def run():
+        check = game.check_winner
+        for board in boards:
+            check(board)
+
+    return lambda: run, len(boards)
+
+
+def _bench_translate_board(scale: float):
+    boards = [ss.BOARDS[i] for i in _sample_states(_ops(scale, 20000)).tolist()]
+    player = RandomPlayer("O", random_seed=SEED)
+
+    def run():
+        translate = player.translate_board
+        for board in boards:
+            translate(board)
+
+    return lambda: run, len(boards)
+
+
+def _bench_select_action(scale: float):
+    views = _sample_states(_ops(scale, 20000)).tolist()
+    states = [ss.STATE_KEYS[v] for v in views]
+    player = _trained_player(QLearnPlayer)
+
+    def run():
+        select = player.select_action
+        for state in states:
+            select(state)
+
+    return lambda: run, len(states)
+
+
+def _bench_select_action_id(scale: float):
+    views = _sample_states(_ops(scale, 20000)).tolist()
+    player = _trained_player(QLearnPlayer)
+
+    def run():
+        select = player.select_action_id
+        for view in views:
+            select(view)
+
+    return lambda: run, len(views)
+
+
+def _update_factory(player_cls) -> Factory:
+    """
+    Benchmark of the TD update of a player, including setting its previous
+    state and action.
+    """
+    def factory(scale: float):
+        views = _sample_states(_ops(scale, 20000))
+        rng = np.random.default_rng(SEED)
+        actions = [int(rng.choice(ss.LEGAL_MOVES[v])) for v in views.tolist()]
+        following = _sample_states(views.shape[0], seed=SEED + 1).tolist()
+        steps = list(zip(views.tolist(), actions, following))
+
+        def prepare():
+            player = _trained_player(player_cls)
+
+            def run():
+                update = player.update
+                for view, action, next_view in steps:
+                    player.prev_state = view
+                    player.prev_action = action
+                    update(next_view, 0.0)
+
+            return run
+
+        return prepare, len(steps)
+
+    return factory
+
+
+def _episodes_factory(
+        agent_type: str,
+        rival_type: str,
+        n_envs: Optional[int] = None) -> Factory:
+    """
+    Benchmark of training episodes played end to end, episode log included,
+    with fresh players on every repetition.
+    """
+    def make_player(player_type: str, mark: str, seed: int) -> BasePlayer:
+        if player_type == "random":
+            return RandomPlayer(mark, random_seed=seed)
+        return PLAYER_TYPES[player_type](mark, TDSettings(random_seed=seed))
+
+    def factory(scale: float):
+        episodes = _ops(scale, 20000 if n_envs is None else 100000)
+
+        def prepare():
+            agent = make_player(agent_type, "X", SEED)
+            rival = make_player(rival_type, "O", SEED + 1)
+
+            def run():
+                with tempfile.TemporaryDirectory() as tmp:
+                    with EpisodeWriter(Path(tmp) / "episodes") as writer:
+                        play_episodes(
+                            GameSettings(),
+                            agent,
+                            rival,
+                            total_episodes=episodes,
+                            writer=writer,
+                            n_envs=n_envs,
+                            random_seed=SEED,
+                            show_progress=False,
+                        )
+
+            return run
+
+        return prepare, episodes
+
+    return factory
+
+
+#: The benchmark suite.
+BENCHMARKS: List[Benchmark] = [
+    Benchmark("game.make_move", "micro", "move", _bench_make_move),
+    Benchmark("game.check_winner", "micro", "call", _bench_check_winner),
+    Benchmark("player.translate_board", "micro", "call", _bench_translate_board),
+    Benchmark("q_learn.select_action", "micro", "call", _bench_select_action),
+    Benchmark("q_learn.select_action_id", "micro", "call", _bench_select_action_id),
+    Benchmark("q_learn.update", "micro", "call", _update_factory(QLearnPlayer)),
+    Benchmark(
+        "expected_sarsa.update",
+        "micro",
+        "call",
+        _update_factory(ESarsaPlayer)
+    ),
+    Benchmark(
+        "episodes.q_learn_vs_random",
+        "macro",
+        "episode",
+        _episodes_factory("q_learn", "random")
+    ),
+    Benchmark(
+        "episodes.q_learn_vs_expected_sarsa",
+        "macro",
+        "episode",
+        _episodes_factory("q_learn", "expected_sarsa")
+    ),
+    Benchmark(
+        "episodes.q_learn_vs_random.vectorized",
+        "macro",
+        "episode",
+        _episodes_factory("q_learn", "random", n_envs=1024)
+    ),
+]
+
+
+def run_benchmark(
+        benchmark: Benchmark,
+        repeats: int = 5,
+        scale: float = 1.0) -> BenchResult:
+    """
+    Time a benchmark. Every repetition is prepared first and timed with the
+    garbage collector off; microbenchmarks get an untimed warm-up run.
+    :param benchmark:
+    :param repeats: Timed repetitions.
+    :param scale: Scale factor of the work done by each repetition.
+    :return:
+    """
+    prepare, ops = benchmark.factory(scale)
+    if benchmark.kind == "micro":
+        prepare()()
+
+    times = []
+    for _ in range(max(1, repeats)):
+        run = prepare()
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            run()
+            times.append(time.perf_counter() - start)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+    return BenchResult(
+        name=benchmark.name,
+        kind=benchmark.kind,
+        unit=benchmark.unit,
+        ops=ops,
+        repeats=len(times),
+        best_seconds=min(times),
+        median_seconds=float(np.median(times)),
+    )
+
+
+def run_suite(
+        only: Optional[str] = None,
+        repeats: int = 5,
+        scale: float = 1.0,
+        show_progress: bool = True) -> BenchReport:
+    """
+    Run the benchmark suite.
+    :param only: If given, run only the benchmarks with this text in their
+        name.
+    :param repeats:
+    :param scale:
+    :param show_progress: Print each result as it is measured.
+    :return:
+    """
+    results = []
+    for benchmark in BENCHMARKS:
+        if only is not None and only not in benchmark.name:
+            continue
+        result = run_benchmark(benchmark, repeats=repeats, scale=scale)
+        if show_progress:
+            print("%-40s %14.0f %s/s" % (result.name, result.ops_per_sec, result.unit))
+        results.append(result)
+
+    return BenchReport(
+        created=datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        python=platform.python_version(),
+        numpy=np.__version__,
+        platform=platform.platform(),
+        results=results,
+    )
+
+
+def compare(
+        report: BenchReport,
+        baseline: BenchReport,
+        tolerance: float = 0.1) -> List[Comparison]:
+    """
+    Compare the results of a run with a baseline, for the benchmarks in
+    both.
+    :param report:
+    :param baseline:
+    :param tolerance: Largest slowdown, as a fraction of the baseline speed,
+        that is not a regression.
+    :return:
+    """
+    base = baseline.by_name()
+    out = []
+    for result in report.results:
+        if result.name not in base:
+            continue
+        base_ops = base[result.name].ops_per_sec
+        ratio = result.ops_per_sec / max(base_ops, 1e-12)
+        out.append(Comparison(
+            name=result.name,
+            baseline_ops=base_ops,
+            ops=result.ops_per_sec,
+            ratio=ratio,
+            regressed=ratio < 1.0 - tolerance,
+        ))
+    return out
+
+
+def save_report(report: BenchReport, path: Union[str, Path]):
+    """
+    Save the results of a run as JSON.
+    :param report:
+    :param path:
+    :return:
+    """
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report.model_dump(), f, indent=2)
+
+
+def load_report(path: Union[str, Path]) -> BenchReport:
+    """
+    Load the results of a run.
+    :param path:
+    :return:
+    """
+    with open(path, "r") as f:
+        return BenchReport(**json.load(f))
+
+
+def bench(
+        only: Optional[str] = None,
+        repeats: int = 5,
+        quick: bool = False,
+        output: Union[str, Path] = RESULTS_FILE,
+        baseline: Union[str, Path] = BASELINE_FILE,
+        save_baseline: bool = False,
+        tolerance: float = 0.1,
+        fail_on_regression: bool = False):
+    """
+    Run the benchmark suite, save the results and compare them with the
+    baseline, if there is one.
+    :param only: Run only the benchmarks with this text in their name.
+    :param repeats: Timed repetitions of each benchmark; the fastest counts.
+    :param quick: Do a tenth of the work in each repetition.
+    :param output: File to save the results to.
+    :param baseline: Baseline results to compare with.
+    :param save_baseline: Save the results as the new baseline.
+    :param tolerance: Slowdown relative to the baseline that is reported as
+        a regression.
+    :param fail_on_regression: Exit with an error if any benchmark
+        regressed.
+    :return:
+    """
+    report = run_suite(only=only, repeats=repeats, scale=0.1 if quick else 1.0)
+    save_report(report, output)
+    print("Results saved to '%s'" % output)
+
+    regressed = []
+    if Path(baseline).is_file() and not save_baseline:
+        print("\nCompared with '%s':" % baseline)
+        for c in compare(report, load_report(baseline), tolerance):
+            print("%-40s %14.0f -> %14.0f  x%.2f%s" % (
+                c.name,
+                c.baseline_ops,
+                c.ops,
+                c.ratio,
+                "  REGRESSION" if c.regressed else ""
+            ))
+            if c.regressed:
+                regressed.append(c.name)
+
+    if save_baseline:
+        save_report(report, baseline)
+        print("Baseline saved to '%s'" % baseline)
+
+    if regressed and fail_on_regression:
+        sys.exit(1)
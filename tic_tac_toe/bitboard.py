@@ -0,0 +1,82 @@
+"""
+Bitboards: the cells of each mark on the board as a 9-bit integer, with cell i
+in bit i. Lookup tables indexed by these masks give the empty cells of a board
+and whether a mark has a winning line, which the state table (see
+'state_space') is built from.
+"""
+from typing import List, Tuple, Optional, Literal
+
+#: Winning lines as cell index triples.
+WINS: List[Tuple[int, int, int]] = [
+    (0, 1, 2), (3, 4, 5), (6, 7, 8),  #: Rows
+    (0, 3, 6), (1, 4, 7), (2, 5, 8),  #: Columns
+    (0, 4, 8), (2, 4, 6)  #: Diagonals
+]
+
+#: Bit for each cell of the board. Cell i is stored in bit i.
+CELL_BITS: Tuple[int, ...] = tuple(1 << i for i in range(9))
+
+#: Mask with all nine cells set.
+FULL_BOARD: int = (1 << 9) - 1
+
+#: Winning lines as 9-bit masks.
+WIN_MASKS: Tuple[int, ...] = tuple(
+    sum(CELL_BITS[i] for i in w) for w in WINS
+)
+
+#: Empty cell indices for every occupancy mask (occupied = x_bits | o_bits).
+EMPTY_CELLS: Tuple[Tuple[int, ...], ...] = tuple(
+    tuple(i for i in range(9) if not occupied & CELL_BITS[i])
+    for occupied in range(FULL_BOARD + 1)
+)
+
+#: Whether a 9-bit mask of a single player's cells contains a winning line.
+IS_WIN: Tuple[bool, ...] = tuple(
+    any((bits & m) == m for m in WIN_MASKS)
+    for bits in range(FULL_BOARD + 1)
+)
+
+
+def from_string(state: str, mark: str) -> int:
+    """
+    Get the bitboard of the cells occupied by 'mark' in a board string.
+    :param state:
+    :param mark:
+    :return:
+    """
+    bits = 0
+    for i, cell in enumerate(state):
+        if cell == mark:
+            bits |= CELL_BITS[i]
+    return bits
+
+
+def to_string(x_bits: int, o_bits: int, empty_mark: str = "-") -> str:
+    """
+    Build the board string for the given pair of bitboards.
+    :param x_bits:
+    :param o_bits:
+    :param empty_mark:
+    :return:
+    """
+    return "".join(
+        "X" if x_bits & b else ("O" if o_bits & b else empty_mark)
+        for b in CELL_BITS
+    )
+
+
+def winner(x_bits: int, o_bits: int) -> Optional[Literal["-", "X", "O"]]:
+    """
+    Determine the winner for a pair of bitboards. Return None if the game is
+    not over, '-' for a draw, and 'X' or 'O' to indicate the winner.
+    :param x_bits:
+    :param o_bits:
+    :return:
+    """
+    if IS_WIN[x_bits]:
+        return "X"
+    if IS_WIN[o_bits]:
+        return "O"
+    if (x_bits | o_bits) == FULL_BOARD:
+        return "-"
+    return None
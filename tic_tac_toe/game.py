@@ -1,5 +1,7 @@
 from typing import Literal, List, Optional, Tuple, Dict
 
+from . import bitboard as bb
+from . import state_space as ss
 from .players import BasePlayer
 from .schemas import GameSettings, PLAYS
 
@@ -8,11 +10,7 @@ class Game:
     """
     TicTacToe game environment.
     """
-    WINS: List[Tuple[int, int, int]] = [
-        (0, 1, 2), (3, 4, 5), (6, 7, 8),  #: Rows
-        (0, 3, 6), (1, 4, 7), (2, 5, 8),  #: Columns
-        (0, 4, 8), (2, 4, 6)  #: Diagonals
-    ]
+    WINS: List[Tuple[int, int, int]] = bb.WINS
     EMPTY_MARK: str = "-"
     PRINT_TEMPLATE: str = (
         "%s|%s|%s\n"
@@ -32,7 +30,7 @@ class Game:
         :param x_player:
         :param o_player:
         """
-        self.__state = self.EMPTY_MARK * 9
+        self.__state_id = ss.EMPTY_ID
         self.__next_turn: PLAYS = "X"
 
         x_player.mark = "X"
@@ -59,7 +57,26 @@ class Game:
         corresponding to a position on the board. A '-' represents an empty
         cell.
         """
-        return self.__state
+        return ss.BOARDS[self.__state_id]
+
+    @property
+    def state_id(self) -> int:
+        """
+        Id of the state of the game in the precomputed state table (see
+        'state_space').
+        """
+        return self.__state_id
+
+    @property
+    def bitboards(self) -> Tuple[int, int]:
+        """
+        Bitboards of the cells occupied by 'X' and 'O' respectively. Cell i
+        of the board is stored in bit i.
+        """
+        return (
+            int(ss.X_BITS[self.__state_id]),
+            int(ss.O_BITS[self.__state_id])
+        )
 
     @property
     def done(self) -> bool:
@@ -88,10 +105,8 @@ class Game:
         :param state:
         :return:
         """
-        return [
-            i for i, cell in enumerate(state)
-            if cell == self.EMPTY_MARK
-        ]
+        occupied = bb.from_string(state, "X") | bb.from_string(state, "O")
+        return list(bb.EMPTY_CELLS[occupied])
 
     def check_winner(self, state: str) -> Optional[Literal["-", "X", "O"]]:
         """
@@ -100,19 +115,7 @@ class Game:
         :param state:
         :return:
         """
-        board_full = self.EMPTY_MARK not in state
-        for play in ("X", "O"):
-            won = any(
-                all(state[i] == play for i in w)
-                for w in self.WINS
-            )
-            if won:
-                return play
-
-        if board_full:
-            return "-"
-
-        return None
+        return bb.winner(bb.from_string(state, "X"), bb.from_string(state, "O"))
 
     def make_move(self) -> Optional[Literal["-", "X", "O"]]:
         """
@@ -123,40 +126,40 @@ class Game:
         if self.done:
             raise ValueError("The game has already ended!")
 
-        available = self.empty_cells(self.state)
-        other = "O" if self.next_turn == "X" else "X"
-        move = self.players[self.next_turn].make_move(
+        turn = self.next_turn
+        other = "O" if turn == "X" else "X"
+        move = self.players[turn].make_move_id(
             self.settings.step_reward,
-            self.state,
-            available
+            self.__state_id
         )
 
-        # Update state
-        state = list(self.state)
-        state[move] = self.next_turn
-        self.__state = "".join(state)
+        # Negative moves would wrap around in the state table.
+        if not 0 <= move < 9 or ss.NEXT_STATE_LIST[self.__state_id][move] < 0:
+            raise ValueError("Illegal move %d by '%s'" % (move, turn))
 
-        win = self.check_winner(self.state)
+        state_id = ss.NEXT_STATE_LIST[self.__state_id][move]
+        self.__state_id = state_id
+        win = ss.WINNER_LIST[state_id]
         self.__done = win is not None
         assert win != other, "Cannot win if the other player has made a move!"
 
         if win == self.next_turn:
-            self.players[self.next_turn].end_game(
+            self.players[self.next_turn].end_game_id(
                 self.settings.win_reward,
-                self.state
+                state_id
             )
-            self.players[other].end_game(
+            self.players[other].end_game_id(
                 self.settings.lose_reward,
-                self.state
+                state_id
             )
         elif win == "-":
-            self.players[self.next_turn].end_game(
+            self.players[self.next_turn].end_game_id(
                 self.settings.draw_reward,
-                self.state
+                state_id
             )
-            self.players[other].end_game(
+            self.players[other].end_game_id(
                 self.settings.draw_reward,
-                self.state
+                state_id
             )
 
         self.__next_turn = other
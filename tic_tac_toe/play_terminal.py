@@ -8,6 +8,7 @@ from .game import Game
 from .schemas import GameSettings
 from .players.random import RandomPlayer
 from .players.console import ConsolePlayer
+from .players.compiled import CompiledPlayer
 from .players.learn_types import instantiate_agent
 from .constants import DEFAULT_GAME_CFG, OUTPUTS_DIR, DEFAULT_TD_CFG
 
@@ -38,11 +39,12 @@ def play_against_bot(
     if opponent_type == "random":
         opponent = RandomPlayer("O", rand)
     else:
-        opponent, _ = instantiate_agent(
+        agent, _ = instantiate_agent(
             opponent_type,
             td_settings_file=td_cfg_file,
             policy_file=policy_file
         )
+        opponent = CompiledPlayer.from_player(agent)
 
     which = random.choice(("X", "O"))
     if which == "X":
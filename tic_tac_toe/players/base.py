@@ -1,7 +1,9 @@
-from typing import List
+import numpy as np
+from typing import List, Any
 from abc import ABC, abstractmethod, ABCMeta
 
 from ..schemas import PLAYS
+from .. import state_space as ss
 
 
 class BasePlayer(ABC):
@@ -43,6 +45,18 @@ class BasePlayer(ABC):
         }
         self.__mark = mark
 
+    def view_id(self, state_id: int) -> int:
+        """
+        Id of the translated board (see 'translate_board') for the given
+        state id. The translated board of the result is
+        'state_space.STATE_KEYS[view_id]'.
+        :param state_id:
+        :return:
+        """
+        if self.mark == "X":
+            return state_id
+        return ss.SWAP_ID_LIST[state_id]
+
     def translate_board(self, state: str) -> str:
         """
         Translate the state of the board to a string of 0, 1, 2 characters. 0
@@ -51,6 +65,10 @@ class BasePlayer(ABC):
         :param state:
         :return:
         """
+        state_id = ss.BOARD_TO_ID.get(state)
+        if state_id is not None:
+            return ss.STATE_KEYS[self.view_id(state_id)]
+
         return "".join(
             self.mapping[s] for s in state
         )
@@ -70,6 +88,58 @@ class BasePlayer(ABC):
         """
         pass
 
+    def make_move_id(self, reward: float, state_id: int) -> int:
+        """
+        Make a move in the game given the id of the current state in the
+        precomputed state table. Players that can work on ids directly
+        should override this, by default it calls 'make_move'.
+        :param reward: Reward from previous state-action.
+        :param state_id: Id of the current state of the game.
+        :return: Index (between 0 and 8) of the cell to occupy.
+        """
+        return self.make_move(
+            reward,
+            ss.BOARDS[state_id],
+            ss.LEGAL_MOVES[state_id]
+        )
+
+    def select_actions(self, view_ids: np.ndarray) -> np.ndarray:
+        """
+        Select moves for a batch of games at once, for use with 'VecGame'.
+        :param view_ids: Ids of the translated boards (see 'view_id').
+        :return: Cell index to occupy in each game.
+        """
+        raise NotImplementedError(
+            "%s does not support batched play" % type(self).__name__
+        )
+
+    def get_rng_state(self) -> Any:
+        """
+        State of the player's random number generators, e.g. for training
+        checkpoints. Players that make no random choices return None.
+        :return:
+        """
+        return None
+
+    def set_rng_state(self, state: Any):
+        """
+        Restore the state of the player's random number generators, as
+        returned by 'get_rng_state'.
+        :param state:
+        :return:
+        """
+        pass
+
+    def end_game_id(self, reward: float, state_id: int):
+        """
+        Register end of the game given the id of the final state. By default
+        it calls 'end_game'.
+        :param reward: Final reward.
+        :param state_id: Id of the final state of the board.
+        :return:
+        """
+        self.end_game(reward, ss.BOARDS[state_id])
+
     @abstractmethod
     def end_game(self, reward: float, state: str):
         """
@@ -0,0 +1,108 @@
+import numpy as np
+from typing import List
+
+from ..schemas import PLAYS
+from .base import BasePlayer
+from .. import state_space as ss
+from .learned_base import BaseLearnedPlayer
+
+
+def compile_policy(player: BaseLearnedPlayer) -> np.ndarray:
+    """
+    Compile the greedy policy of a learned player into a table with the best
+    move for each translated state. Ties (e.g. in unvisited states) go to the
+    first of the tied moves, as in 'BaseLearnedPlayer.select_action_id'.
+    :param player:
+    :return: Array of shape (N_STATES,) indexed by the id of the translated
+        state (see 'BasePlayer.view_id'), with -1 for finished games.
+    """
+    views = np.arange(ss.N_STATES)
+    sids, syms = player.stored_ids(views)
+    best = np.argmax(player.agent_q_vals.values[sids], axis=1)
+    moves = ss.SYMMETRIES[syms, best]
+    moves[~ss.LEGAL_MASK.any(axis=1)] = -1
+    return moves.astype(np.int8)
+
+
+class CompiledPlayer(BasePlayer):
+    """
+    Player that plays a fixed, greedy policy compiled into a table of best
+    moves (see 'compile_policy'). Every move is a single table read, and the
+    table takes a few kilobytes.
+    """
+
+    @classmethod
+    def from_player(cls, player: BaseLearnedPlayer) -> "CompiledPlayer":
+        """
+        Compile the greedy policy of a learned player.
+        :param player:
+        :return:
+        """
+        return cls(player.mark, compile_policy(player))
+
+    def __init__(self, mark: PLAYS, moves: np.ndarray):
+        """
+        :param mark:
+        :param moves: Best move for each translated state, as returned by
+            'compile_policy'.
+        """
+        super().__init__(mark)
+        if moves.shape != (ss.N_STATES,):
+            raise ValueError("Move table does not match the state table!")
+
+        self.__moves = moves
+        self.__moves_list: List[int] = moves.tolist()
+
+    @property
+    def moves(self) -> np.ndarray:
+        """
+        Best move for each translated state.
+        """
+        return self.__moves
+
+    def make_move(self, reward: float, state: str, available_moves: List[int]) -> int:
+        """
+        Play the compiled move for the current board.
+        :param reward:
+        :param state:
+        :param available_moves:
+        :return:
+        """
+        return self.__moves_list[ss.KEY_TO_ID[self.translate_board(state)]]
+
+    def make_move_id(self, reward: float, state_id: int) -> int:
+        """
+        Play the compiled move for the state with the given id.
+        :param reward:
+        :param state_id:
+        :return:
+        """
+        if self.mark == "X":
+            return self.__moves_list[state_id]
+        return self.__moves_list[ss.SWAP_ID_LIST[state_id]]
+
+    def select_actions(self, view_ids: np.ndarray) -> np.ndarray:
+        """
+        Play the compiled moves for a batch of games.
+        :param view_ids:
+        :return:
+        """
+        return self.__moves[view_ids].astype(np.intp)
+
+    def end_game_id(self, reward: float, state_id: int):
+        """
+        Dummy method in this case.
+        :param reward:
+        :param state_id:
+        :return:
+        """
+        pass
+
+    def end_game(self, reward: float, state: str):
+        """
+        Dummy method in this case.
+        :param reward:
+        :param state:
+        :return:
+        """
+        pass
@@ -1,9 +1,11 @@
 import numpy as np
-from typing import Dict, Optional, List
+from typing import Dict, Optional, Union
 
 from ..schemas import PLAYS
+from .. import state_space as ss
 from .schemas import TDSettings
-from .learned_base import BaseTDPlayer, StateActions
+from .q_table import QTable, StateActions
+from .learned_base import BaseTDPlayer
 
 
 class ESarsaPlayer(BaseTDPlayer):
@@ -15,7 +17,7 @@ class ESarsaPlayer(BaseTDPlayer):
             self,
             mark: PLAYS,
             settings: TDSettings,
-            agent_q_vals: Optional[Dict[str, StateActions]] = None,
+            agent_q_vals: Optional[Union[QTable, Dict[str, StateActions]]] = None,
             freeze: bool = False,):
         """
         :param mark:
@@ -30,21 +32,35 @@ class ESarsaPlayer(BaseTDPlayer):
             freeze=freeze
         )
 
-    def update(self, mapped_state: str, reward: float = 0.0):
+    def update(self, state_id: int, reward: float = 0.0):
         """
         Update q-val for previous state-action given the new state and reward.
-        :param mapped_state: Translated state.
+        :param state_id: Id of the new state, as stored by the agent.
         :param reward:
         """
         if self.frozen:
             return
 
-        prev_qs = self.agent_q_vals[self.prev_state]
-        prev_idx = np.argmax(prev_qs["actions"] == self.prev_action)
-
-        curr_qs = self.agent_q_vals[mapped_state]["q_vals"]
+        values = self.agent_q_vals.values
+        curr_qs = values[state_id][ss.LEGAL_MASK[state_id]]
         next_q = np.sum(curr_qs * self.get_egreedy_probs(curr_qs))
 
-        prev_val = prev_qs["q_vals"][prev_idx]
+        prev_val = values[self.prev_state, self.prev_action]
         td_err = reward + self.gamma * next_q - prev_val
-        prev_qs["q_vals"][prev_idx] = prev_val + self.alpha * td_err
+        values[self.prev_state, self.prev_action] = prev_val + self.alpha * td_err
+
+    def next_values(self, qs: np.ndarray) -> np.ndarray:
+        """
+        Expected values of a batch of next states under the epsilon-greedy
+        policy.
+        :param qs:
+        :return:
+        """
+        # The greedy action gets 1 - epsilon on top of its share of the
+        # epsilon spread over the legal actions.
+        legal = np.isfinite(qs)
+        mean = (
+            np.sum(np.where(legal, qs, 0.0), axis=1)
+            / np.maximum(legal.sum(axis=1), 1)
+        )
+        return (1.0 - self.epsilon) * np.max(qs, axis=1) + self.epsilon * mean
@@ -1,16 +1,19 @@
 import os
 import json
 from pathlib import Path
-from typing import Dict, Type, Tuple, Union, Optional
+from typing import Any, Dict, Type, Tuple, Union, Optional
 
 from .q_learn import QLearnPlayer
 from .e_sarsa import ESarsaPlayer
+from .minimax import MinimaxPlayer
 from .learned_base import BaseLearnedPlayer
 from .schemas import TDSettings, TabularPolicy
+from .policy_io import is_binary_policy, load_binary_policy
 
 PLAYER_TYPES: Dict[str, Type[BaseLearnedPlayer]] = {
     "q_learn": QLearnPlayer,
-    "expected_sarsa": ESarsaPlayer
+    "expected_sarsa": ESarsaPlayer,
+    "minimax": MinimaxPlayer,
 }
 
 
@@ -18,13 +21,16 @@ def instantiate_agent(
         agent_type: str,
         td_settings_file: Union[str, Path],
         policy_file: Optional[Union[str, Path]] = None,
+        settings_update: Optional[Dict[str, Any]] = None,
         ) -> Tuple[BaseLearnedPlayer, TDSettings]:
     """
     Instantiate an agent to train.
     :param agent_type:
     :param td_settings_file:
     :param policy_file: Starting policy to load from. If None, instantiate
-        with empty policy.
+        with empty policy. Binary ('.qtab') policies are memory mapped.
+        Ignored by players that do not learn (e.g. 'minimax').
+    :param settings_update: Settings that override the ones in the file.
     :return: player, settings
     """
     if not os.path.isfile(td_settings_file):
@@ -32,18 +38,33 @@ def instantiate_agent(
 
     with open(td_settings_file, "r") as f:
         td_settings = TDSettings(**json.load(f))
+    if settings_update:
+        td_settings = TDSettings(**{**td_settings.model_dump(), **settings_update})
 
-    policy = None
-    if policy_file is not None:
-        if not os.path.isfile(policy_file):
-            raise FileNotFoundError("Policy file not found")
+    if PLAYER_TYPES.get(agent_type) is MinimaxPlayer:
+        return MinimaxPlayer(mark="X", settings=td_settings), td_settings
 
-        with open(policy_file, "r") as f:
-            policy = TabularPolicy(**json.load(f))
+    if policy_file is not None and not os.path.isfile(policy_file):
+        raise FileNotFoundError("Policy file not found")
 
     if agent_type not in PLAYER_TYPES:
         raise KeyError("Unknown player type '%s'" % agent_type)
 
     _cls = PLAYER_TYPES[agent_type]
+    if policy_file is not None and is_binary_policy(policy_file):
+        table, canonical = load_binary_policy(policy_file)
+        agent = _cls.from_q_table(
+            table,
+            canonical=canonical,
+            mark="X",
+            settings=td_settings
+        )
+        return agent, td_settings
+
+    policy = None
+    if policy_file is not None:
+        with open(policy_file, "r") as f:
+            policy = TabularPolicy(**json.load(f))
+
     agent = _cls.from_policy(mark="X", settings=td_settings, policy=policy)
     return agent, td_settings
@@ -1,18 +1,34 @@
 import numpy as np
 from abc import ABCMeta, abstractmethod
-from typing import TypedDict, Dict, Optional, List, Any
+from typing import Dict, Optional, List, Tuple, Union, Any
 
 from ..schemas import PLAYS
 from .base import BasePlayer
+from .. import state_space as ss
 from .schemas import TDSettings, TabularPolicy
+from .q_table import QTable, StateActions, get_state_id
+from ..random_stream import RandomStream, stream_seed
+from .replay import ReplayBuffer, REPLAY_STREAM
 
+#: Most moves a player can make in a game.
+MAX_PLAYER_MOVES: int = 5
 
-class StateActions(TypedDict):
+
+def canonical_state(state: str) -> Tuple[str, int]:
     """
-    State actions represented within the agent.
+    Get the canonical form of a translated state among its rotations and
+    reflections. States not in the state table are returned as they are.
+    :param state:
+    :return: Canonical state, index of the symmetry that maps the given state
+        onto it (see 'state_space.SYMMETRIES').
     """
-    actions: np.ndarray[Any, np.int16]  #: 1d array of action labels
-    q_vals: np.ndarray[Any, np.float32]  #: 1d array of q-values for actions
+    sid = ss.KEY_TO_ID.get(state)
+    if sid is None:
+        return state, 0
+    return (
+        ss.STATE_KEYS[ss.CANONICAL_ID_LIST[sid]],
+        ss.CANONICAL_SYM_LIST[sid]
+    )
 
 
 class BaseLearnedPlayer(BasePlayer, metaclass=ABCMeta):
@@ -33,33 +49,56 @@ class BaseLearnedPlayer(BasePlayer, metaclass=ABCMeta):
         :param settings:
         :return:
         """
-        agent_policy = {}
-        # Translate policy format
-        if policy is not None:
-            for state, qs in policy.states.items():
-                actions = []
-                state_q = []
-                for a, q in qs.items():
-                    actions.append(int(a))
-                    state_q.append(q)
-
-                agent_policy[state] = StateActions(
-                    actions=np.array(actions, dtype=np.int16),
-                    q_vals=np.array(state_q, dtype=np.float32)
-                )
+        if policy is not None and policy.canonical:
+            settings = settings.model_copy(update={"canonicalize": True})
 
+        agent_policy = QTable.from_policy(
+            policy,
+            default_q=settings.default_q,
+            canonical=settings.canonicalize
+        )
         return cls(mark=mark, settings=settings, agent_q_vals=agent_policy)
 
+    @classmethod
+    def from_q_table(
+            cls,
+            table: QTable,
+            canonical: bool,
+            mark: PLAYS,
+            settings: TDSettings) -> "BaseLearnedPlayer":
+        """
+        Instantiate from a Q-table, e.g. one loaded from a binary policy
+        file. The table is used as it is, without copying.
+        :param table:
+        :param canonical: Whether the table stores states in canonical form.
+        :param mark:
+        :param settings:
+        :return:
+        """
+        if canonical:
+            settings = settings.model_copy(update={"canonicalize": True})
+        elif settings.canonicalize:
+            table = QTable.from_policy(
+                table.to_policy(),
+                default_q=settings.default_q,
+                canonical=True
+            )
+
+        if table.default_q != settings.default_q:
+            table.reset_unvisited(settings.default_q)
+        return cls(mark=mark, settings=settings, agent_q_vals=table)
+
     def __init__(
             self,
             mark: PLAYS,
             settings: TDSettings,
-            agent_q_vals: Optional[Dict[str, StateActions]] = None,
+            agent_q_vals: Optional[Union[QTable, Dict[str, StateActions]]] = None,
             freeze: bool = False):
         """
         :param mark:
         :param settings:
-        :param agent_q_vals:
+        :param agent_q_vals: Q-table, or dictionary of translated
+            state -> StateActions to build it from.
         :param freeze: Freeze the agent's weights or not.
         """
         super().__init__(mark)
@@ -68,10 +107,13 @@ class BaseLearnedPlayer(BasePlayer, metaclass=ABCMeta):
         self.__step_size = settings.step_size
         self.__e_greedy = settings.epsilon_greedy
         self.__default_q = settings.default_q
-        self.__rng = np.random.RandomState(settings.random_seed)
+        self.__rng = RandomStream(settings.random_seed)
+        self.__canonical = settings.canonicalize
 
         if agent_q_vals is None:
-            agent_q_vals = {}
+            agent_q_vals = QTable(self.__default_q)
+        elif not isinstance(agent_q_vals, QTable):
+            agent_q_vals = QTable.from_dict(agent_q_vals, self.__default_q)
         self.__agent_qs = agent_q_vals
         self.__freeze = freeze
 
@@ -88,12 +130,70 @@ class BaseLearnedPlayer(BasePlayer, metaclass=ABCMeta):
         self.__freeze = bool(value)
 
     @property
-    def rng(self) -> np.random.RandomState:
+    def canonical(self) -> bool:
+        """
+        Whether the agent stores a single entry for all the rotations and
+        reflections of a state. States are then kept in canonical form (see
+        'state_space.CANONICAL_ID'), with actions in the canonical frame.
+        """
+        return self.__canonical
+
+    def canonical_state(self, state: str) -> Tuple[str, int]:
+        """
+        Map a translated state to the form in which it is stored by the
+        agent.
+        :param state:
+        :return: Stored state, index of the symmetry that maps the given state
+            onto it (see 'state_space.SYMMETRIES').
+        """
+        if not self.__canonical:
+            return state, 0
+        return canonical_state(state)
+
+    def stored_id(self, view: int) -> Tuple[int, int]:
+        """
+        Map the id of a translated state to the id under which it is stored
+        by the agent.
+        :param view:
+        :return: Stored id, index of the symmetry that maps the given state
+            onto it (see 'state_space.SYMMETRIES').
+        """
+        if not self.__canonical:
+            return view, 0
+        return ss.CANONICAL_ID_LIST[view], ss.CANONICAL_SYM_LIST[view]
+
+    def stored_ids(self, views: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Batched version of 'stored_id'.
+        :param views:
+        :return:
+        """
+        if not self.__canonical:
+            return views, np.zeros_like(views)
+        return ss.CANONICAL_ID[views], ss.CANONICAL_SYM[views]
+
+    @property
+    def rng(self) -> RandomStream:
         """
-        Agent's random number generator.
+        Agent's random number stream.
         """
         return self.__rng
 
+    def get_rng_state(self) -> Any:
+        """
+        State of the agent's random number stream.
+        :return:
+        """
+        return self.__rng.get_state()
+
+    def set_rng_state(self, state: Any):
+        """
+        Restore the state of the agent's random number stream.
+        :param state:
+        :return:
+        """
+        self.__rng.set_state(state)
+
     @property
     def epsilon(self) -> float:
         """
@@ -114,9 +214,10 @@ class BaseLearnedPlayer(BasePlayer, metaclass=ABCMeta):
         self.__e_greedy = bool(value)
 
     @property
-    def agent_q_vals(self) -> Dict[str, StateActions]:
+    def agent_q_vals(self) -> QTable:
         """
-        Agent's estimated q-values. Map translated state -> StateActions.
+        Agent's estimated q-values, indexed by the id of the translated state
+        (canonical if the agent canonicalizes states) and the action.
         """
         return self.__agent_qs
 
@@ -150,52 +251,95 @@ class BaseLearnedPlayer(BasePlayer, metaclass=ABCMeta):
     def check_visited_state(
             self,
             state: str,
-            available_actions: List[int]) -> bool:
+            available_actions: Optional[List[int]] = None) -> bool:
         """
-        If the state has been visited before, return True. If not, initialize
-        the q-values for the state and return false.
+        If the state has been visited before, return True. If not, mark it as
+        visited and return false. The q-values of a state start at the
+        default value for all of its legal actions.
         :param state:
-        :param available_actions:
+        :param available_actions: Unused, the legal actions are known from
+            the state table.
         :return:
         """
-        if state in self.agent_q_vals:
-            return True
-
-        q_vals = np.array([self.__default_q] * len(available_actions), dtype=np.float32)
-        self.agent_q_vals[state] = StateActions(
-            actions=np.array(available_actions, dtype=np.int16),
-            q_vals=q_vals
-        )
-        return False
+        sid, _ = self.stored_id(get_state_id(state))
+        return self.agent_q_vals.visit(sid)
 
     def dump_q_values(self) -> TabularPolicy:
         """
         Dump the learned q-values to a serialized policy.
         :return:
         """
-        states = {}
-        for state, qs in self.agent_q_vals.items():
-            states[state] = {
-                str(a): float(q)
-                for a, q in zip(qs["actions"].tolist(), qs["q_vals"].tolist())
-            }
-        return TabularPolicy(states=states)
+        return self.agent_q_vals.to_policy(canonical=self.canonical)
 
     def select_action(self, state: str) -> int:
         """
         Select the next action according to the saved q values.
         """
-        state_qs = self.agent_q_vals[state]
-        idx = np.argmax(state_qs["q_vals"])
-        if not self.epsilon_greedy:
-            return int(state_qs["actions"][idx])
+        return self.select_action_id(get_state_id(state))
 
-        val = self.rng.rand()
-        if val <= self.epsilon:
+    def select_action_id(self, view: int) -> int:
+        """
+        Select the next action for the translated state with the given id.
+        :param view:
+        :return:
+        """
+        sid, sym = self.stored_id(view)
+        action = int(np.argmax(self.agent_q_vals.values[sid]))
+        if self.__e_greedy and self.__rng.random() <= self.__epsilon:
             # Choose random action
-            return int(self.rng.choice(state_qs["actions"]))
+            action = self.__rng.choice(ss.LEGAL_MOVES[sid])
+
+        return ss.SYMMETRIES_LIST[sym][action]
+
+    def get_egreedy_probs_batch(self, qs: np.ndarray) -> np.ndarray:
+        """
+        Get the epsilon-greedy probability distributions for a batch of
+        action values, as returned by 'q_matrix'.
+        :param qs: Array of shape (n, 9) with -inf for illegal actions.
+        :return: Array of shape (n, 9).
+        """
+        legal = np.isfinite(qs)
+        n_legal = legal.sum(axis=1, keepdims=True)
+        probs = np.where(legal, self.epsilon / np.maximum(n_legal, 1), 0.0)
+        probs[np.arange(qs.shape[0]), np.argmax(qs, axis=1)] += (
+            1.0 - self.epsilon
+        )
+        return probs
 
-        return int(state_qs["actions"][idx])
+    def q_matrix(self, view_ids: np.ndarray) -> np.ndarray:
+        """
+        Get the q-values of a batch of translated states and mark them as
+        visited.
+        :param view_ids: Ids of the translated states (see 'state_space').
+        :return: Array of shape (n, 9) with -inf for illegal actions, in the
+            frame of the given states.
+        """
+        sids, syms = self.stored_ids(view_ids)
+        self.agent_q_vals.visited[sids] = True
+        qs = self.agent_q_vals.values[sids]
+        if self.__canonical:
+            qs = np.take_along_axis(qs, ss.INVERSE_SYMMETRIES[syms], axis=1)
+        return qs
+
+    def select_actions(self, view_ids: np.ndarray) -> np.ndarray:
+        """
+        Select the next action for a batch of translated states according to
+        the saved q values.
+        :param view_ids:
+        :return:
+        """
+        qs = self.q_matrix(view_ids)
+        actions = np.argmax(qs, axis=1)
+        if not self.epsilon_greedy:
+            return actions
+
+        generator = self.rng.generator
+        explore = generator.random(actions.shape[0]) <= self.epsilon
+        if np.any(explore):
+            draws = generator.random((int(explore.sum()), 9))
+            draws[~np.isfinite(qs[explore])] = -1.0
+            actions[explore] = np.argmax(draws, axis=1)
+        return actions
 
 
 class BaseTDPlayer(BaseLearnedPlayer, metaclass=ABCMeta):
@@ -207,7 +351,7 @@ class BaseTDPlayer(BaseLearnedPlayer, metaclass=ABCMeta):
             self,
             mark: PLAYS,
             settings: TDSettings,
-            agent_q_vals: Optional[Dict[str, StateActions]] = None,
+            agent_q_vals: Optional[Union[QTable, Dict[str, StateActions]]] = None,
             freeze: bool = False):
         """
         :param mark:
@@ -223,11 +367,45 @@ class BaseTDPlayer(BaseLearnedPlayer, metaclass=ABCMeta):
         )
         self.__prev_action = None
         self.__prev_state = None
+        self.__prev_view = -1
+        self.__prev_move = -1
+        self.__replay_batch = settings.replay_batch
+        self.__replay = None
+        if settings.replay_size is not None:
+            self.__replay = ReplayBuffer(
+                settings.replay_size,
+                stream_seed(settings.random_seed, REPLAY_STREAM)
+            )
+
+        # Moves of the current episode, recorded in place for deferred
+        # updates.
+        self.__deferred = settings.deferred_updates
+        self.__episode_states = [0] * MAX_PLAYER_MOVES
+        self.__episode_actions = [0] * MAX_PLAYER_MOVES
+        self.__episode_rewards = [0.0] * MAX_PLAYER_MOVES
+        self.__episode_len = 0
+        self.__trace_decay = settings.trace_decay
+
+    @property
+    def replay(self) -> Optional[ReplayBuffer]:
+        """
+        Experience replay buffer, if the agent learns from replayed
+        minibatches instead of after every move.
+        """
+        return self.__replay
+
+    @property
+    def deferred(self) -> bool:
+        """
+        Whether the agent learns at the end of each episode, from all of its
+        moves at once, instead of after every move.
+        """
+        return self.__deferred
 
     @property
     def prev_action(self) -> Optional[int]:
         """
-        Previous action taken by the agent.
+        Previous action taken by the agent, in the frame of 'prev_state'.
         """
         return self.__prev_action
 
@@ -236,25 +414,143 @@ class BaseTDPlayer(BaseLearnedPlayer, metaclass=ABCMeta):
         self.__prev_action = action
 
     @property
-    def prev_state(self) -> Optional[str]:
+    def prev_state(self) -> Optional[int]:
         """
-        Previous state the agent visited.
+        Id of the previous state the agent visited, as stored by the agent
+        (see 'stored_id').
         """
         return self.__prev_state
 
     @prev_state.setter
-    def prev_state(self, state: Optional[str]) -> None:
+    def prev_state(self, state: Optional[int]) -> None:
         self.__prev_state = state
 
     @abstractmethod
-    def update(self, mapped_state: str, reward: float = 0.0):
+    def update(self, state_id: int, reward: float = 0.0):
         """
         Update q-val for previous state-action given the new state and reward.
-        :param mapped_state: Translated state.
+        :param state_id: Id of the new state, as stored by the agent.
         :param reward:
         """
         pass
 
+    @abstractmethod
+    def next_values(self, qs: np.ndarray) -> np.ndarray:
+        """
+        Values of a batch of next states used in the TD targets of
+        'update_batch'.
+        :param qs: Q-values of the states as returned by 'q_matrix'.
+        :return: Array of shape (n,).
+        """
+        pass
+
+    def update_batch(
+            self,
+            view_ids: np.ndarray,
+            actions: np.ndarray,
+            rewards: np.ndarray,
+            next_view_ids: np.ndarray,
+            done: np.ndarray):
+        """
+        Update the q-values of a batch of state-action pairs. All the targets
+        are computed before any of the values is updated. When several
+        entries of the batch update the same state-action pair, it is moved
+        towards their mean target with the step size compounded once per
+        entry, which matches sequential updates when the targets agree.
+        :param view_ids: Translated states the actions were taken in.
+        :param actions:
+        :param rewards: Rewards received after each action.
+        :param next_view_ids: Translated states reached by each action.
+            Ignored for finished episodes.
+        :param done: Whether each episode finished after the action.
+        """
+        if self.frozen:
+            return
+
+        targets = np.asarray(rewards, dtype=np.float32).copy()
+        live = ~np.asarray(done, dtype=bool)
+        if np.any(live):
+            next_qs = self.q_matrix(next_view_ids[live])
+            targets[live] += self.gamma * self.next_values(next_qs)
+        self.apply_targets(view_ids, actions, targets)
+
+    def apply_targets(
+            self,
+            view_ids: np.ndarray,
+            actions: np.ndarray,
+            targets: np.ndarray):
+        """
+        Move the q-values of a batch of state-action pairs towards their
+        targets, merging repeated pairs as described in 'update_batch'.
+        :param view_ids: Translated states the actions were taken in.
+        :param actions:
+        :param targets:
+        """
+        sids, syms = self.stored_ids(view_ids)
+        actions = ss.INVERSE_SYMMETRIES[syms, actions]
+        flat = sids.astype(np.int64) * 9 + actions
+        keys, inverse, counts = np.unique(
+            flat,
+            return_inverse=True,
+            return_counts=True
+        )
+        mean_targets = np.bincount(inverse, weights=targets) / counts
+        step = 1.0 - (1.0 - self.alpha) ** counts
+
+        rows, cols = keys // 9, keys % 9
+        values = self.agent_q_vals.values
+        values[rows, cols] += (
+            step * (mean_targets - values[rows, cols])
+        ).astype(np.float32)
+
+    def observe_batch(
+            self,
+            view_ids: np.ndarray,
+            actions: np.ndarray,
+            rewards: np.ndarray,
+            next_view_ids: np.ndarray,
+            done: np.ndarray):
+        """
+        Learn from a batch of transitions (see 'update_batch'): right away,
+        or, with experience replay, by storing them in the replay buffer and
+        replaying a minibatch for every episode they finish.
+        :param view_ids:
+        :param actions:
+        :param rewards:
+        :param next_view_ids:
+        :param done:
+        """
+        if self.__replay is None:
+            self.update_batch(view_ids, actions, rewards, next_view_ids, done)
+            return
+        if self.frozen:
+            return
+
+        self.__replay.add_batch(view_ids, actions, rewards, next_view_ids, done)
+        finished = int(np.count_nonzero(done))
+        if finished > 0:
+            self.learn_from_batch(finished * self.__replay_batch)
+
+    def learn_from_batch(self, batch_size: Optional[int] = None):
+        """
+        Update the q-values with a minibatch of transitions sampled from the
+        replay buffer (see 'update_batch'). Does nothing without experience
+        replay or while the buffer is empty.
+        :param batch_size: Transitions to sample. By default, the replay
+            batch size in the agent's settings.
+        """
+        if self.frozen or self.__replay is None or len(self.__replay) == 0:
+            return
+
+        batch = self.__replay.sample(batch_size or self.__replay_batch)
+        self.update_batch(
+            batch.view_ids,
+            batch.actions,
+            batch.rewards,
+            batch.next_view_ids,
+            batch.done
+        )
+
     def make_move(
             self,
             reward: float,
@@ -268,30 +564,133 @@ class BaseTDPlayer(BaseLearnedPlayer, metaclass=ABCMeta):
         :param available_moves:
         :return:
         """
-        mapped_state = self.translate_board(state)
-        self.check_visited_state(mapped_state, available_moves)
+        return self.step(reward, get_state_id(self.translate_board(state)))
+
+    def make_move_id(self, reward: float, state_id: int) -> int:
+        """
+        Make a move given the id of the current state and update the q-values
+        for the previous state-action pair.
+        :param reward:
+        :param state_id:
+        :return:
+        """
+        return self.step(reward, self.view_id(state_id))
+
+    def step(self, reward: float, view: int) -> int:
+        """
+        Select the next action for the translated state and update the
+        q-values for the previous state-action pair.
+        :param reward:
+        :param view: Id of the translated state.
+        :return:
+        """
+        # Previous state and action are kept in the frame the agent stores
+        # them in, so the updates need no remapping.
+        sid, sym = self.stored_id(view)
+        self.agent_q_vals.visit(sid)
+        if self.__deferred:
+            return ss.SYMMETRIES_LIST[sym][self.__record_step(reward, sid)]
+
         if self.prev_state is not None:
-            self.update(mapped_state, reward)
+            if self.__replay is None:
+                self.update(sid, reward)
+            elif not self.frozen:
+                self.__replay.add(
+                    self.__prev_view,
+                    self.__prev_move,
+                    reward,
+                    view,
+                    False
+                )
+
+        next_action = self.select_action_id(sid)
+        move = ss.SYMMETRIES_LIST[sym][next_action]
+        self.prev_state = sid
+        self.prev_action = next_action
+        self.__prev_view = view
+        self.__prev_move = move
+        return move
 
-        next_action = self.select_action(mapped_state)
-        self.prev_state = mapped_state
+    def __record_step(self, reward: float, sid: int) -> int:
+        """
+        Select the next action and record it for the update at the end of
+        the episode, in the frame the agent stores states in.
+        """
+        next_action = self.select_action_id(sid)
+        if not self.frozen:
+            n = self.__episode_len
+            if n > 0:
+                self.__episode_rewards[n - 1] = reward
+            self.__episode_states[n] = sid
+            self.__episode_actions[n] = next_action
+            self.__episode_len = n + 1
+
+        self.prev_state = sid
         self.prev_action = next_action
         return next_action
 
+    def __learn_episode(self, reward: float):
+        """
+        Update the q-values of all the moves of the episode in one backward
+        pass, towards their lambda-returns with the values before the update.
+        """
+        n = self.__episode_len
+        states = self.__episode_states
+        actions = self.__episode_actions
+        rewards = self.__episode_rewards
+        rewards[n - 1] = reward
+
+        values = self.agent_q_vals.values
+        lam = self.__trace_decay
+        next_values = [0.0] * n
+        if n > 1 and lam < 1.0:
+            # The values of the next states do not depend on the order of
+            # their actions, so the stored rows are used as they are.
+            next_values[:-1] = self.next_values(values[states[1:n]]).tolist()
+
+        # Episodes are a few moves long, so the pass itself is cheaper on
+        # scalars than on arrays. A player never visits a state twice in an
+        # episode, so the updates do not interfere.
+        ret = 0.0
+        for t in range(n - 1, -1, -1):
+            ret = rewards[t] + self.gamma * (
+                (1.0 - lam) * next_values[t] + lam * ret
+            )
+            sid, action = states[t], actions[t]
+            prev_val = values.item(sid, action)
+            values[sid, action] = prev_val + self.alpha * (ret - prev_val)
+
     def end_game(self, reward: float, state: str):
         """
         Perform final TD-learning update and set previous state and action to
-        None for a future game.
+        None for a future game. With experience replay, store the last
+        transition and learn from a replayed minibatch instead, and with
+        deferred updates, learn from all the moves of the episode.
         :param reward:
         :param state: Terminal board state.
         :return:
         """
-        prev_qs = self.agent_q_vals[self.prev_state]
-        prev_idx = np.argmax(prev_qs["actions"] == self.prev_action)
-        prev_val = prev_qs["q_vals"][prev_idx]
-
-        td_err = reward - prev_val
-        prev_qs["q_vals"][prev_idx] = prev_val + self.alpha * td_err
+        if self.__deferred:
+            if not self.frozen and self.__episode_len > 0:
+                self.__learn_episode(reward)
+            self.__episode_len = 0
+        elif self.__replay is not None:
+            if not self.frozen:
+                self.__replay.add(
+                    self.__prev_view,
+                    self.__prev_move,
+                    reward,
+                    -1,
+                    True
+                )
+                self.learn_from_batch()
+        else:
+            values = self.agent_q_vals.values
+            prev_val = values[self.prev_state, self.prev_action]
+            td_err = reward - prev_val
+            values[self.prev_state, self.prev_action] = (
+                prev_val + self.alpha * td_err
+            )
 
         self.prev_action = None
         self.prev_state = None
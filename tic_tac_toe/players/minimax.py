@@ -0,0 +1,133 @@
+import numpy as np
+from typing import List, Optional, Union, Dict
+
+from ..schemas import PLAYS
+from .. import state_space as ss
+from .q_table import QTable, StateActions
+from .schemas import TDSettings, TabularPolicy
+from .learned_base import BaseLearnedPlayer
+from ..tablebase import Tablebase, load_tablebase
+
+
+class MinimaxPlayer(BaseLearnedPlayer):
+    """
+    Player with perfect play: its moves are read from the tablebase (see
+    'tablebase'), one lookup per move. Its Q-values are the tablebase scores
+    of each move, so it can be used wherever a learned player is expected,
+    but it never learns nor explores.
+    """
+
+    @classmethod
+    def from_policy(
+            cls,
+            policy: Optional[TabularPolicy],
+            mark: PLAYS,
+            settings: TDSettings) -> "MinimaxPlayer":
+        """
+        Instantiate the player. The policy is ignored: the moves come from
+        the tablebase.
+        :param policy:
+        :param mark:
+        :param settings:
+        :return:
+        """
+        return cls(mark=mark, settings=settings)
+
+    @classmethod
+    def from_q_table(
+            cls,
+            table: QTable,
+            canonical: bool,
+            mark: PLAYS,
+            settings: TDSettings) -> "MinimaxPlayer":
+        """
+        Instantiate the player. The table is ignored: the moves come from the
+        tablebase.
+        :param table:
+        :param canonical:
+        :param mark:
+        :param settings:
+        :return:
+        """
+        return cls(mark=mark, settings=settings)
+
+    def __init__(
+            self,
+            mark: PLAYS,
+            settings: TDSettings,
+            agent_q_vals: Optional[Union[QTable, Dict[str, StateActions]]] = None,
+            freeze: bool = True,
+            tablebase: Optional[Tablebase] = None):
+        """
+        :param mark:
+        :param settings: Only the random seed and the default value are used.
+        :param agent_q_vals: Table with the tablebase scores of each move, to
+            use as storage (e.g. in shared memory). Built if None.
+        :param freeze: Unused, the player never learns.
+        :param tablebase: If None, use the default tablebase (see
+            'tablebase.load_tablebase').
+        """
+        if tablebase is None:
+            tablebase = load_tablebase()
+        if agent_q_vals is None:
+            agent_q_vals = QTable(
+                settings.default_q,
+                values=tablebase.move_scores(),
+                visited=tablebase.moves >= 0
+            )
+
+        super().__init__(
+            mark=mark,
+            settings=settings.model_copy(update={
+                "canonicalize": False,
+                "epsilon_greedy": False,
+            }),
+            agent_q_vals=agent_q_vals,
+            freeze=True
+        )
+        self.__moves = tablebase.moves
+        self.__moves_list: List[int] = tablebase.moves.tolist()
+
+    def select_action_id(self, view: int) -> int:
+        """
+        Best move for the translated state with the given id.
+        :param view:
+        :return:
+        """
+        return self.__moves_list[view]
+
+    def select_actions(self, view_ids: np.ndarray) -> np.ndarray:
+        """
+        Best moves for a batch of translated states.
+        :param view_ids:
+        :return:
+        """
+        return self.__moves[view_ids].astype(np.intp)
+
+    def make_move(self, reward: float, state: str, available_moves: List[int]) -> int:
+        """
+        Play the best move for the current board.
+        :param reward:
+        :param state:
+        :param available_moves:
+        :return:
+        """
+        return self.__moves_list[ss.KEY_TO_ID[self.translate_board(state)]]
+
+    def make_move_id(self, reward: float, state_id: int) -> int:
+        """
+        Play the best move for the state with the given id.
+        :param reward:
+        :param state_id:
+        :return:
+        """
+        return self.__moves_list[self.view_id(state_id)]
+
+    def end_game(self, reward: float, state: str):
+        """
+        Dummy method in this case.
+        :param reward:
+        :param state:
+        :return:
+        """
+        pass
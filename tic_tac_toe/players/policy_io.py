@@ -0,0 +1,180 @@
+import os
+import json
+import numpy as np
+from pathlib import Path
+from typing import Union, Tuple
+
+from .. import state_space as ss
+from .q_table import QTable
+from .schemas import TabularPolicy
+
+#: File suffix of binary policies.
+BINARY_SUFFIX: str = ".qtab"
+
+MAGIC: bytes = b"TTT-QTAB"
+VERSION: int = 1
+
+#: Fixed-size header at the start of a binary policy file.
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("version", "<u4"),
+    ("flags", "<u4"),
+    ("n_states", "<u4"),
+    ("n_actions", "<u4"),
+    ("default_q", "<f4"),
+    ("reserved", "<u4"),
+])
+
+FLAG_CANONICAL: int = 1
+
+
+def _layout(n_states: int) -> Tuple[int, int, int]:
+    """
+    Byte offsets of the keys, visited flags and values sections.
+    """
+    keys_at = HEADER_DTYPE.itemsize
+    visited_at = keys_at + 9 * n_states
+    values_at = visited_at + n_states
+    values_at += (-values_at) % 4
+    return keys_at, visited_at, values_at
+
+
+def is_binary_policy(path: Union[str, Path]) -> bool:
+    """
+    Whether the path names a binary policy file.
+    :param path:
+    :return:
+    """
+    return Path(path).suffix == BINARY_SUFFIX
+
+
+def save_binary_policy(
+        table: QTable,
+        path: Union[str, Path],
+        canonical: bool = False):
+    """
+    Save a Q-table in binary format. The file holds a small header, the state
+    keys (9 ASCII bytes each), a visited flag per state and the float32
+    values as an (n_states, 9) matrix, all in the order of the state table.
+    The file is replaced atomically, so processes that have the previous
+    version memory mapped keep reading it.
+    :param table:
+    :param path:
+    :param canonical: Whether the table stores states in canonical form.
+    """
+    header = np.zeros((), dtype=HEADER_DTYPE)
+    header["magic"] = MAGIC
+    header["version"] = VERSION
+    header["flags"] = FLAG_CANONICAL if canonical else 0
+    header["n_states"] = ss.N_STATES
+    header["n_actions"] = 9
+    header["default_q"] = table.default_q
+
+    keys_at, visited_at, values_at = _layout(ss.N_STATES)
+    tmp_path = "%s.tmp" % path
+    with open(tmp_path, "wb") as f:
+        f.write(header.tobytes())
+        f.write(np.array(ss.STATE_KEYS, dtype="S9").tobytes())
+        f.write(table.visited.astype(np.uint8).tobytes())
+        f.write(b"\x00" * (values_at - f.tell()))
+        f.write(np.ascontiguousarray(table.values, dtype="<f4").tobytes())
+    os.replace(tmp_path, path)
+
+
+def load_binary_policy(
+        path: Union[str, Path],
+        mmap: bool = True) -> Tuple[QTable, bool]:
+    """
+    Load a Q-table saved with 'save_binary_policy'. When memory mapped, the
+    file is mapped copy-on-write: its pages are shared by all processes that
+    load it until they are written to, and the file itself is never modified.
+    :param path:
+    :param mmap: Memory map the file instead of reading it into memory.
+    :return: Q-table, whether it stores states in canonical form.
+    """
+    header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+    if header.shape[0] != 1 or header["magic"][0] != MAGIC:
+        raise ValueError("Not a binary policy file: '%s'" % path)
+    header = header[0]
+    if header["version"] != VERSION or header["n_actions"] != 9:
+        raise ValueError("Unsupported binary policy format: '%s'" % path)
+
+    n_states = int(header["n_states"])
+    canonical = bool(header["flags"] & FLAG_CANONICAL)
+    default_q = float(header["default_q"])
+    keys_at, visited_at, values_at = _layout(n_states)
+
+    def section(dtype, offset: int, shape) -> np.ndarray:
+        if mmap:
+            # Plain ndarray views of the map skip the memmap subclass overhead
+            # on every element access.
+            mapped = np.memmap(path, dtype, mode="c", offset=offset, shape=shape)
+            return mapped.view(np.ndarray)
+        with open(path, "rb") as f:
+            f.seek(offset)
+            return np.fromfile(f, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+
+    keys = section("S9", keys_at, (n_states,))
+    visited = section(np.bool_, visited_at, (n_states,))
+    values = section("<f4", values_at, (n_states, 9))
+
+    expected = np.array(ss.STATE_KEYS, dtype="S9")
+    if n_states == ss.N_STATES and np.array_equal(keys, expected):
+        return QTable(default_q, values=values, visited=visited), canonical
+
+    # Saved with a different state table: place the rows by key.
+    digits = np.frombuffer(keys.tobytes(), dtype=np.uint8).reshape((-1, 9))
+    ids = ss.CODE_TO_ID[ss.board_codes(digits - ord("0"))]
+    if np.any(ids < 0):
+        raise ValueError("Policy file has unknown states: '%s'" % path)
+
+    table = QTable(default_q)
+    table.values[ids] = values
+    table.visited[ids] = visited
+    return table, canonical
+
+
+def load_q_table(
+        path: Union[str, Path],
+        mmap: bool = True) -> Tuple[QTable, bool]:
+    """
+    Load a Q-table from a policy file in either format.
+    :param path: Binary ('.qtab') or JSON policy file.
+    :param mmap: Memory map binary files.
+    :return: Q-table, whether it stores states in canonical form.
+    """
+    if is_binary_policy(path):
+        return load_binary_policy(path, mmap=mmap)
+
+    with open(path, "r") as f:
+        policy = TabularPolicy(**json.load(f))
+    return QTable.from_policy(policy, canonical=policy.canonical), policy.canonical
+
+
+def load_tabular_policy(path: Union[str, Path]) -> TabularPolicy:
+    """
+    Load a policy file in either format as a TabularPolicy.
+    :param path:
+    :return:
+    """
+    if is_binary_policy(path):
+        table, canonical = load_binary_policy(path)
+        return table.to_policy(canonical=canonical)
+
+    with open(path, "r") as f:
+        return TabularPolicy(**json.load(f))
+
+
+def convert_policy(source: Union[str, Path], target: Union[str, Path]):
+    """
+    Convert a policy file between the JSON and binary formats. The format of
+    each file is given by its suffix ('.qtab' for binary).
+    :param source:
+    :param target:
+    """
+    table, canonical = load_q_table(source, mmap=False)
+    if is_binary_policy(target):
+        save_binary_policy(table, target, canonical=canonical)
+    else:
+        with open(target, "w") as f:
+            json.dump(table.to_policy(canonical=canonical).model_dump(), f)
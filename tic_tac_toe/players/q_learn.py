@@ -1,9 +1,10 @@
 import numpy as np
-from typing import Dict, Optional, List
+from typing import Dict, Optional, Union
 
 from ..schemas import PLAYS
 from .schemas import TDSettings
-from .learned_base import BaseTDPlayer, StateActions
+from .q_table import QTable, StateActions
+from .learned_base import BaseTDPlayer
 
 
 class QLearnPlayer(BaseTDPlayer):
@@ -15,7 +16,7 @@ class QLearnPlayer(BaseTDPlayer):
             self,
             mark: PLAYS,
             settings: TDSettings,
-            agent_q_vals: Optional[Dict[str, StateActions]] = None,
+            agent_q_vals: Optional[Union[QTable, Dict[str, StateActions]]] = None,
             freeze: bool = False,):
         """
         :param mark:
@@ -32,20 +33,26 @@ class QLearnPlayer(BaseTDPlayer):
         self.prev_state = None
         self.prev_action = None
 
-    def update(self, mapped_state: str, reward: float = 0.0):
+    def update(self, state_id: int, reward: float = 0.0):
         """
         Update q-val for previous state-action given the new state and reward.
-        :param mapped_state: Translated state.
+        :param state_id: Id of the new state, as stored by the agent.
         :param reward:
         """
         if self.frozen:
             return
 
-        prev_qs = self.agent_q_vals[self.prev_state]
-        prev_idx = np.argmax(prev_qs["actions"] == self.prev_action)
-
-        next_q = np.max(self.agent_q_vals[mapped_state]["q_vals"])
-        prev_val = prev_qs["q_vals"][prev_idx]
+        values = self.agent_q_vals.values
+        next_q = np.max(values[state_id])
+        prev_val = values[self.prev_state, self.prev_action]
 
         td_err = reward + self.gamma * next_q - prev_val
-        prev_qs["q_vals"][prev_idx] = prev_val + self.alpha * td_err
+        values[self.prev_state, self.prev_action] = prev_val + self.alpha * td_err
+
+    def next_values(self, qs: np.ndarray) -> np.ndarray:
+        """
+        Greedy values of a batch of next states.
+        :param qs:
+        :return:
+        """
+        return np.max(qs, axis=1)
@@ -0,0 +1,219 @@
+import numpy as np
+from typing import TypedDict, Dict, Optional, Any, Iterator, Tuple
+
+from .. import state_space as ss
+from .schemas import TabularPolicy
+
+
+class StateActions(TypedDict):
+    """
+    State actions represented within the agent.
+    """
+    actions: np.ndarray[Any, np.int16]  #: 1d array of action labels
+    q_vals: np.ndarray[Any, np.float32]  #: 1d array of q-values for actions
+
+
+class QTable:
+    """
+    Tabular action values for the states of the state table (see
+    'state_space'), held in a single array of shape (N_STATES, 9) indexed by
+    state id and action. Illegal actions hold -inf. A state counts as
+    'visited' once the agent has seen it, and only visited states are
+    serialized.
+
+    For compatibility with code written for a dictionary of translated
+    state -> StateActions, the table can also be read by translated state.
+    """
+
+    def __init__(
+            self,
+            default_q: float = 0.0,
+            values: Optional[np.ndarray] = None,
+            visited: Optional[np.ndarray] = None):
+        """
+        :param default_q: Initial value of the legal actions.
+        :param values: Array to use as storage. If None, allocate one.
+        :param visited: Array of visited flags to use as storage. If None,
+            allocate one.
+        """
+        if values is None:
+            values = np.where(ss.LEGAL_MASK, default_q, -np.inf)
+            values = values.astype(np.float32)
+        if visited is None:
+            visited = np.zeros(ss.N_STATES, dtype=bool)
+
+        if values.shape != (ss.N_STATES, 9) or visited.shape != (ss.N_STATES,):
+            raise ValueError("Q-table arrays do not match the state table!")
+
+        self.__values = values
+        self.__visited = visited
+        self.__default_q = default_q
+
+    @classmethod
+    def from_dict(
+            cls,
+            agent_q_vals: Dict[str, StateActions],
+            default_q: float = 0.0) -> "QTable":
+        """
+        Build a table from a dictionary of translated state -> StateActions.
+        :param agent_q_vals:
+        :param default_q:
+        :return:
+        """
+        out = cls(default_q)
+        for state, qs in agent_q_vals.items():
+            out[state] = qs
+        return out
+
+    @classmethod
+    def from_policy(
+            cls,
+            policy: Optional[TabularPolicy],
+            default_q: float = 0.0,
+            canonical: bool = False) -> "QTable":
+        """
+        Build a table from a serialized policy.
+        :param policy:
+        :param default_q:
+        :param canonical: Store states in canonical form. Policies that are
+            not canonical are folded, keeping one entry per class of
+            symmetric states (preferably the one already in canonical form).
+        :return:
+        """
+        out = cls(default_q)
+        if policy is None:
+            return out
+
+        fold = canonical and not policy.canonical
+        for state, qs in policy.states.items():
+            sid = get_state_id(state)
+            sym = 0
+            if fold:
+                sym = ss.CANONICAL_SYM_LIST[sid]
+                sid = ss.CANONICAL_ID_LIST[sid]
+                if sym != 0 and out.visited[sid]:
+                    continue
+
+            inverse = ss.INVERSE_SYMMETRIES_LIST[sym]
+            for a, q in qs.items():
+                out.values[sid, inverse[int(a)]] = q
+            out.visited[sid] = True
+        return out
+
+    @property
+    def values(self) -> np.ndarray:
+        """
+        Action values. Array of shape (N_STATES, 9) with -inf for illegal
+        actions.
+        """
+        return self.__values
+
+    @property
+    def visited(self) -> np.ndarray:
+        """
+        Whether each state has been visited.
+        """
+        return self.__visited
+
+    @property
+    def default_q(self) -> float:
+        """
+        Initial value of the legal actions.
+        """
+        return self.__default_q
+
+    @property
+    def nbytes(self) -> int:
+        """
+        Memory held by the table's arrays.
+        """
+        return self.__values.nbytes + self.__visited.nbytes
+
+    def reset_unvisited(self, default_q: float):
+        """
+        Set the values of the legal actions of all unvisited states to a new
+        default value.
+        :param default_q:
+        """
+        unvisited = ~self.__visited
+        self.__values[unvisited] = np.where(
+            ss.LEGAL_MASK[unvisited],
+            np.float32(default_q),
+            np.float32(-np.inf)
+        )
+        self.__default_q = default_q
+
+    def visit(self, sid: int) -> bool:
+        """
+        Mark a state as visited.
+        :param sid: State id.
+        :return: Whether the state had been visited before.
+        """
+        if self.__visited[sid]:
+            return True
+        self.__visited[sid] = True
+        return False
+
+    def to_policy(self, canonical: bool = False) -> TabularPolicy:
+        """
+        Serialize the values of the visited states.
+        :param canonical: Whether the states are stored in canonical form.
+        :return:
+        """
+        states = {}
+        for sid in np.flatnonzero(self.__visited).tolist():
+            row = self.__values[sid].tolist()
+            states[ss.STATE_KEYS[sid]] = {
+                str(a): row[a] for a in ss.LEGAL_MOVES[sid]
+            }
+        return TabularPolicy(states=states, canonical=canonical)
+
+    def __len__(self) -> int:
+        return int(np.count_nonzero(self.__visited))
+
+    def __contains__(self, state: str) -> bool:
+        sid = ss.KEY_TO_ID.get(state)
+        return sid is not None and bool(self.__visited[sid])
+
+    def __iter__(self) -> Iterator[str]:
+        for sid in np.flatnonzero(self.__visited).tolist():
+            yield ss.STATE_KEYS[sid]
+
+    def __getitem__(self, state: str) -> StateActions:
+        """
+        Get a copy of the values of a visited translated state.
+        """
+        sid = get_state_id(state)
+        if not self.__visited[sid]:
+            raise KeyError(state)
+
+        actions = np.array(ss.LEGAL_MOVES[sid], dtype=np.int16)
+        return StateActions(
+            actions=actions,
+            q_vals=self.__values[sid, actions].copy()
+        )
+
+    def __setitem__(self, state: str, qs: StateActions):
+        """
+        Set the values of a translated state and mark it as visited.
+        """
+        sid = get_state_id(state)
+        self.__values[sid, qs["actions"]] = qs["q_vals"]
+        self.__visited[sid] = True
+
+    def items(self) -> Iterator[Tuple[str, StateActions]]:
+        for state in self:
+            yield state, self[state]
+
+
+def get_state_id(state: str) -> int:
+    """
+    Get the id of a translated state, raising a KeyError for boards that
+    are not in the state table.
+    :param state:
+    :return:
+    """
+    sid = ss.KEY_TO_ID.get(state)
+    if sid is None:
+        raise KeyError("Not a valid state: '%s'" % state)
+    return sid
@@ -1,8 +1,14 @@
-import random
-from typing import List
+import numpy as np
+from typing import List, Any
 
 from ..schemas import PLAYS
 from .base import BasePlayer
+from .. import state_space as ss
+from ..random_stream import RandomStream, Seed, stream_seed
+
+#: Key of the stream of a random rival, derived from a run's seed (see
+#: 'random_stream.stream_seed').
+RIVAL_STREAM: int = 2
 
 
 class RandomPlayer(BasePlayer):
@@ -10,9 +16,9 @@ class RandomPlayer(BasePlayer):
     Player that randomly chooses one of the available moves.
     """
 
-    def __init__(self, mark: PLAYS, random_seed: int = 12345):
+    def __init__(self, mark: PLAYS, random_seed: Seed = 12345):
         super().__init__(mark)
-        self.rng = random.Random(random_seed)
+        self.rng = RandomStream(random_seed)
 
     def make_move(self, reward: float, state: str, available_moves: List[int]) -> int:
         """
@@ -24,6 +30,38 @@ class RandomPlayer(BasePlayer):
         """
         return self.rng.choice(available_moves)
 
+    def make_move_id(self, reward: float, state_id: int) -> int:
+        """
+        Make a random move on the board given the id of the current state.
+        :param reward:
+        :param state_id:
+        :return:
+        """
+        return self.rng.choice(ss.LEGAL_MOVES[state_id])
+
+    def select_actions(self, view_ids: np.ndarray) -> np.ndarray:
+        """
+        Select a random legal move for each game in a batch.
+        :param view_ids:
+        :return:
+        """
+        return random_legal_moves(self.rng.generator, ss.LEGAL_MASK[view_ids])
+
+    def get_rng_state(self) -> Any:
+        """
+        State of the player's random number stream.
+        :return:
+        """
+        return self.rng.get_state()
+
+    def set_rng_state(self, state: Any):
+        """
+        Restore the state of the player's random number stream.
+        :param state:
+        :return:
+        """
+        self.rng.set_state(state)
+
     def end_game(self, reward: float, state: str):
         """
         Dummy method in this case.
@@ -32,3 +70,28 @@ class RandomPlayer(BasePlayer):
         :return:
         """
         pass
+
+
+def random_rival(seed: int, mark: PLAYS = "O") -> RandomPlayer:
+    """
+    Random rival of a training run, seeded from its own stream of the run's
+    seed so that its moves are independent of the agent's.
+    :param seed: Random seed of the run (or worker).
+    :param mark:
+    :return:
+    """
+    return RandomPlayer(mark, random_seed=stream_seed(seed, RIVAL_STREAM))
+
+
+def random_legal_moves(
+        rng: np.random.Generator,
+        legal_mask: np.ndarray) -> np.ndarray:
+    """
+    Draw a uniformly random legal move for each row of a legal move mask.
+    :param rng:
+    :param legal_mask: Boolean array of shape (n, 9).
+    :return: Array of n cell indices.
+    """
+    draws = rng.random(legal_mask.shape)
+    draws[~legal_mask] = -1.0
+    return np.argmax(draws, axis=1)
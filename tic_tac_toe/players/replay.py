@@ -0,0 +1,174 @@
+"""
+Experience replay for the TD players. Transitions are stored in a ring
+buffer of preallocated arrays, and learning samples minibatches of them
+instead of updating once per move, so every transition is learned from
+several times and the updates are applied in vectorized form.
+"""
+import numpy as np
+from typing import Any, Dict, NamedTuple
+
+from ..random_stream import RandomStream, Seed
+
+#: Key of the replay sampling stream, derived from a player's seed (see
+#: 'random_stream.stream_seed').
+REPLAY_STREAM: int = 3
+
+
+class Transitions(NamedTuple):
+    """
+    A batch of transitions, from the point of view of the player that acted.
+    """
+    view_ids: np.ndarray  #: Translated states the actions were taken in
+    actions: np.ndarray  #: Actions, in the frame of the translated states
+    rewards: np.ndarray  #: Rewards received after each action
+    next_view_ids: np.ndarray  #: Translated states reached, -1 when done
+    done: np.ndarray  #: Whether each episode finished after the action
+
+
+class ReplayBuffer:
+    """
+    Ring buffer with the latest transitions of a player. Once it is full, new
+    transitions overwrite the oldest ones.
+    """
+
+    def __init__(self, capacity: int, random_seed: Seed = None):
+        """
+        :param capacity: Maximum number of transitions kept.
+        :param random_seed: Seed of the stream used to sample minibatches.
+        """
+        if capacity < 1:
+            raise ValueError("The replay buffer needs a positive capacity!")
+
+        self.__view_ids = np.zeros(capacity, dtype=np.int32)
+        self.__actions = np.zeros(capacity, dtype=np.int8)
+        self.__rewards = np.zeros(capacity, dtype=np.float32)
+        self.__next_view_ids = np.zeros(capacity, dtype=np.int32)
+        self.__done = np.zeros(capacity, dtype=bool)
+        self.__capacity = capacity
+        self.__size = 0
+        self.__pos = 0
+        self.__rng = RandomStream(random_seed)
+
+    @property
+    def capacity(self) -> int:
+        """
+        Maximum number of transitions kept.
+        """
+        return self.__capacity
+
+    def __len__(self) -> int:
+        return self.__size
+
+    def add(
+            self,
+            view_id: int,
+            action: int,
+            reward: float,
+            next_view_id: int,
+            done: bool):
+        """
+        Store a single transition.
+        :param view_id:
+        :param action:
+        :param reward:
+        :param next_view_id: -1 if the episode finished.
+        :param done:
+        :return:
+        """
+        pos = self.__pos
+        self.__view_ids[pos] = view_id
+        self.__actions[pos] = action
+        self.__rewards[pos] = reward
+        self.__next_view_ids[pos] = next_view_id
+        self.__done[pos] = done
+        self.__pos = (pos + 1) % self.__capacity
+        self.__size = min(self.__size + 1, self.__capacity)
+
+    def add_batch(
+            self,
+            view_ids: np.ndarray,
+            actions: np.ndarray,
+            rewards: np.ndarray,
+            next_view_ids: np.ndarray,
+            done: np.ndarray):
+        """
+        Store a batch of transitions (see 'Transitions').
+        :param view_ids:
+        :param actions:
+        :param rewards:
+        :param next_view_ids: Ignored where 'done' is set.
+        :param done:
+        :return:
+        """
+        n = np.shape(view_ids)[0]
+        if n > self.__capacity:
+            # Only the last transitions would survive.
+            keep = slice(n - self.__capacity, n)
+            view_ids, actions, rewards = view_ids[keep], actions[keep], rewards[keep]
+            next_view_ids, done = next_view_ids[keep], done[keep]
+            n = self.__capacity
+
+        idx = (self.__pos + np.arange(n)) % self.__capacity
+        self.__view_ids[idx] = view_ids
+        self.__actions[idx] = actions
+        self.__rewards[idx] = rewards
+        self.__done[idx] = done
+        self.__next_view_ids[idx] = np.where(done, -1, next_view_ids)
+        self.__pos = (self.__pos + n) % self.__capacity
+        self.__size = min(self.__size + n, self.__capacity)
+
+    def sample(self, batch_size: int) -> Transitions:
+        """
+        Sample a minibatch of the stored transitions, uniformly and with
+        replacement.
+        :param batch_size:
+        :return:
+        """
+        if self.__size == 0:
+            raise ValueError("Cannot sample from an empty replay buffer!")
+
+        idx = self.__rng.generator.integers(0, self.__size, batch_size)
+        return Transitions(
+            view_ids=self.__view_ids[idx],
+            actions=self.__actions[idx].astype(np.intp),
+            rewards=self.__rewards[idx],
+            next_view_ids=self.__next_view_ids[idx],
+            done=self.__done[idx],
+        )
+
+    def get_state(self) -> Dict[str, Any]:
+        """
+        Copy of the contents of the buffer and the state of its random
+        stream, e.g. for checkpoints.
+        :return:
+        """
+        size = self.__size
+        return {
+            "view_ids": self.__view_ids[:size].copy(),
+            "actions": self.__actions[:size].copy(),
+            "rewards": self.__rewards[:size].copy(),
+            "next_view_ids": self.__next_view_ids[:size].copy(),
+            "done": self.__done[:size].copy(),
+            "pos": self.__pos,
+            "rng": self.__rng.get_state(),
+        }
+
+    def set_state(self, state: Dict[str, Any]):
+        """
+        Restore a state returned by 'get_state'. The buffer must have the
+        same capacity.
+        :param state:
+        :return:
+        """
+        size = state["view_ids"].shape[0]
+        if size > self.__capacity:
+            raise ValueError("Replay state does not fit in the buffer!")
+
+        self.__view_ids[:size] = state["view_ids"]
+        self.__actions[:size] = state["actions"]
+        self.__rewards[:size] = state["rewards"]
+        self.__next_view_ids[:size] = state["next_view_ids"]
+        self.__done[:size] = state["done"]
+        self.__size = size
+        self.__pos = state["pos"]
+        self.__rng.set_state(state["rng"])
@@ -1,5 +1,5 @@
-from typing import Dict
-from pydantic import BaseModel, Field
+from typing import Dict, Optional
+from pydantic import BaseModel, Field, model_validator
 
 
 class TDSettings(BaseModel):
@@ -24,6 +24,51 @@ class TDSettings(BaseModel):
         le=1.0,
         gt=0.0,
     )
+    canonicalize: bool = Field(
+        default=False,
+        description=(
+            "Store a single entry for all the rotations and reflections of "
+            "a state"
+        )
+    )
+    replay_size: Optional[int] = Field(
+        default=None,
+        gt=0,
+        description=(
+            "Capacity of the experience replay buffer. If set, transitions "
+            "are stored and learned from in sampled minibatches instead of "
+            "updating the values after every move"
+        )
+    )
+    replay_batch: int = Field(
+        default=32,
+        gt=0,
+        description="Transitions replayed per episode played"
+    )
+    deferred_updates: bool = Field(
+        default=False,
+        description=(
+            "Only record the agent's moves while playing, and learn from all "
+            "of them at the end of each episode in a single backward pass"
+        )
+    )
+    trace_decay: float = Field(
+        default=0.0,
+        ge=0.0,
+        le=1.0,
+        description=(
+            "Lambda of the lambda-returns used as targets by deferred "
+            "updates: 0 for one-step TD targets, 1 for Monte Carlo returns"
+        )
+    )
+
+    @model_validator(mode="after")
+    def check_update_mode(self) -> "TDSettings":
+        if self.deferred_updates and self.replay_size is not None:
+            raise ValueError(
+                "Deferred updates and experience replay cannot be combined"
+            )
+        return self
 
 
 class TabularPolicy(BaseModel):
@@ -33,3 +78,7 @@ class TabularPolicy(BaseModel):
     states: Dict[str, Dict[str, float]] = Field(
         description="Map of state -> (action -> q_value)"
     )
+    canonical: bool = Field(
+        default=False,
+        description="Whether states and actions are in canonical form"
+    )
@@ -0,0 +1,97 @@
+"""
+Random number streams for the hot loops of training. Drawing numbers one at a
+time from a numpy generator (or 'random.Random') has a large overhead per
+call, so streams draw uniform numbers from a 'numpy.random.Generator' in large
+blocks and hand them out one by one from a list.
+"""
+import numpy as np
+from typing import Any, Optional, Sequence, TypeVar, Union
+
+T = TypeVar("T")
+
+Seed = Optional[Union[int, Sequence[int], np.random.SeedSequence]]
+
+
+def stream_seed(seed: int, *keys: int) -> np.random.SeedSequence:
+    """
+    Seed for a stream derived from a run's seed and some keys (e.g. the index
+    of a player or worker), so that every stream of a run is reproducible and
+    independent of the others.
+    :param seed:
+    :param keys:
+    :return:
+    """
+    return np.random.SeedSequence([seed, *keys])
+
+
+class RandomStream:
+    """
+    Stream of random numbers drawn from a numpy generator in blocks.
+    """
+
+    def __init__(self, seed: Seed = None, block_size: int = 4096):
+        """
+        :param seed: Seed of the generator. Seeded from the OS if None.
+        :param block_size: Number of values drawn from the generator at a
+            time.
+        """
+        self.__generator = np.random.default_rng(seed)
+        self.__block_size = max(1, block_size)
+        self.__block = []
+        self.__pos = 0
+
+    @property
+    def generator(self) -> np.random.Generator:
+        """
+        Underlying generator, for batched draws.
+        """
+        return self.__generator
+
+    def random(self) -> float:
+        """
+        Uniform random number in [0, 1).
+        :return:
+        """
+        pos = self.__pos
+        if pos == len(self.__block):
+            self.__block = self.__generator.random(self.__block_size).tolist()
+            pos = 0
+        self.__pos = pos + 1
+        return self.__block[pos]
+
+    def below(self, n: int) -> int:
+        """
+        Uniform random integer in [0, n).
+        :param n:
+        :return:
+        """
+        return int(self.random() * n)
+
+    def choice(self, options: Sequence[T]) -> T:
+        """
+        Uniform random element of a non-empty sequence.
+        :param options:
+        :return:
+        """
+        return options[int(self.random() * len(options))]
+
+    def get_state(self) -> Any:
+        """
+        State of the stream: the generator state and the values left in the
+        current block.
+        :return:
+        """
+        return (
+            self.__generator.bit_generator.state,
+            self.__block[self.__pos:],
+        )
+
+    def set_state(self, state: Any):
+        """
+        Restore a state returned by 'get_state'.
+        :param state:
+        :return:
+        """
+        self.__generator.bit_generator.state = state[0]
+        self.__block = list(state[1])
+        self.__pos = 0
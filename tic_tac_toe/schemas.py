@@ -1,5 +1,5 @@
-from typing import Literal
-from pydantic import BaseModel
+from typing import Dict, List, Literal
+from pydantic import BaseModel, Field
 
 
 class GameSettings(BaseModel):
@@ -12,3 +12,40 @@ class GameSettings(BaseModel):
     step_reward: float = 0.0  #: Reward at each non-terminal step
 
 PLAYS = Literal["X", "O"]
+
+
+class BenchResult(BaseModel):
+    """
+    Result of a benchmark (see 'bench').
+    """
+    name: str
+    kind: Literal["micro", "macro"]
+    unit: str = Field(description="What an operation is, e.g. 'call' or 'episode'")
+    ops: int = Field(description="Operations per timed repetition")
+    repeats: int
+    best_seconds: float = Field(description="Fastest repetition")
+    median_seconds: float
+
+    @property
+    def ops_per_sec(self) -> float:
+        """
+        Operations per second in the fastest repetition.
+        """
+        return self.ops / max(self.best_seconds, 1e-12)
+
+
+class BenchReport(BaseModel):
+    """
+    Results of a run of the benchmark suite.
+    """
+    created: str
+    python: str
+    numpy: str
+    platform: str
+    results: List[BenchResult]
+
+    def by_name(self) -> Dict[str, BenchResult]:
+        """
+        Results by benchmark name.
+        """
+        return {r.name: r for r in self.results}
@@ -0,0 +1,91 @@
+"""
+Exact solution of tic-tac-toe by retrograde analysis over the state table.
+State ids are ordered by the number of marks on the board, so sweeping them
+from the last layer to the first finds the minimax value of every reachable
+position after the values of all of its successors.
+"""
+import numpy as np
+from functools import lru_cache
+
+from . import state_space as ss
+
+
+def _popcounts(bits: np.ndarray) -> np.ndarray:
+    return np.unpackbits(bits.view(np.uint8).reshape(-1, 2), axis=1).sum(axis=1)
+
+
+#: Number of marks on the board of each state.
+MARK_COUNTS: np.ndarray = (
+    _popcounts(ss.X_BITS) + _popcounts(ss.O_BITS)
+).astype(np.int8)
+
+#: Whether 'X' has the next move in each state (as many 'X' as 'O' marks).
+X_TO_MOVE: np.ndarray = _popcounts(ss.X_BITS) == _popcounts(ss.O_BITS)
+
+
+@lru_cache(maxsize=None)
+def solve() -> np.ndarray:
+    """
+    Minimax score of every reachable state from the point of view of 'X',
+    with perfect play from both sides. Wins score 1 plus the number of empty
+    cells left when the game ends, so faster wins (and slower losses) are
+    preferred; draws score 0. Unreachable states score 0.
+    :return: Read-only int8 array of shape (N_STATES,).
+    """
+    scores = np.zeros(ss.N_STATES, dtype=np.int8)
+    empty = (9 - MARK_COUNTS).astype(np.int8)
+    scores[ss.WINNER == ss.X_WINS] = 1 + empty[ss.WINNER == ss.X_WINS]
+    scores[ss.WINNER == ss.O_WINS] = -1 - empty[ss.WINNER == ss.O_WINS]
+
+    legal = ss.NEXT_STATE >= 0
+    for marks in range(8, -1, -1):
+        layer = np.flatnonzero(
+            (MARK_COUNTS == marks) & ss.REACHABLE & (ss.WINNER == ss.ONGOING)
+        )
+        children = scores[np.maximum(ss.NEXT_STATE[layer], 0)].astype(np.int16)
+        x_turn = X_TO_MOVE[layer]
+        best_x = np.where(legal[layer], children, -100).max(axis=1)
+        best_o = np.where(legal[layer], children, 100).min(axis=1)
+        scores[layer] = np.where(x_turn, best_x, best_o)
+
+    scores.flags.writeable = False
+    return scores
+
+
+def view_scores(view_ids: np.ndarray) -> np.ndarray:
+    """
+    Minimax scores of translated states (see 'BasePlayer.view_id') from the
+    point of view of the player to move in them.
+    :param view_ids:
+    :return:
+    """
+    x_turn = X_TO_MOVE[view_ids]
+    real = np.where(x_turn, view_ids, ss.SWAP_ID[view_ids])
+    scores = solve()[real]
+    return np.where(x_turn, scores, -scores)
+
+
+@lru_cache(maxsize=None)
+def optimal_moves() -> np.ndarray:
+    """
+    Best move for the player to move in each translated state, in the format
+    of 'players.compiled.compile_policy'. Ties go to the first of the best
+    moves.
+    :return: Read-only int8 array of shape (N_STATES,) indexed by the id of
+        the translated state, with -1 for finished games and states that
+        are not the view of a reachable position.
+    """
+    views = np.arange(ss.N_STATES)
+    x_turn = X_TO_MOVE[views]
+    real = np.where(x_turn, views, ss.SWAP_ID[views])
+    playable = ss.REACHABLE[real] & (ss.WINNER[real] == ss.ONGOING)
+
+    next_ids = ss.NEXT_STATE[real]
+    child_scores = solve()[np.maximum(next_ids, 0)].astype(np.int16)
+    child_scores = np.where(x_turn[:, None], child_scores, -child_scores)
+    child_scores[next_ids < 0] = -100
+
+    moves = np.argmax(child_scores, axis=1).astype(np.int8)
+    moves[~playable] = -1
+    moves.flags.writeable = False
+    return moves
@@ -0,0 +1,255 @@
+"""
+Precomputed table of tic-tac-toe positions. All positions reachable from the
+empty board, plus their colour-swapped versions (boards as seen by the 'O'
+player), are enumerated once at import and given dense integer ids. Ids are
+ordered by the number of marks on the board, so every transition goes from a
+lower id to a higher one.
+"""
+import numpy as np
+from typing import List, Dict, Optional, Literal, Tuple
+
+from . import bitboard as bb
+
+#: Winner codes used in the WINNER table.
+ONGOING: int = 0
+X_WINS: int = 1
+O_WINS: int = 2
+DRAW: int = 3
+
+#: Winner code -> result as returned by 'Game.make_move'.
+WINNER_MARKS: Tuple[Optional[Literal["-", "X", "O"]], ...] = (
+    None, "X", "O", "-"
+)
+
+#: Id of the empty board.
+EMPTY_ID: int = 0
+
+#: The 8 symmetries of the board (rotations and reflections) as maps
+#: (row, col) -> (row, col). The identity comes first.
+_SYMMETRY_MAPS = (
+    lambda r, c: (r, c),
+    lambda r, c: (c, 2 - r),
+    lambda r, c: (2 - r, 2 - c),
+    lambda r, c: (2 - c, r),
+    lambda r, c: (r, 2 - c),
+    lambda r, c: (2 - r, c),
+    lambda r, c: (c, r),
+    lambda r, c: (2 - c, 2 - r),
+)
+
+
+def _symmetry_perm(fn) -> List[int]:
+    perm = [0] * 9
+    for i in range(9):
+        r, c = fn(i // 3, i % 3)
+        perm[3 * r + c] = i
+    return perm
+
+
+#: Cell permutations of the symmetries. Board b transformed by symmetry t is
+#: b[SYMMETRIES[t]], so cell i of the transformed board is cell
+#: SYMMETRIES[t][i] of the original one. Shape (8, 9).
+SYMMETRIES: np.ndarray = np.array(
+    [_symmetry_perm(fn) for fn in _SYMMETRY_MAPS],
+    dtype=np.int8
+)
+
+#: Inverse permutations: cell a of a board is cell INVERSE_SYMMETRIES[t][a]
+#: of the board transformed by symmetry t. Shape (8, 9).
+INVERSE_SYMMETRIES: np.ndarray = np.argsort(SYMMETRIES, axis=1).astype(np.int8)
+
+
+def _popcount(bits: int) -> int:
+    return bin(bits).count("1")
+
+
+#: Base-3 value of each 9-bit mask, i.e. the sum of 3^i over its set bits.
+_CODES: List[int] = [
+    sum(3 ** i for i in range(9) if bits & bb.CELL_BITS[i])
+    for bits in range(bb.FULL_BOARD + 1)
+]
+
+
+def _code(x_bits: int, o_bits: int) -> int:
+    """
+    Base-3 code of a board: digit i is 0 for empty, 1 for 'X', 2 for 'O'.
+    """
+    return _CODES[x_bits] + 2 * _CODES[o_bits]
+
+
+def _enumerate() -> Tuple[List[Tuple[int, int]], set]:
+    """
+    Enumerate the reachable positions and close the set under colour swaps.
+    :return: Sorted list of (x_bits, o_bits) pairs, set of reachable pairs.
+    """
+    reachable = {(0, 0)}
+    frontier = [(0, 0)]
+    while frontier:
+        new_frontier = []
+        for x_bits, o_bits in frontier:
+            if bb.winner(x_bits, o_bits) is not None:
+                continue
+
+            x_turn = _popcount(x_bits) == _popcount(o_bits)
+            for cell in bb.EMPTY_CELLS[x_bits | o_bits]:
+                if x_turn:
+                    child = (x_bits | bb.CELL_BITS[cell], o_bits)
+                else:
+                    child = (x_bits, o_bits | bb.CELL_BITS[cell])
+
+                if child not in reachable:
+                    reachable.add(child)
+                    new_frontier.append(child)
+        frontier = new_frontier
+
+    states = reachable | {(o, x) for x, o in reachable}
+    ordered = sorted(
+        states,
+        key=lambda s: (_popcount(s[0] | s[1]), _code(*s))
+    )
+    return ordered, reachable
+
+
+def board_codes(cells: np.ndarray) -> np.ndarray:
+    """
+    Base-3 codes for an array of boards of shape (..., 9) with cells as in
+    BOARD_CELLS.
+    :param cells:
+    :return:
+    """
+    powers = 3 ** np.arange(9, dtype=np.int32)
+    return cells.astype(np.int32) @ powers
+
+
+_ORDERED, _REACHABLE = _enumerate()
+
+#: Total number of positions in the table.
+N_STATES: int = len(_ORDERED)
+
+#: Board of each state as a string of 'X', 'O' and '-'.
+BOARDS: List[str] = [bb.to_string(x, o) for x, o in _ORDERED]
+
+#: Board of each state with '1' for 'X', '2' for 'O' and '0' for empty. This
+#: is the translated board of the 'X' player (see 'BasePlayer.translate_board').
+STATE_KEYS: List[str] = [
+    b.replace("X", "1").replace("O", "2").replace("-", "0") for b in BOARDS
+]
+
+#: Translated board -> state id.
+KEY_TO_ID: Dict[str, int] = {k: i for i, k in enumerate(STATE_KEYS)}
+
+#: Board string -> state id.
+BOARD_TO_ID: Dict[str, int] = {b: i for i, b in enumerate(BOARDS)}
+
+#: Base-3 code of a board -> state id, -1 for codes not in the table.
+CODE_TO_ID: np.ndarray = np.full(3 ** 9, -1, dtype=np.int32)
+CODE_TO_ID[[_code(x, o) for x, o in _ORDERED]] = np.arange(N_STATES)
+
+#: Bitboards of each state.
+X_BITS: np.ndarray = np.array([x for x, _ in _ORDERED], dtype=np.uint16)
+O_BITS: np.ndarray = np.array([o for _, o in _ORDERED], dtype=np.uint16)
+
+#: Cells of each state as 0 (empty), 1 ('X') or 2 ('O'). Shape (N_STATES, 9).
+BOARD_CELLS: np.ndarray = (
+    np.frombuffer("".join(STATE_KEYS).encode(), dtype=np.uint8)
+    .reshape((N_STATES, 9)) - ord("0")
+).astype(np.int8)
+
+#: Winner code of each state. See ONGOING, X_WINS, O_WINS and DRAW.
+WINNER: np.ndarray = np.array(
+    [WINNER_MARKS.index(bb.winner(x, o)) for x, o in _ORDERED],
+    dtype=np.int8
+)
+
+#: Legal moves of each state. Terminal states have none. Shape (N_STATES, 9).
+LEGAL_MASK: np.ndarray = (BOARD_CELLS == 0) & (WINNER == ONGOING)[:, None]
+
+#: Whether each state can be reached from the empty board in a real game.
+#: The rest are colour-swapped boards that only appear as player views.
+REACHABLE: np.ndarray = np.array(
+    [s in _REACHABLE for s in _ORDERED],
+    dtype=bool
+)
+
+#: Id of the state with the 'X' and 'O' marks swapped.
+SWAP_ID: np.ndarray = np.array(
+    [KEY_TO_ID[k.translate(str.maketrans("12", "21"))] for k in STATE_KEYS],
+    dtype=np.int32
+)
+
+
+def _canonical() -> Tuple[np.ndarray, np.ndarray]:
+    codes = np.stack(
+        [board_codes(BOARD_CELLS[:, perm]) for perm in SYMMETRIES],
+        axis=1
+    )
+    sym = np.argmin(codes, axis=1)
+    return (
+        CODE_TO_ID[codes[np.arange(N_STATES), sym]],
+        sym.astype(np.int8)
+    )
+
+
+def _transitions() -> np.ndarray:
+    out = np.full((N_STATES, 9), -1, dtype=np.int32)
+    for sid in np.flatnonzero(REACHABLE & (WINNER == ONGOING)):
+        x_bits, o_bits = _ORDERED[sid]
+        x_turn = _popcount(x_bits) == _popcount(o_bits)
+        for cell in bb.EMPTY_CELLS[x_bits | o_bits]:
+            if x_turn:
+                child = (x_bits | bb.CELL_BITS[cell], o_bits)
+            else:
+                child = (x_bits, o_bits | bb.CELL_BITS[cell])
+            out[sid, cell] = CODE_TO_ID[_code(*child)]
+    return out
+
+
+#: Id of the canonical version of each state (the symmetric board with the
+#: lowest base-3 code), and the symmetry that maps the state onto it. Every
+#: canonical state maps onto itself with the identity (symmetry 0).
+CANONICAL_ID, CANONICAL_SYM = _canonical()
+
+#: State reached from each reachable state by the player to move claiming
+#: each cell. -1 for illegal moves and unreachable states. Shape (N_STATES, 9).
+NEXT_STATE: np.ndarray = _transitions()
+
+# Plain python mirrors of the tables for scalar lookups in the hot loop, where
+# indexing numpy arrays costs more than the lookup itself.
+
+#: Legal move indices of each state. These lists are shared: do not modify.
+LEGAL_MOVES: List[List[int]] = [
+    list(bb.EMPTY_CELLS[x | o]) if w == ONGOING else []
+    for x, o, w in zip(X_BITS.tolist(), O_BITS.tolist(), WINNER.tolist())
+]
+
+#: Per-state rows of NEXT_STATE.
+NEXT_STATE_LIST: List[List[int]] = NEXT_STATE.tolist()
+
+#: Result of each state as returned by 'Game.make_move'.
+WINNER_LIST: List[Optional[Literal["-", "X", "O"]]] = [
+    WINNER_MARKS[w] for w in WINNER.tolist()
+]
+
+#: Per-state entries of SWAP_ID.
+SWAP_ID_LIST: List[int] = SWAP_ID.tolist()
+
+#: Per-state entries of CANONICAL_ID and CANONICAL_SYM.
+CANONICAL_ID_LIST: List[int] = CANONICAL_ID.tolist()
+CANONICAL_SYM_LIST: List[int] = CANONICAL_SYM.tolist()
+
+#: Rows of SYMMETRIES and INVERSE_SYMMETRIES.
+SYMMETRIES_LIST: List[List[int]] = SYMMETRIES.tolist()
+INVERSE_SYMMETRIES_LIST: List[List[int]] = INVERSE_SYMMETRIES.tolist()
+
+del _ORDERED, _REACHABLE
+
+
+def view_id(state_id: int, mark: str) -> int:
+    """
+    Id of the board as seen by the player with the given mark, i.e. with the
+    player's own cells as '1' and the rival's as '2'.
+    :param state_id:
+    :param mark:
+    :return:
+    """
+    return state_id if mark == "X" else SWAP_ID_LIST[state_id]
@@ -0,0 +1,160 @@
+"""
+Tablebase of perfect play: the minimax score and the best move of every
+translated state (see 'BasePlayer.view_id'), solved once with retrograde
+analysis (see 'solver') and saved to a compact binary file.
+"""
+import os
+import numpy as np
+from pathlib import Path
+from typing import Dict, NamedTuple, Optional, Union
+
+from . import solver
+from . import state_space as ss
+from .constants import OUTPUTS_DIR
+
+#: Default location of the tablebase file.
+TABLEBASE_FILE: Path = OUTPUTS_DIR / "tablebase.ttb"
+
+MAGIC: bytes = b"TTT-TBAS"
+VERSION: int = 1
+
+#: Fixed-size header at the start of a tablebase file.
+HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("version", "<u4"),
+    ("n_states", "<u4"),
+])
+
+_CACHE: Dict[Optional[Path], "Tablebase"] = {}
+
+
+class Tablebase(NamedTuple):
+    """
+    Perfect play in every translated state, from the point of view of the
+    player to move. Both arrays are indexed by the id of the translated state.
+    """
+    scores: np.ndarray  #: Minimax score (see 'solver.solve'), int8
+    moves: np.ndarray  #: Best move, -1 if there is none, int8
+
+    def move_scores(self) -> np.ndarray:
+        """
+        Score of every move in every translated state, for the player making
+        it: minus the score of the state it leads to for the rival.
+        :return: Array of shape (N_STATES, 9) with -inf for illegal moves.
+        """
+        views = np.arange(ss.N_STATES)
+        x_turn = solver.X_TO_MOVE[views]
+        real = np.where(x_turn, views, ss.SWAP_ID[views])
+        children = ss.NEXT_STATE[real]
+        legal = children >= 0
+        children = np.maximum(children, 0)
+        child_views = np.where(
+            solver.X_TO_MOVE[children],
+            children,
+            ss.SWAP_ID[children]
+        )
+        scores = -self.scores[child_views].astype(np.float32)
+        scores[~legal] = -np.inf
+        # Boards that are not the view of a reachable position keep neutral
+        # scores for their legal moves.
+        unplayable = self.moves < 0
+        scores[unplayable] = np.where(ss.LEGAL_MASK[unplayable], 0.0, -np.inf)
+        return scores
+
+
+def build_tablebase() -> Tablebase:
+    """
+    Solve every position.
+    :return:
+    """
+    views = np.arange(ss.N_STATES)
+    moves = solver.optimal_moves().copy()
+    real = np.where(solver.X_TO_MOVE[views], views, ss.SWAP_ID[views])
+    scores = np.where(
+        ss.REACHABLE[real],
+        solver.view_scores(views),
+        0
+    ).astype(np.int8)
+    return Tablebase(scores=scores, moves=moves)
+
+
+def save_tablebase(tablebase: Tablebase, path: Union[str, Path] = TABLEBASE_FILE):
+    """
+    Save a tablebase: a small header, the state keys (9 ASCII bytes each) and
+    the scores and moves (a byte each), all in the order of the state table.
+    The file is replaced atomically.
+    :param tablebase:
+    :param path:
+    :return:
+    """
+    header = np.zeros((), dtype=HEADER_DTYPE)
+    header["magic"] = MAGIC
+    header["version"] = VERSION
+    header["n_states"] = ss.N_STATES
+
+    os.makedirs(Path(path).parent, exist_ok=True)
+    tmp_path = "%s.tmp" % path
+    with open(tmp_path, "wb") as f:
+        f.write(header.tobytes())
+        f.write(np.array(ss.STATE_KEYS, dtype="S9").tobytes())
+        f.write(tablebase.scores.astype(np.int8).tobytes())
+        f.write(tablebase.moves.astype(np.int8).tobytes())
+    os.replace(tmp_path, path)
+
+
+def read_tablebase(path: Union[str, Path]) -> Tablebase:
+    """
+    Read a tablebase file.
+    :param path:
+    :return:
+    """
+    header = np.fromfile(path, dtype=HEADER_DTYPE, count=1)
+    if header.shape[0] != 1 or header["magic"][0] != MAGIC:
+        raise ValueError("Not a tablebase file: '%s'" % path)
+    if header["version"][0] != VERSION:
+        raise ValueError("Unsupported tablebase format: '%s'" % path)
+
+    n_states = int(header["n_states"][0])
+    with open(path, "rb") as f:
+        f.seek(HEADER_DTYPE.itemsize)
+        keys = np.fromfile(f, dtype="S9", count=n_states)
+        scores = np.fromfile(f, dtype=np.int8, count=n_states)
+        moves = np.fromfile(f, dtype=np.int8, count=n_states)
+
+    expected = np.array(ss.STATE_KEYS, dtype="S9")
+    if not np.array_equal(keys, expected) or moves.shape[0] != n_states:
+        raise ValueError(
+            "Tablebase does not match the state table, rebuild it: '%s'" % path
+        )
+    return Tablebase(scores=scores, moves=moves)
+
+
+def load_tablebase(path: Optional[Union[str, Path]] = None) -> Tablebase:
+    """
+    Get the tablebase, reading each file only once per process.
+    :param path: Tablebase file. If None, the default file is read if it
+        exists, else the tablebase is solved in memory.
+    :return: Tablebase, with read-only arrays shared by all callers.
+    """
+    key = None if path is None else Path(path)
+    if key not in _CACHE:
+        if key is None and not TABLEBASE_FILE.is_file():
+            tablebase = build_tablebase()
+        else:
+            tablebase = read_tablebase(TABLEBASE_FILE if key is None else key)
+        for array in tablebase:
+            array.flags.writeable = False
+        _CACHE[key] = tablebase
+    return _CACHE[key]
+
+
+def write_tablebase(path: Union[str, Path] = TABLEBASE_FILE):
+    """
+    Solve every position and save the tablebase.
+    :param path:
+    :return:
+    """
+    tablebase = build_tablebase()
+    save_tablebase(tablebase, path)
+    playable = tablebase.moves >= 0
+    print("Solved %d positions, saved to '%s'" % (int(playable.sum()), path))
@@ -0,0 +1,277 @@
+"""
+Exact analysis of policies. Instead of sampling games, the probability of
+every outcome is computed by dynamic programming over the state table, from
+the last layer of positions to the first (see 'solver'), which is the
+memoized recursion over the game tree done one layer of positions at a time.
+
+Strategies are arrays of shape (N_STATES, 9) with the probability of each
+move in each translated state (see 'BasePlayer.view_id'), and zero for
+illegal moves.
+"""
+import json
+import numpy as np
+from pathlib import Path
+from typing import Union
+
+from .. import state_space as ss
+from ..solver import MARK_COUNTS, X_TO_MOVE
+from ..tablebase import load_tablebase
+from ..players.q_table import QTable
+from ..players.schemas import TabularPolicy
+from ..players.policy_io import load_tabular_policy
+from .schemas import OutcomeProbs, PolicyAnalysis
+
+#: Opponents the policies can be analysed against.
+OPPONENTS = ("random", "self", "perfect")
+
+#: Positions of each layer (number of marks) where some player has to move.
+_LAYERS = [
+    np.flatnonzero(
+        (MARK_COUNTS == marks) & ss.REACHABLE & (ss.WINNER == ss.ONGOING)
+    )
+    for marks in range(9)
+]
+
+
+def uniform_strategy() -> np.ndarray:
+    """
+    Strategy of a player that picks one of the legal moves at random.
+    :return:
+    """
+    legal = ss.LEGAL_MASK.astype(np.float64)
+    return legal / np.maximum(legal.sum(axis=1, keepdims=True), 1.0)
+
+
+def one_hot_strategy(moves: np.ndarray) -> np.ndarray:
+    """
+    Strategy that always plays the given move in each state.
+    :param moves: Move for each translated state, -1 where there is none.
+    :return:
+    """
+    probs = np.zeros((ss.N_STATES, 9))
+    has_move = moves >= 0
+    probs[np.flatnonzero(has_move), moves[has_move]] = 1.0
+    return probs
+
+
+def greedy_strategy(
+        table: QTable,
+        canonical: bool = False,
+        epsilon: float = 0.0) -> np.ndarray:
+    """
+    Strategy of an epsilon-greedy player with the given Q-values: the move
+    with the highest value (the first one on ties), except with probability
+    epsilon, when it picks one of the legal moves at random. This is how
+    'BaseLearnedPlayer.select_action_id' plays.
+    :param table:
+    :param canonical: Whether the table stores states in canonical form.
+    :param epsilon:
+    :return:
+    """
+    views = np.arange(ss.N_STATES)
+    if canonical:
+        sids, syms = ss.CANONICAL_ID, ss.CANONICAL_SYM
+    else:
+        sids, syms = views, np.zeros(ss.N_STATES, dtype=np.int8)
+
+    best = ss.SYMMETRIES[syms, np.argmax(table.values[sids], axis=1)]
+    best = np.where(ss.LEGAL_MASK.any(axis=1), best, -1)
+    return (
+        (1.0 - epsilon) * one_hot_strategy(best)
+        + epsilon * uniform_strategy()
+    )
+
+
+def policy_strategy(policy: TabularPolicy, epsilon: float = 0.0) -> np.ndarray:
+    """
+    Strategy of an epsilon-greedy player with a serialized policy.
+    :param policy:
+    :param epsilon:
+    :return:
+    """
+    table = QTable.from_policy(policy, canonical=policy.canonical)
+    return greedy_strategy(table, canonical=policy.canonical, epsilon=epsilon)
+
+
+def opponent_strategy(
+        opponent: str,
+        strategy: np.ndarray,
+        epsilon: float = 0.1) -> np.ndarray:
+    """
+    Strategy of a named opponent (see OPPONENTS).
+    :param opponent: 'random', 'perfect', or 'self' for the analysed
+        strategy mixed with random moves with probability epsilon.
+    :param strategy: Analysed strategy.
+    :param epsilon:
+    :return:
+    """
+    if opponent == "random":
+        return uniform_strategy()
+    if opponent == "perfect":
+        return one_hot_strategy(load_tablebase().moves)
+    if opponent == "self":
+        return (1.0 - epsilon) * strategy + epsilon * uniform_strategy()
+    raise KeyError("Unknown opponent '%s'" % opponent)
+
+
+def _terminal_outcomes() -> np.ndarray:
+    out = np.zeros((ss.N_STATES, 3))
+    out[ss.WINNER == ss.X_WINS, 0] = 1.0
+    out[ss.WINNER == ss.DRAW, 1] = 1.0
+    out[ss.WINNER == ss.O_WINS, 2] = 1.0
+    return out
+
+
+def _move_probs(layer: np.ndarray, strategy: np.ndarray, x_turn: np.ndarray) -> np.ndarray:
+    """
+    Move probabilities of a strategy in the given positions, for the player
+    to move in them.
+    """
+    views = np.where(x_turn, layer, ss.SWAP_ID[layer])
+    return np.where(ss.NEXT_STATE[layer] >= 0, strategy[views], 0.0)
+
+
+def outcome_probs(x_strategy: np.ndarray, o_strategy: np.ndarray) -> np.ndarray:
+    """
+    Probabilities of the outcomes of a game from every position, when 'X'
+    and 'O' play the given strategies.
+    :param x_strategy:
+    :param o_strategy:
+    :return: Array of shape (N_STATES, 3) with the probabilities of an 'X'
+        win, a draw and an 'O' win. Only meaningful for reachable states.
+    """
+    out = _terminal_outcomes()
+    for layer in reversed(_LAYERS):
+        x_turn = X_TO_MOVE[layer]
+        probs = np.where(
+            x_turn[:, None],
+            _move_probs(layer, x_strategy, x_turn),
+            _move_probs(layer, o_strategy, x_turn)
+        )
+        children = out[np.maximum(ss.NEXT_STATE[layer], 0)]
+        out[layer] = np.einsum("na,nak->nk", probs, children)
+    return out
+
+
+def best_response_outcomes(strategy: np.ndarray, as_x: bool) -> np.ndarray:
+    """
+    Probabilities of the outcomes of a game from every position, when one
+    player plays the given strategy and the rival responds with the moves that
+    maximize its expected score (1 for a win, 0.5 for a draw).
+    :param strategy:
+    :param as_x: Whether the strategy plays 'X'.
+    :return: Array of shape (N_STATES, 3), as in 'outcome_probs'.
+    """
+    # Expected score of the responder for each outcome (X win, draw, O win).
+    responder_points = np.array([0.0, 0.5, 1.0] if as_x else [1.0, 0.5, 0.0])
+    out = _terminal_outcomes()
+    for layer in reversed(_LAYERS):
+        x_turn = X_TO_MOVE[layer]
+        next_ids = ss.NEXT_STATE[layer]
+        children = out[np.maximum(next_ids, 0)]
+
+        fixed = x_turn == as_x
+        expected = np.einsum(
+            "na,nak->nk",
+            _move_probs(layer, strategy, x_turn),
+            children
+        )
+
+        points = np.where(next_ids >= 0, children @ responder_points, -np.inf)
+        best = np.argmax(points, axis=1)
+        responded = children[np.arange(layer.shape[0]), best]
+
+        out[layer] = np.where(fixed[:, None], expected, responded)
+    return out
+
+
+def _seat_results(outcomes: np.ndarray, as_x: bool) -> OutcomeProbs:
+    x_win, draw, o_win = outcomes[ss.EMPTY_ID].tolist()
+    return OutcomeProbs(
+        win=x_win if as_x else o_win,
+        draw=draw,
+        loss=o_win if as_x else x_win,
+    )
+
+
+def _mean_results(first: OutcomeProbs, second: OutcomeProbs) -> OutcomeProbs:
+    return OutcomeProbs(
+        win=(first.win + second.win) / 2,
+        draw=(first.draw + second.draw) / 2,
+        loss=(first.loss + second.loss) / 2,
+    )
+
+
+def analyze_strategy(
+        strategy: np.ndarray,
+        opponent: str = "random",
+        epsilon: float = 0.1) -> PolicyAnalysis:
+    """
+    Exact results of a strategy against an opponent, playing each mark half
+    of the time, and against its best response.
+    :param strategy:
+    :param opponent: See 'opponent_strategy'.
+    :param epsilon: Exploration of the 'self' opponent.
+    :return:
+    """
+    rival = opponent_strategy(opponent, strategy, epsilon)
+    as_x = _seat_results(outcome_probs(strategy, rival), as_x=True)
+    as_o = _seat_results(outcome_probs(rival, strategy), as_x=False)
+
+    best_response = _mean_results(
+        _seat_results(best_response_outcomes(strategy, as_x=True), as_x=True),
+        _seat_results(best_response_outcomes(strategy, as_x=False), as_x=False),
+    )
+    return PolicyAnalysis(
+        opponent=opponent,
+        as_x=as_x,
+        as_o=as_o,
+        overall=_mean_results(as_x, as_o),
+        best_response=best_response,
+        # Perfect play draws, so a perfect policy scores 0.5 against its
+        # best response.
+        exploitability=0.5 - best_response.score,
+    )
+
+
+def analyze_policy(
+        policy: TabularPolicy,
+        opponent: str = "random",
+        epsilon: float = 0.0,
+        opponent_epsilon: float = 0.1) -> PolicyAnalysis:
+    """
+    Exact results of an epsilon-greedy player with a serialized policy
+    against an opponent and against its best response.
+    :param policy:
+    :param opponent: See 'opponent_strategy'.
+    :param epsilon: Exploration of the analysed player.
+    :param opponent_epsilon: Exploration of the 'self' opponent.
+    :return:
+    """
+    return analyze_strategy(
+        policy_strategy(policy, epsilon),
+        opponent=opponent,
+        epsilon=opponent_epsilon
+    )
+
+
+def analyze_policy_file(
+        policy_file: Union[str, Path],
+        opponent: str = "random",
+        epsilon: float = 0.0,
+        opponent_epsilon: float = 0.1):
+    """
+    Print the exact analysis of a policy file (see 'analyze_policy').
+    :param policy_file: JSON or binary policy file.
+    :param opponent:
+    :param epsilon:
+    :param opponent_epsilon:
+    :return:
+    """
+    analysis = analyze_policy(
+        load_tabular_policy(policy_file),
+        opponent=opponent,
+        epsilon=epsilon,
+        opponent_epsilon=opponent_epsilon
+    )
+    print(json.dumps(analysis.model_dump(), indent=2))
@@ -0,0 +1,239 @@
+"""
+Training checkpoints: everything needed to continue an interrupted training
+run exactly where it left off. A checkpoint holds the players' Q-values,
+random number generator states and replay buffers, the number of episodes
+played (which is also the length of the run's episode log at that point), the
+evaluations of the run so far and, for vectorized runs, the state of the games
+in progress.
+
+Checkpoints are saved on a background thread, so training does not stall
+while they are written, and atomically, so a crash while writing one leaves
+the previous checkpoint in place.
+"""
+import os
+import time
+import pickle
+import numpy as np
+from pathlib import Path
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, NamedTuple, Optional, Union
+
+from ..players import BasePlayer
+from ..random_stream import RandomStream
+from .monitor import EvalMonitor
+from ..players.learned_base import BaseLearnedPlayer
+
+#: Name of the checkpoint in a run's output folder.
+CHECKPOINT_FILE: str = "checkpoint.pkl"
+
+
+class Checkpoint(NamedTuple):
+    """
+    State of a training run after a number of episodes.
+    """
+    episodes_done: int  #: Episodes played and written to the episode log
+    agent_values: np.ndarray  #: Q-values of the agent
+    agent_visited: np.ndarray  #: Visited states of the agent
+    agent_canonical: bool  #: Whether the agent stores canonical states
+    rival_values: Optional[np.ndarray]  #: Q-values of a learned rival
+    rival_visited: Optional[np.ndarray]  #: Visited states of a learned rival
+    rival_canonical: bool  #: Whether a learned rival stores canonical states
+    rng_states: Dict[str, Any]  #: 'agent', 'rival' and 'seats' generators
+    run_state: Optional[Dict[str, Any]]  #: Games in progress of vectorized runs
+    replay_states: Optional[Dict[str, Any]] = None  #: Players' replay buffers
+    monitor_state: Optional[Dict[str, Any]] = None  #: State of the evaluations
+
+
+def take_checkpoint(
+        agent: BaseLearnedPlayer,
+        rival: BasePlayer,
+        episodes_done: int,
+        seats: Optional[RandomStream] = None,
+        run_state: Optional[Dict[str, Any]] = None,
+        monitor: Optional[EvalMonitor] = None) -> Checkpoint:
+    """
+    Copy the state of a training run, so it can be written while the run goes
+    on.
+    :param agent:
+    :param rival:
+    :param episodes_done:
+    :param seats: Random stream for the assignment of marks of sequential
+        runs.
+    :param run_state: State of the games in progress of a vectorized run.
+    :param monitor: Evaluations of the run, if it is evaluated.
+    :return:
+    """
+    learned_rival = isinstance(rival, BaseLearnedPlayer)
+    return Checkpoint(
+        episodes_done=episodes_done,
+        agent_values=agent.agent_q_vals.values.copy(),
+        agent_visited=agent.agent_q_vals.visited.copy(),
+        agent_canonical=agent.canonical,
+        rival_values=rival.agent_q_vals.values.copy() if learned_rival else None,
+        rival_visited=rival.agent_q_vals.visited.copy() if learned_rival else None,
+        rival_canonical=learned_rival and rival.canonical,
+        rng_states={
+            "agent": agent.get_rng_state(),
+            "rival": rival.get_rng_state(),
+            "seats": None if seats is None else seats.get_state(),
+        },
+        run_state=run_state,
+        replay_states={
+            "agent": _replay_state(agent),
+            "rival": _replay_state(rival),
+        },
+        monitor_state=None if monitor is None else monitor.get_state(),
+    )
+
+
+def _replay_state(player: BasePlayer) -> Optional[Dict[str, Any]]:
+    replay = getattr(player, "replay", None)
+    return None if replay is None else replay.get_state()
+
+
+def restore_players(
+        checkpoint: Checkpoint,
+        agent: BaseLearnedPlayer,
+        rival: BasePlayer):
+    """
+    Restore the Q-values, random streams and replay buffers of the players
+    of a run from a checkpoint. The players must store states in the same form as the
+    checkpointed ones.
+    :param checkpoint:
+    :param agent:
+    :param rival:
+    :return:
+    """
+    agent.agent_q_vals.values[:] = checkpoint.agent_values
+    agent.agent_q_vals.visited[:] = checkpoint.agent_visited
+    if checkpoint.rival_values is not None:
+        rival.agent_q_vals.values[:] = checkpoint.rival_values
+        rival.agent_q_vals.visited[:] = checkpoint.rival_visited
+
+    agent.set_rng_state(checkpoint.rng_states["agent"])
+    rival.set_rng_state(checkpoint.rng_states["rival"])
+
+    replay_states = checkpoint.replay_states or {}
+    for key, player in (("agent", agent), ("rival", rival)):
+        if replay_states.get(key) is not None:
+            player.replay.set_state(replay_states[key])
+
+
+def save_checkpoint(checkpoint: Checkpoint, path: Union[str, Path]):
+    """
+    Write a checkpoint atomically: to a temporary file that replaces the
+    previous checkpoint once it is on disk.
+    :param checkpoint:
+    :param path:
+    :return:
+    """
+    tmp_path = "%s.tmp" % path
+    with open(tmp_path, "wb") as f:
+        pickle.dump(checkpoint, f, protocol=pickle.HIGHEST_PROTOCOL)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_checkpoint(folder: Union[str, Path]) -> Checkpoint:
+    """
+    Load the checkpoint of a training run.
+    :param folder: Output folder of the run.
+    :return:
+    """
+    path = Path(folder) / CHECKPOINT_FILE
+    if not path.is_file():
+        raise FileNotFoundError("No checkpoint found for the run")
+
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+class Checkpointer:
+    """
+    Decides when a training run is due for a checkpoint, every so many
+    episodes and / or seconds, and saves checkpoints on a background thread.
+    """
+
+    def __init__(
+            self,
+            folder: Union[str, Path],
+            every_episodes: Optional[int] = None,
+            every_seconds: Optional[float] = None,
+            episodes_done: int = 0):
+        """
+        :param folder: Output folder of the run.
+        :param every_episodes: Take a checkpoint every this many episodes.
+        :param every_seconds: Take a checkpoint every this many seconds.
+        :param episodes_done: Episodes played before the first checkpoint,
+            for resumed runs.
+        """
+        if every_episodes is None and every_seconds is None:
+            raise ValueError("Need a checkpoint frequency!")
+
+        self.__path = Path(folder) / CHECKPOINT_FILE
+        self.__every_episodes = every_episodes
+        self.__every_seconds = every_seconds
+        self.__last_episodes = episodes_done
+        self.__last_time = time.monotonic()
+        self.__executor = ThreadPoolExecutor(max_workers=1)
+        self.__pending: Optional[Future] = None
+
+    @property
+    def path(self) -> Path:
+        """
+        Path of the checkpoint file.
+        """
+        return self.__path
+
+    def due(self, episodes_done: int) -> bool:
+        """
+        Whether the run is due for a checkpoint.
+        :param episodes_done: Episodes played so far.
+        :return:
+        """
+        if (self.__every_episodes is not None
+                and episodes_done - self.__last_episodes >= self.__every_episodes):
+            return True
+        return (self.__every_seconds is not None
+                and time.monotonic() - self.__last_time >= self.__every_seconds)
+
+    def save(self, checkpoint: Checkpoint):
+        """
+        Save a checkpoint in the background. Waits for the previous one to be
+        written first, so checkpoints are written in order.
+        :param checkpoint: A copy of the run state (see 'take_checkpoint').
+        :return:
+        """
+        self.wait()
+        self.__last_episodes = checkpoint.episodes_done
+        self.__last_time = time.monotonic()
+        self.__pending = self.__executor.submit(
+            save_checkpoint,
+            checkpoint,
+            self.__path
+        )
+
+    def wait(self):
+        """
+        Wait for the checkpoint being written, if any. Errors while writing
+        it are raised here.
+        """
+        if self.__pending is not None:
+            pending, self.__pending = self.__pending, None
+            pending.result()
+
+    def close(self):
+        """
+        Wait for the last checkpoint and stop the background thread.
+        """
+        try:
+            self.wait()
+        finally:
+            self.__executor.shutdown()
+
+    def __enter__(self) -> "Checkpointer":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
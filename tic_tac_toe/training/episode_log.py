@@ -0,0 +1,388 @@
+"""
+Episode logs: the results of the episodes of a training run, streamed to disk
+in buffered chunks while the run goes on, so they never need to be held in
+memory all at once.
+
+Logs are stored by column, as raw little-endian arrays in a folder with one
+file per column:
+
+- 'winner.bin': winner code of each episode (see 'state_space.WINNER'), int8.
+- 'agent_mark.bin': mark of the agent, 1 for 'X' and 2 for 'O', int8.
+- 'end_board.bin': final board packed as the 'X' bitboard in bits 0-8 and
+  the 'O' bitboard in bits 9-17, uint32.
+
+The class names of the players are stored once, in the run summary. Columns
+can be appended to, and are memory mapped when loaded.
+
+The training loop records episodes as plain tuples of integers (see
+'EpisodeRecord'), which are only checked, a chunk at a time, when they are
+written. Episode summaries are built and validated when episodes are loaded.
+"""
+import os
+import numpy as np
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Union
+
+from .. import state_space as ss
+from .. import bitboard as bb
+from ..vec_game import X_MARK, O_MARK
+from .schemas import EpisodeSummary, TrainSummary
+
+#: Name of the episode log in a run's output folder.
+EPISODES_DIR: str = "episodes"
+
+#: Column name -> data type.
+COLUMNS: Dict[str, np.dtype] = {
+    "winner": np.dtype("i1"),
+    "agent_mark": np.dtype("i1"),
+    "end_board": np.dtype("<u4"),
+}
+
+
+class EpisodeColumns(NamedTuple):
+    """
+    Results of a sequence of episodes, by column.
+    """
+    winner: np.ndarray  #: Winner code of each episode
+    agent_mark: np.ndarray  #: Mark of the agent, 1 for 'X' and 2 for 'O'
+    end_board: np.ndarray  #: Packed final board (see 'pack_boards')
+
+    def __len__(self) -> int:
+        return self.winner.shape[0]
+
+
+class EpisodeRecord(NamedTuple):
+    """
+    Result of a single episode, as recorded by the training loop.
+    """
+    winner: int  #: Winner code (see 'state_space.WINNER')
+    agent_mark: int  #: Mark of the agent, 1 for 'X' and 2 for 'O'
+    end_id: int  #: Id of the final state
+
+    def to_summary(self, agent_class: str, rival_class: str) -> EpisodeSummary:
+        """
+        Validated summary of the episode.
+        :param agent_class: Class name of the agent.
+        :param rival_class: Class name of the rival.
+        :return:
+        """
+        agent_x = self.agent_mark == X_MARK
+        return EpisodeSummary(
+            agent_mark="X" if agent_x else "O",
+            winner=ss.WINNER_MARKS[self.winner],
+            end_board=ss.BOARDS[self.end_id],
+            x_player_type=agent_class if agent_x else rival_class,
+            o_player_type=rival_class if agent_x else agent_class,
+        )
+
+
+def check_episodes(
+        end_ids: np.ndarray,
+        winners: np.ndarray,
+        agent_marks: np.ndarray):
+    """
+    Check that a batch of episode results is consistent: every final state is
+    a finished game with the given winner, and every mark is 'X' or 'O'.
+    :param end_ids:
+    :param winners:
+    :param agent_marks:
+    :raises ValueError: If any of the episodes is not valid.
+    """
+    end_ids = np.asarray(end_ids)
+    if np.any((end_ids < 0) | (end_ids >= ss.N_STATES)):
+        raise ValueError("Episode with an unknown final state")
+
+    winners = np.asarray(winners)
+    if np.any(winners != ss.WINNER[end_ids]) or np.any(winners == ss.ONGOING):
+        raise ValueError("Episode with a winner that does not match its board")
+
+    agent_marks = np.asarray(agent_marks)
+    if np.any((agent_marks != X_MARK) & (agent_marks != O_MARK)):
+        raise ValueError("Episode with an invalid agent mark")
+
+
+def pack_boards(state_ids: np.ndarray) -> np.ndarray:
+    """
+    Pack the boards of the given states into 18-bit integers.
+    :param state_ids:
+    :return:
+    """
+    x_bits = ss.X_BITS[state_ids].astype(np.uint32)
+    o_bits = ss.O_BITS[state_ids].astype(np.uint32)
+    return x_bits | (o_bits << 9)
+
+
+def unpack_board(packed: int) -> str:
+    """
+    Board string of a packed board.
+    :param packed:
+    :return:
+    """
+    return bb.to_string(packed & bb.FULL_BOARD, packed >> 9)
+
+
+class EpisodeWriter:
+    """
+    Appends episode results to a columnar episode log. Episodes are buffered
+    and written in chunks.
+    """
+
+    def __init__(
+            self,
+            folder: Union[str, Path],
+            chunk_size: int = 65536,
+            append: bool = False,
+            keep: Optional[int] = None):
+        """
+        :param folder: Folder of the log. Created if it does not exist.
+        :param chunk_size: Number of episodes to buffer before writing them.
+        :param append: Append to an existing log instead of replacing it.
+        :param keep: If given, drop the episodes of the existing log after
+            the first 'keep' and append after them, e.g. to resume a run from
+            a checkpoint.
+        """
+        folder = Path(folder)
+        os.makedirs(folder, exist_ok=True)
+        if keep is not None:
+            append = True
+            for name, dtype in COLUMNS.items():
+                path = folder / (name + ".bin")
+                size = os.path.getsize(path) if path.is_file() else 0
+                if size < keep * dtype.itemsize:
+                    raise ValueError("Episode log is shorter than %d episodes" % keep)
+                if path.is_file():
+                    # Missing columns (keep = 0) are created when opened.
+                    os.truncate(path, keep * dtype.itemsize)
+
+        self.__files = {
+            name: open(folder / (name + ".bin"), "ab" if append else "wb")
+            for name in COLUMNS
+        }
+        self.__chunk_size = max(1, chunk_size)
+        self.__buffers: Dict[str, List[np.ndarray]] = {n: [] for n in COLUMNS}
+        self.__records: List[EpisodeRecord] = []
+        self.__buffered = 0
+        self.__count = 0
+
+    @property
+    def count(self) -> int:
+        """
+        Number of episodes written (or buffered) by this writer.
+        """
+        return self.__count
+
+    def write_columns(self, columns: EpisodeColumns):
+        """
+        Add a sequence of episodes, given by column, to the log.
+        :param columns:
+        """
+        self.__add_records()
+        for name, dtype in COLUMNS.items():
+            self.__buffers[name].append(getattr(columns, name).astype(dtype))
+        self.__buffered += len(columns)
+        self.__count += len(columns)
+        if self.__buffered >= self.__chunk_size:
+            self.flush()
+
+    def write_batch(
+            self,
+            end_ids: np.ndarray,
+            winners: np.ndarray,
+            agent_marks: np.ndarray):
+        """
+        Add a batch of episodes to the log.
+        :param end_ids: Id of the final state of each episode.
+        :param winners: Winner code of each episode.
+        :param agent_marks: Mark of the agent in each episode (1 for 'X', 2
+            for 'O').
+        :raises ValueError: If any of the episodes is not valid.
+        """
+        check_episodes(end_ids, winners, agent_marks)
+        self.write_columns(EpisodeColumns(
+            winner=winners,
+            agent_mark=agent_marks,
+            end_board=pack_boards(end_ids),
+        ))
+
+    def write_record(self, record: EpisodeRecord):
+        """
+        Add an episode recorded by the training loop to the log. Records are
+        checked when the buffer is written (see 'check_episodes').
+        :param record:
+        """
+        self.__records.append(record)
+        self.__count += 1
+        self.__buffered += 1
+        if self.__buffered >= self.__chunk_size:
+            self.flush()
+
+    def write(self, episode: EpisodeSummary):
+        """
+        Add an episode to the log.
+        :param episode:
+        """
+        self.write_record(EpisodeRecord(
+            winner=ss.WINNER_MARKS.index(episode.winner),
+            agent_mark=X_MARK if episode.agent_mark == "X" else O_MARK,
+            end_id=ss.BOARD_TO_ID[episode.end_board],
+        ))
+
+    def extend(self, episodes: Iterable[EpisodeSummary]):
+        """
+        Add several episodes to the log.
+        :param episodes:
+        """
+        for episode in episodes:
+            self.write(episode)
+
+    def flush(self):
+        """
+        Write the buffered episodes to disk.
+        """
+        self.__add_records()
+        for name, f in self.__files.items():
+            if self.__buffers[name]:
+                f.write(np.concatenate(self.__buffers[name]).tobytes())
+                self.__buffers[name] = []
+            f.flush()
+        self.__buffered = 0
+
+    def __add_records(self):
+        """
+        Move the buffered records to the column buffers, checking them.
+        """
+        if not self.__records:
+            return
+
+        winners, marks, end_ids = np.array(self.__records, dtype=np.int64).T
+        self.__records = []
+        check_episodes(end_ids, winners, marks)
+        for name, values in (
+                ("winner", winners),
+                ("agent_mark", marks),
+                ("end_board", pack_boards(end_ids))):
+            self.__buffers[name].append(values.astype(COLUMNS[name]))
+
+    def close(self):
+        """
+        Flush the buffer and close the files.
+        """
+        if self.__files and not next(iter(self.__files.values())).closed:
+            self.flush()
+            for f in self.__files.values():
+                f.close()
+
+    def __enter__(self) -> "EpisodeWriter":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def load_episodes(folder: Union[str, Path], mmap: bool = True) -> EpisodeColumns:
+    """
+    Load a columnar episode log. If the run was interrupted half way through
+    writing a chunk, only the episodes with all of their columns are loaded.
+    :param folder:
+    :param mmap: Memory map the columns instead of reading them.
+    :return:
+    """
+    folder = Path(folder)
+    sizes = {
+        name: os.path.getsize(folder / (name + ".bin")) // dtype.itemsize
+        for name, dtype in COLUMNS.items()
+    }
+    n = min(sizes.values())
+
+    columns = {}
+    for name, dtype in COLUMNS.items():
+        path = folder / (name + ".bin")
+        if n == 0:
+            columns[name] = np.zeros(0, dtype=dtype)
+        elif mmap:
+            columns[name] = np.memmap(path, dtype=dtype, mode="r", shape=(n,))
+        else:
+            columns[name] = np.fromfile(path, dtype=dtype, count=n)
+    return EpisodeColumns(**columns)
+
+
+def concat_logs(
+        parts: Sequence[Union[str, Path]],
+        folder: Union[str, Path],
+        chunk_size: int = 1 << 20):
+    """
+    Concatenate several columnar episode logs into a new one, a chunk at a
+    time.
+    :param parts:
+    :param folder:
+    :param chunk_size:
+    :return:
+    """
+    with EpisodeWriter(folder, chunk_size=chunk_size) as writer:
+        for part in parts:
+            columns = load_episodes(part)
+            for start in range(0, len(columns), chunk_size):
+                writer.write_columns(EpisodeColumns(
+                    *(c[start:start + chunk_size] for c in columns)
+                ))
+
+
+def to_columns(episodes: Iterable[EpisodeSummary]) -> EpisodeColumns:
+    """
+    Convert episode summaries to columns.
+    :param episodes:
+    :return:
+    """
+    winners, marks, boards = [], [], []
+    for ep in episodes:
+        winners.append(ss.WINNER_MARKS.index(ep.winner))
+        marks.append(X_MARK if ep.agent_mark == "X" else O_MARK)
+        boards.append(
+            bb.from_string(ep.end_board, "X")
+            | (bb.from_string(ep.end_board, "O") << 9)
+        )
+    return EpisodeColumns(
+        winner=np.array(winners, dtype=COLUMNS["winner"]),
+        agent_mark=np.array(marks, dtype=COLUMNS["agent_mark"]),
+        end_board=np.array(boards, dtype=COLUMNS["end_board"]),
+    )
+
+
+def iter_episodes(
+        columns: EpisodeColumns,
+        agent_class: str,
+        rival_class: str) -> Iterator[EpisodeSummary]:
+    """
+    Iterate over the episodes of a columnar log as episode summaries.
+    :param columns:
+    :param agent_class: Class name of the agent.
+    :param rival_class: Class name of the rival.
+    :return:
+    """
+    for winner, mark, board in zip(
+            columns.winner.tolist(),
+            columns.agent_mark.tolist(),
+            columns.end_board.tolist()):
+        end_id = ss.BOARD_TO_ID[unpack_board(board)]
+        yield EpisodeRecord(winner, mark, end_id).to_summary(
+            agent_class,
+            rival_class
+        )
+
+
+def load_run_episodes(
+        run_folder: Union[str, Path],
+        summary: TrainSummary,
+        mmap: bool = True) -> EpisodeColumns:
+    """
+    Load the episodes of a training run by column, from its episode log or,
+    for runs saved before episode logs, from its summary.
+    :param run_folder: Output folder of the run.
+    :param summary: Summary of the run.
+    :param mmap: Memory map columnar logs.
+    :return:
+    """
+    if summary.episodes_file is None:
+        return to_columns(summary.episodes)
+
+    return load_episodes(Path(run_folder) / summary.episodes_file, mmap=mmap)
@@ -0,0 +1,121 @@
+import numpy as np
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .. import state_space as ss
+from ..players import BasePlayer
+from ..schemas import GameSettings
+from ..tablebase import load_tablebase
+from ..players.random import RandomPlayer
+from ..players.compiled import CompiledPlayer
+from ..vec_game import VecGame, X_MARK, O_MARK
+from .schemas import EvaluationResult
+
+#: Benchmark opponents: name -> function of a random seed that builds the
+#: opponent.
+BENCHMARKS: Dict[str, Callable[[int], BasePlayer]] = {
+    "random": lambda seed: RandomPlayer("O", random_seed=seed),
+    "perfect": lambda seed: CompiledPlayer("O", load_tablebase().moves),
+}
+
+#: Benchmark opponents that always play the same moves.
+DETERMINISTIC_BENCHMARKS: Tuple[str, ...] = ("perfect",)
+
+
+def play_matches(
+        player: BasePlayer,
+        opponent: BasePlayer,
+        n_games: int,
+        game_settings: Optional[GameSettings] = None) -> EvaluationResult:
+    """
+    Play a batch of games between two players, all at once on a vectorized
+    environment. The player plays half of the games as 'X' and half as 'O'.
+    Both players must support batched play (see 'BasePlayer.select_actions').
+    :param player: Player being evaluated.
+    :param opponent:
+    :param n_games:
+    :param game_settings:
+    :return: Results from the player's point of view.
+    """
+    if game_settings is None:
+        game_settings = GameSettings()
+
+    vec = VecGame(n_games, game_settings, auto_reset=False)
+    player_marks = np.where(np.arange(n_games) % 2 == 0, X_MARK, O_MARK)
+
+    while np.any(vec.active):
+        moves = np.zeros(n_games, dtype=np.int64)
+        player_turn = vec.next_turn == player_marks
+        for who, turn in ((player, player_turn), (opponent, ~player_turn)):
+            idx = np.flatnonzero(vec.active & turn)
+            if idx.size == 0:
+                continue
+
+            views = vec.state_ids[idx]
+            as_o = vec.next_turn[idx] == O_MARK
+            views[as_o] = ss.SWAP_ID[views[as_o]]
+            moves[idx] = who.select_actions(views)
+
+        result = vec.step(moves)
+        vec.deactivate(result.done)
+
+    winners = ss.WINNER[vec.state_ids]
+    player_won = np.where(player_marks == X_MARK, ss.X_WINS, ss.O_WINS)
+    player_lost = np.where(player_marks == X_MARK, ss.O_WINS, ss.X_WINS)
+    return EvaluationResult(
+        games=n_games,
+        wins=int(np.count_nonzero(winners == player_won)),
+        draws=int(np.count_nonzero(winners == ss.DRAW)),
+        losses=int(np.count_nonzero(winners == player_lost)),
+    )
+
+
+def evaluate_vs_random(
+        player: BasePlayer,
+        n_games: int,
+        game_settings: Optional[GameSettings] = None,
+        random_seed: int = 0) -> EvaluationResult:
+    """
+    Evaluate a player against a seeded random player.
+    :param player:
+    :param n_games:
+    :param game_settings:
+    :param random_seed:
+    :return:
+    """
+    rival = RandomPlayer("O", random_seed=random_seed)
+    return play_matches(player, rival, n_games, game_settings)
+
+
+def evaluate_benchmarks(
+        player: BasePlayer,
+        benchmarks: List[str],
+        n_games: int,
+        game_settings: Optional[GameSettings] = None,
+        random_seed: int = 0,
+        deterministic: bool = False) -> Dict[str, EvaluationResult]:
+    """
+    Evaluate a player against several benchmark opponents.
+    :param player:
+    :param benchmarks: Names of the opponents (see 'BENCHMARKS').
+    :param n_games: Games against each opponent.
+    :param game_settings:
+    :param random_seed:
+    :param deterministic: Whether the player always plays the same moves
+        (e.g. a compiled greedy policy). If so, the games against
+        deterministic benchmarks would all repeat, and only one is played
+        from each seat.
+    :return: Opponent name -> results.
+    """
+    for name in benchmarks:
+        if name not in BENCHMARKS:
+            raise KeyError("Unknown benchmark '%s'" % name)
+
+    return {
+        name: play_matches(
+            player,
+            BENCHMARKS[name](random_seed),
+            2 if deterministic and name in DETERMINISTIC_BENCHMARKS else n_games,
+            game_settings
+        )
+        for name in benchmarks
+    }
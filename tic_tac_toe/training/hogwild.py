@@ -0,0 +1,252 @@
+"""
+Multi-process training in the style of Hogwild: every worker process plays its
+own episodes and updates a Q-table held in shared memory, without locks. TD
+updates touch a single (state, action) entry each, so concurrent updates
+rarely collide, and a lost update now and then does not hurt learning.
+"""
+import shutil
+import numpy as np
+import multiprocessing as mp
+from pathlib import Path
+from multiprocessing.shared_memory import SharedMemory
+from typing import NamedTuple, Optional, Tuple
+
+from .. import state_space as ss
+from ..schemas import GameSettings
+from ..players.q_table import QTable
+from ..players.random import random_rival
+from ..random_stream import stream_seed
+from ..players.schemas import TDSettings
+from .episode_log import EpisodeWriter, concat_logs
+from ..players.learn_types import PLAYER_TYPES, BaseLearnedPlayer
+
+_VALUES_BYTES: int = ss.N_STATES * 9 * np.dtype(np.float32).itemsize
+
+#: Key of the workers' seeds, derived from a run's seed (see
+#: 'random_stream.stream_seed').
+WORKER_STREAM: int = 4
+
+
+def _table_over(shm: SharedMemory, default_q: float) -> QTable:
+    """
+    Q-table whose arrays live in the given shared memory block.
+    """
+    values = np.ndarray(
+        (ss.N_STATES, 9),
+        dtype=np.float32,
+        buffer=shm.buf[:_VALUES_BYTES]
+    )
+    visited = np.ndarray(
+        (ss.N_STATES,),
+        dtype=bool,
+        buffer=shm.buf[_VALUES_BYTES:_VALUES_BYTES + ss.N_STATES]
+    )
+    return QTable(default_q, values=values, visited=visited)
+
+
+def share_q_table(table: QTable) -> Tuple[QTable, SharedMemory]:
+    """
+    Copy a Q-table into a new shared memory block. The caller must close and
+    unlink the block when done with it.
+    :param table:
+    :return: Table over the shared memory, shared memory block.
+    """
+    shm = SharedMemory(create=True, size=_VALUES_BYTES + ss.N_STATES)
+    shared = _table_over(shm, table.default_q)
+    shared.values[:] = table.values
+    shared.visited[:] = table.visited
+    return shared, shm
+
+
+def attach_q_table(name: str, default_q: float) -> Tuple[QTable, SharedMemory]:
+    """
+    Attach to a Q-table shared with 'share_q_table'. The caller must close
+    the block when done with it.
+    :param name: Name of the shared memory block.
+    :param default_q:
+    :return: Table over the shared memory, shared memory block.
+    """
+    shm = SharedMemory(name=name)
+    return _table_over(shm, default_q), shm
+
+
+class WorkerTask(NamedTuple):
+    """
+    Work assigned to a training worker.
+    """
+    worker_id: int
+    episodes: int
+    seed: int
+    game_settings: GameSettings
+    agent_type: str
+    td_settings: TDSettings
+    table_name: str
+    rival_type: str
+    rival_td_settings: Optional[TDSettings]
+    rival_table_name: Optional[str]
+    episodes_file: Path
+    n_envs: Optional[int]
+
+
+def _run_worker(task: WorkerTask):
+    """
+    Play a worker's share of the episodes, updating the shared tables, and
+    write them to the worker's own episode log.
+    """
+    # Imported here to avoid a circular import with 'train_agent'.
+    from .train_agent import play_episodes
+
+    blocks = []
+    table, shm = attach_q_table(task.table_name, task.td_settings.default_q)
+    blocks.append(shm)
+    agent = PLAYER_TYPES[task.agent_type](
+        mark="X",
+        settings=task.td_settings,
+        agent_q_vals=table
+    )
+
+    if task.rival_table_name is None:
+        rival = random_rival(task.seed)
+    else:
+        table, shm = attach_q_table(
+            task.rival_table_name,
+            task.rival_td_settings.default_q
+        )
+        blocks.append(shm)
+        rival = PLAYER_TYPES[task.rival_type](
+            mark="O",
+            settings=task.rival_td_settings,
+            agent_q_vals=table
+        )
+
+    with EpisodeWriter(task.episodes_file) as writer:
+        play_episodes(
+            game_settings=task.game_settings,
+            agent=agent,
+            rival=rival,
+            total_episodes=task.episodes,
+            writer=writer,
+            n_envs=task.n_envs,
+            random_seed=task.seed,
+            show_progress=task.worker_id == 0,
+        )
+
+    # The players' arrays must be released before closing the blocks.
+    del agent, rival, table
+    for shm in blocks:
+        shm.close()
+
+
+def _part_file(episodes_file: Path, worker_id: int) -> Path:
+    return episodes_file.with_name("%s.part%d" % (episodes_file.name, worker_id))
+
+
+def worker_seed(seed: int, worker_id: int) -> int:
+    """
+    Seed of a worker, derived from the run's seed so that the streams of the
+    workers of different runs do not overlap either.
+    :param seed:
+    :param worker_id:
+    :return:
+    """
+    return int(stream_seed(seed, WORKER_STREAM, worker_id).generate_state(1)[0])
+
+
+def _worker_settings(
+        settings: TDSettings,
+        canonical: bool,
+        worker_id: int) -> TDSettings:
+    return settings.model_copy(update={
+        "canonicalize": canonical,
+        "random_seed": worker_seed(settings.random_seed, worker_id),
+    })
+
+
+def run_hogwild(
+        game_settings: GameSettings,
+        agent_type: str,
+        agent: BaseLearnedPlayer,
+        td_settings: TDSettings,
+        rival_type: str,
+        rival: Optional[BaseLearnedPlayer],
+        rival_td_settings: Optional[TDSettings],
+        total_episodes: int,
+        n_workers: int,
+        episodes_file: Path,
+        n_envs: Optional[int] = None):
+    """
+    Train the agent on several worker processes that share its Q-table (and
+    the rival's, if it learns). Worker i seeds its players with
+    'worker_seed(seed, i)' of the settings' random seed. The learned values
+    are copied back into the agent's (and rival's) table at the end.
+    :param game_settings:
+    :param agent_type:
+    :param agent:
+    :param td_settings:
+    :param rival_type: Type of the rival, 'random' for a random player.
+    :param rival: Rival learned player. None for a random rival.
+    :param rival_td_settings:
+    :param total_episodes:
+    :param n_workers: Number of worker processes.
+    :param episodes_file: Folder of the episode log for the episodes of all
+        the workers, by worker.
+    :param n_envs: If given, each worker plays this many games at once on a
+        vectorized environment.
+    :return:
+    """
+    if n_workers < 1:
+        raise ValueError("Need at least one worker!")
+
+    episodes_file = Path(episodes_file)
+    tables = [agent.agent_q_vals]
+    if rival is not None:
+        tables.append(rival.agent_q_vals)
+
+    shared_tables, blocks = [], []
+    for table in tables:
+        shared_table, shm = share_q_table(table)
+        shared_tables.append(shared_table)
+        blocks.append(shm)
+
+    try:
+        tasks = []
+        for i in range(n_workers):
+            n_episodes = total_episodes // n_workers
+            n_episodes += int(i < total_episodes % n_workers)
+            tasks.append(WorkerTask(
+                worker_id=i,
+                episodes=n_episodes,
+                seed=worker_seed(td_settings.random_seed, i),
+                game_settings=game_settings,
+                agent_type=agent_type,
+                td_settings=_worker_settings(td_settings, agent.canonical, i),
+                table_name=blocks[0].name,
+                rival_type=rival_type,
+                rival_td_settings=None if rival is None else _worker_settings(
+                    rival_td_settings,
+                    rival.canonical,
+                    i
+                ),
+                rival_table_name=None if rival is None else blocks[1].name,
+                episodes_file=_part_file(episodes_file, i),
+                n_envs=n_envs,
+            ))
+
+        with mp.Pool(n_workers) as pool:
+            pool.map(_run_worker, tasks, chunksize=1)
+
+        for table, shared_table in zip(tables, shared_tables):
+            table.values[:] = shared_table.values
+            table.visited[:] = shared_table.visited
+    finally:
+        # The arrays over the blocks must be released before closing them.
+        shared_table = None
+        shared_tables.clear()
+        for shm in blocks:
+            shm.close()
+            shm.unlink()
+
+    parts = [_part_file(episodes_file, i) for i in range(n_workers)]
+    concat_logs(parts, episodes_file)
+    for part in parts:
+        shutil.rmtree(part)
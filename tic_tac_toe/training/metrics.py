@@ -0,0 +1,243 @@
+"""
+Instrumentation of training runs: where the time of the training loop goes,
+how fast episodes are played and how the agent's Q-table grows.
+
+Timers are added by wrapping the methods of the players and the game step
+when a run is instrumented, and removed afterwards, so runs without metrics
+run the same code as before. Timers exclude the time of the timers nested in
+them, e.g. the Q-value updates made while a player picks its move.
+"""
+import sys
+import json
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from ..players import BasePlayer
+from ..players.learned_base import BaseLearnedPlayer, BaseTDPlayer
+from .schemas import MetricsSample, RunMetrics, TimerStats
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+#: Name of the periodic metrics file in a run's output folder.
+METRICS_FILE: str = "metrics.jsonl"
+
+MOVE_SELECTION: str = "move_selection"
+TD_UPDATE: str = "td_update"
+GAME_STEP: str = "game_step"
+BOOKKEEPING: str = "bookkeeping"
+
+#: Methods of every player, and of the TD players, timed by each timer.
+PLAYER_TIMERS: Dict[str, str] = {
+    "make_move_id": MOVE_SELECTION,
+    "select_actions": MOVE_SELECTION,
+}
+LEARNER_TIMERS: Dict[str, str] = {
+    "update": TD_UPDATE,
+    "observe_batch": TD_UPDATE,
+    "update_batch": TD_UPDATE,
+    "learn_from_batch": TD_UPDATE,
+    "end_game_id": TD_UPDATE,
+}
+
+
+def peak_rss_mb() -> Optional[float]:
+    """
+    Peak resident memory of this process so far, in MiB. None where it
+    cannot be measured.
+    :return:
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Bytes on macOS, kilobytes elsewhere.
+    return peak / (1 << 20) if sys.platform == "darwin" else peak / 1024
+
+
+class Instrumentation:
+    """
+    Timers and periodic samples of a training run.
+    """
+
+    def __init__(
+            self,
+            agent: BaseLearnedPlayer,
+            every: Optional[int] = None,
+            path: Optional[Union[str, Path]] = None,
+            episodes_done: int = 0):
+        """
+        :param agent: Agent being trained, to measure its Q-table.
+        :param every: Take a sample every this many episodes.
+        :param path: If given, append every sample to this JSON lines file.
+        :param episodes_done: Episodes played before, for resumed runs.
+        """
+        self.__agent = agent
+        self.__every = every
+        self.__path = None if path is None else Path(path)
+        self.__seconds: Dict[str, float] = {
+            MOVE_SELECTION: 0.0,
+            TD_UPDATE: 0.0,
+            GAME_STEP: 0.0,
+        }
+        self.__calls: Dict[str, int] = dict.fromkeys(self.__seconds, 0)
+        # Names of the running timers, and the time of the timers nested in
+        # each of them.
+        self.__running: List[str] = []
+        self.__nested: List[float] = []
+        self.__patched: List[Tuple[Any, str, Optional[Any]]] = []
+        self.__samples: List[MetricsSample] = []
+        self.__first_episode = episodes_done
+        self.__last_sample = episodes_done
+        self.__start = time.perf_counter()
+
+    @property
+    def samples(self) -> List[MetricsSample]:
+        """
+        Samples taken so far.
+        """
+        return list(self.__samples)
+
+    def wrap(self, func: Callable, name: str) -> Callable:
+        """
+        Time the calls of a function.
+        :param func:
+        :param name: Timer to add the time to.
+        :return: Timed function.
+        """
+        seconds, calls = self.__seconds, self.__calls
+        running, nested = self.__running, self.__nested
+        perf_counter = time.perf_counter
+
+        def timed(*args, **kwargs):
+            running.append(name)
+            nested.append(0.0)
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                elapsed = perf_counter() - start
+                running.pop()
+                seconds[name] += elapsed - nested.pop()
+                if nested:
+                    nested[-1] += elapsed
+                # Calls nested in a call of the same timer (e.g. 'update_batch'
+                # in 'observe_batch') are not counted again.
+                if not running or running[-1] != name:
+                    calls[name] += 1
+
+        return timed
+
+    def instrument(self, obj: Any, method: str, name: str):
+        """
+        Time the calls of a method of an object, until 'close'.
+        :param obj:
+        :param method:
+        :param name: Timer to add the time to.
+        :return:
+        """
+        previous = obj.__dict__.get(method)
+        setattr(obj, method, self.wrap(getattr(obj, method), name))
+        self.__patched.append((obj, method, previous))
+
+    def instrument_players(self, *players: BasePlayer):
+        """
+        Time the move selection and, for TD players, the Q-value updates of
+        the given players.
+        :param players:
+        :return:
+        """
+        for player in players:
+            methods = dict(PLAYER_TIMERS)
+            if isinstance(player, BaseTDPlayer):
+                methods.update(LEARNER_TIMERS)
+            for method, name in methods.items():
+                self.instrument(player, method, name)
+
+    def step(self, episodes_done: int):
+        """
+        Called as training goes on: take a sample when due.
+        :param episodes_done: Episodes played so far.
+        :return:
+        """
+        if (self.__every is not None
+                and episodes_done - self.__last_sample >= self.__every):
+            self.sample(episodes_done)
+
+    def sample(self, episodes_done: int) -> MetricsSample:
+        """
+        Take a sample of the progress of the run, and append it to the
+        metrics file if there is one.
+        :param episodes_done:
+        :return:
+        """
+        seconds = time.perf_counter() - self.__start
+        played = episodes_done - self.__first_episode
+        sample = MetricsSample(
+            episodes=episodes_done,
+            seconds=seconds,
+            episodes_per_sec=played / max(seconds, 1e-9),
+            states_visited=len(self.__agent.agent_q_vals),
+            peak_rss_mb=peak_rss_mb(),
+        )
+        self.__samples.append(sample)
+        self.__last_sample = episodes_done
+        if self.__path is not None:
+            with open(self.__path, "a") as f:
+                f.write(json.dumps(sample.model_dump()) + "\n")
+        return sample
+
+    def finish(self, episodes_done: int) -> RunMetrics:
+        """
+        Metrics of the run so far. Time not spent in any of the timers is
+        counted as bookkeeping.
+        :param episodes_done: Episodes played so far.
+        :return:
+        """
+        total = time.perf_counter() - self.__start
+        played = episodes_done - self.__first_episode
+        seconds = dict(self.__seconds)
+        seconds[BOOKKEEPING] = max(total - sum(seconds.values()), 0.0)
+        calls = dict(self.__calls)
+        calls[BOOKKEEPING] = played
+
+        table = self.__agent.agent_q_vals
+        states = len(table)
+        table_bytes = table.values.nbytes + table.visited.nbytes
+        return RunMetrics(
+            episodes=played,
+            seconds=total,
+            episodes_per_sec=played / max(total, 1e-9),
+            timers={
+                name: TimerStats(
+                    calls=calls[name],
+                    seconds=seconds[name],
+                    share=seconds[name] / max(total, 1e-9),
+                )
+                for name in seconds
+            },
+            states_visited=states,
+            q_table_bytes=table_bytes,
+            bytes_per_state=table_bytes / max(states, 1),
+            peak_rss_mb=peak_rss_mb(),
+            samples=self.samples,
+        )
+
+    def close(self):
+        """
+        Remove the timers from the instrumented objects.
+        """
+        while self.__patched:
+            obj, method, previous = self.__patched.pop()
+            if previous is None:
+                delattr(obj, method)
+            else:
+                setattr(obj, method, previous)
+
+    def __enter__(self) -> "Instrumentation":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,233 @@
+"""
+Periodic evaluation of an agent while it trains. Every so many episodes a
+greedy snapshot of the agent is compiled (see 'players.compiled') and sent to
+a separate process, which plays it against the benchmark opponents while
+training goes on. Training stops once the evaluations plateau: when the mean
+score against the benchmarks, or the Q-values themselves, stop changing.
+
+Each evaluation is collected when the next one is due, waiting for it if it
+has not finished yet, so the episode where training stops depends only on the
+run's seed and not on how long the evaluations take.
+"""
+import numpy as np
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from ..schemas import GameSettings
+from ..players.compiled import CompiledPlayer, compile_policy
+from ..players.learned_base import BaseLearnedPlayer
+from .evaluation import evaluate_benchmarks
+from .schemas import EvalSettings, EvalRecord, EvaluationResult
+
+
+def max_q_change(previous: np.ndarray, current: np.ndarray) -> float:
+    """
+    Largest absolute change between two versions of a Q-table's values,
+    ignoring illegal actions.
+    :param previous:
+    :param current:
+    :return:
+    """
+    legal = np.isfinite(current)
+    if not np.any(legal):
+        return 0.0
+    return float(np.max(np.abs(current[legal] - previous[legal])))
+
+
+def _evaluate_moves(
+        moves: np.ndarray,
+        settings: EvalSettings,
+        game_settings: GameSettings) -> Dict[str, EvaluationResult]:
+    """
+    Evaluate a compiled greedy policy against the benchmarks.
+    """
+    return evaluate_benchmarks(
+        CompiledPlayer("X", moves),
+        settings.benchmarks,
+        settings.games,
+        game_settings,
+        settings.random_seed,
+        deterministic=True
+    )
+
+
+class EvalMonitor:
+    """
+    Evaluates an agent in the background while it trains, and decides when
+    training should stop. Evaluations are collected when the next one is
+    due, so the decision to stop lags the training by one evaluation.
+    """
+
+    def __init__(
+            self,
+            settings: EvalSettings,
+            game_settings: GameSettings,
+            agent: BaseLearnedPlayer,
+            episodes_done: int = 0):
+        """
+        :param settings:
+        :param game_settings:
+        :param agent: Agent being trained. Its current values are the
+            reference for the Q-value change of the first evaluation.
+        :param episodes_done: Episodes played before the first evaluation,
+            for resumed runs.
+        """
+        self.__settings = settings
+        self.__game_settings = game_settings
+        self.__prev_values = agent.agent_q_vals.values.copy()
+        self.__last_episodes = episodes_done
+        self.__executor = ProcessPoolExecutor(max_workers=1)
+        self.__pending: Deque[Tuple[int, float, np.ndarray, Future]] = deque()
+        self.__records: List[EvalRecord] = []
+        self.__best_score: Optional[float] = None
+        self.__stale_score = 0
+        self.__stale_q = 0
+        self.__stop = False
+
+    @property
+    def records(self) -> List[EvalRecord]:
+        """
+        Finished evaluations, in training order.
+        """
+        return list(self.__records)
+
+    @property
+    def stop(self) -> bool:
+        """
+        Whether the evaluations have plateaued and training should stop.
+        """
+        return self.__stop
+
+    def step(self, agent: BaseLearnedPlayer, episodes_done: int) -> bool:
+        """
+        Called as training goes on: request an evaluation when due, and
+        collect the finished ones.
+        :param agent:
+        :param episodes_done: Episodes played so far.
+        :return: Whether training should stop.
+        """
+        if episodes_done - self.__last_episodes >= self.__settings.every:
+            self.__collect()
+            if not self.__stop:
+                self.submit(agent, episodes_done)
+        return self.__stop
+
+    def submit(self, agent: BaseLearnedPlayer, episodes_done: int):
+        """
+        Request an evaluation of the agent's current greedy policy.
+        :param agent:
+        :param episodes_done:
+        :return:
+        """
+        values = agent.agent_q_vals.values
+        change = max_q_change(self.__prev_values, values)
+        self.__prev_values = values.copy()
+        self.__last_episodes = episodes_done
+        self.__request(episodes_done, change, compile_policy(agent))
+
+    def get_state(self) -> Dict[str, Any]:
+        """
+        State of the monitor, to checkpoint along with the run. Pending
+        evaluations are kept as the policies they evaluate.
+        :return:
+        """
+        return {
+            "prev_values": self.__prev_values.copy(),
+            "last_episodes": self.__last_episodes,
+            "pending": [(e, c, moves) for e, c, moves, _ in self.__pending],
+            "records": list(self.__records),
+            "best_score": self.__best_score,
+            "stale_score": self.__stale_score,
+            "stale_q": self.__stale_q,
+            "stop": self.__stop,
+        }
+
+    def set_state(self, state: Dict[str, Any]):
+        """
+        Restore the state of a monitor (see 'get_state'), requesting its
+        pending evaluations again.
+        :param state:
+        :return:
+        """
+        for _, _, _, future in self.__pending:
+            future.cancel()
+        self.__pending.clear()
+
+        self.__prev_values = state["prev_values"].copy()
+        self.__last_episodes = state["last_episodes"]
+        self.__records = list(state["records"])
+        self.__best_score = state["best_score"]
+        self.__stale_score = state["stale_score"]
+        self.__stale_q = state["stale_q"]
+        self.__stop = state["stop"]
+        for episodes, change, moves in state["pending"]:
+            self.__request(episodes, change, moves)
+
+    def __request(self, episodes: int, change: float, moves: np.ndarray):
+        self.__pending.append((episodes, change, moves, self.__executor.submit(
+            _evaluate_moves,
+            moves,
+            self.__settings,
+            self.__game_settings
+        )))
+
+    def finish(self, agent: BaseLearnedPlayer, episodes_done: int) -> List[EvalRecord]:
+        """
+        Evaluate the final policy, if it was not already, and wait for all
+        the evaluations.
+        :param agent:
+        :param episodes_done:
+        :return: All the evaluations, in training order.
+        """
+        evaluated = [e for e, _, _, _ in self.__pending]
+        if self.__records:
+            evaluated.append(self.__records[-1].episodes)
+        if episodes_done not in evaluated:
+            self.submit(agent, episodes_done)
+        self.__collect()
+        return self.records
+
+    def close(self):
+        """
+        Stop the evaluation process, dropping pending evaluations.
+        """
+        for _, _, _, future in self.__pending:
+            future.cancel()
+        self.__pending.clear()
+        self.__executor.shutdown(wait=True)
+
+    def __collect(self):
+        """
+        Wait for the pending evaluations, record them in order and update
+        the stopping criteria.
+        """
+        while self.__pending:
+            episodes, change, _, future = self.__pending.popleft()
+            results = future.result()
+            score = float(np.mean([r.score for r in results.values()]))
+            self.__records.append(EvalRecord(
+                episodes=episodes,
+                results=results,
+                score=score,
+                max_q_change=change,
+            ))
+            self.__update_plateau(score, change)
+
+    def __update_plateau(self, score: float, change: float):
+        sets = self.__settings
+        if self.__best_score is None or score > self.__best_score + sets.min_delta:
+            self.__best_score = score
+            self.__stale_score = 0
+        else:
+            self.__stale_score += 1
+
+        self.__stale_q = self.__stale_q + 1 if change <= sets.q_tolerance else 0
+        if sets.patience is not None:
+            self.__stop = max(self.__stale_score, self.__stale_q) >= sets.patience
+
+    def __enter__(self) -> "EvalMonitor":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
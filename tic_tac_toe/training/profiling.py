@@ -0,0 +1,164 @@
+"""
+Profiling of a window of the episodes of a training run, so that the
+warm-up at the start of the run does not skew the results. While the window
+is open, the training loop runs under 'cProfile' and a background thread
+samples its stack every few milliseconds. At the end of the window, the
+profile is saved as a pstats file, and the samples as collapsed stacks (one
+'frame;frame;... count' line per stack), ready for flame graph tools.
+"""
+import sys
+import time
+import cProfile
+import threading
+from pathlib import Path
+from collections import Counter
+from typing import Counter as CounterType, Optional, Union
+
+from .schemas import ProfileReport
+
+#: Names of the outputs in a run's output folder.
+PSTATS_FILE: str = "profile.pstats"
+COLLAPSED_FILE: str = "profile.collapsed"
+
+
+def profile_window(start: int, n_episodes: int, total_episodes: int) -> range:
+    """
+    Episodes to profile: 'n_episodes' from 'start', moved back to fit in
+    shorter runs.
+    :param start:
+    :param n_episodes:
+    :param total_episodes:
+    :return: Range of the episode counts at the start and end of the window.
+    """
+    start = max(0, min(start, total_episodes - n_episodes))
+    return range(start, min(start + n_episodes, total_episodes))
+
+
+class EpisodeProfiler:
+    """
+    Profiles the training loop while the number of episodes played is in a
+    window.
+    """
+
+    def __init__(
+            self,
+            folder: Union[str, Path],
+            window: range,
+            interval: float = 0.005):
+        """
+        :param folder: Output folder of the run.
+        :param window: Profile from 'window.start' episodes played until
+            'window.stop' (see 'profile_window').
+        :param interval: Seconds between stack samples.
+        """
+        self.__folder = Path(folder)
+        self.__window = window
+        self.__interval = interval
+        self.__profile = cProfile.Profile()
+        self.__stacks: CounterType[str] = Counter()
+        self.__stop_sampling = threading.Event()
+        self.__sampler: Optional[threading.Thread] = None
+        self.__thread_id = threading.get_ident()
+        self.__first = None
+        self.__last = None
+        self.__seconds = 0.0
+        self.__start = 0.0
+
+    @property
+    def running(self) -> bool:
+        """
+        Whether the window is open.
+        """
+        return self.__first is not None and self.__last is None
+
+    def step(self, episodes_done: int):
+        """
+        Called as training goes on: open or close the window when due.
+        :param episodes_done: Episodes played so far.
+        :return:
+        """
+        if self.__first is None:
+            if episodes_done >= self.__window.start:
+                self.__open(episodes_done)
+        elif self.__last is None and episodes_done >= self.__window.stop:
+            self.__close(episodes_done)
+
+    def finish(self, episodes_done: int) -> Optional[ProfileReport]:
+        """
+        Close the window if it is still open, e.g. because the run stopped
+        early, and save the results.
+        :param episodes_done: Episodes played so far.
+        :return: Report of the profiled window, None if it was never opened.
+        """
+        if self.running:
+            self.__close(episodes_done)
+        if self.__first is None:
+            return None
+
+        self.__profile.dump_stats(str(self.__folder / PSTATS_FILE))
+        with open(self.__folder / COLLAPSED_FILE, "w") as f:
+            for stack, count in self.__stacks.most_common():
+                f.write("%s %d\n" % (stack, count))
+
+        episodes = self.__last - self.__first
+        return ProfileReport(
+            first_episode=self.__first,
+            last_episode=self.__last,
+            seconds=self.__seconds,
+            seconds_per_episode=self.__seconds / max(episodes, 1),
+            samples=sum(self.__stacks.values()),
+            pstats_file=PSTATS_FILE,
+            collapsed_file=COLLAPSED_FILE,
+        )
+
+    def close(self):
+        """
+        Stop profiling, dropping an open window.
+        """
+        if self.running:
+            self.__profile.disable()
+            self.__stop_sampler()
+
+    def __open(self, episodes_done: int):
+        self.__first = episodes_done
+        self.__stop_sampling.clear()
+        self.__sampler = threading.Thread(target=self.__sample, daemon=True)
+        self.__sampler.start()
+        self.__start = time.perf_counter()
+        self.__profile.enable()
+
+    def __close(self, episodes_done: int):
+        self.__profile.disable()
+        self.__seconds = time.perf_counter() - self.__start
+        self.__last = episodes_done
+        self.__stop_sampler()
+
+    def __stop_sampler(self):
+        self.__stop_sampling.set()
+        if self.__sampler is not None:
+            self.__sampler.join()
+            self.__sampler = None
+
+    def __sample(self):
+        """
+        Count the stacks of the training thread until stopped.
+        """
+        while not self.__stop_sampling.wait(self.__interval):
+            frame = sys._current_frames().get(self.__thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append("%s (%s:%d)" % (
+                    code.co_name,
+                    Path(code.co_filename).name,
+                    code.co_firstlineno
+                ))
+                frame = frame.f_back
+            if frames:
+                self.__stacks[";".join(reversed(frames))] += 1
+
+    def __enter__(self) -> "EpisodeProfiler":
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -1,5 +1,5 @@
-from pydantic import BaseModel
-from typing import Literal, List, Optional
+from pydantic import BaseModel, Field, model_validator
+from typing import Literal, List, Optional, Dict, Union
 
 from ..players.schemas import TDSettings
 from ..schemas import PLAYS, GameSettings
@@ -17,6 +17,180 @@ class EpisodeSummary(BaseModel):
     agent_mark: PLAYS
 
 
+class EvaluationResult(BaseModel):
+    """
+    Results of a batch of evaluation games, from the point of view of the
+    evaluated player.
+    """
+    games: int
+    wins: int
+    draws: int
+    losses: int
+
+    @property
+    def score(self) -> float:
+        """
+        Points per game, counting 1 for a win and 0.5 for a draw.
+        """
+        return (self.wins + 0.5 * self.draws) / max(self.games, 1)
+
+
+class OutcomeProbs(BaseModel):
+    """
+    Exact probabilities of the outcomes of a game, from the point of view of
+    a player.
+    """
+    win: float
+    draw: float
+    loss: float
+
+    @property
+    def score(self) -> float:
+        """
+        Expected points per game, counting 1 for a win and 0.5 for a draw.
+        """
+        return self.win + 0.5 * self.draw
+
+
+class PolicyAnalysis(BaseModel):
+    """
+    Exact analysis of a policy (see 'analysis').
+    """
+    opponent: str
+    as_x: OutcomeProbs
+    as_o: OutcomeProbs
+    overall: OutcomeProbs = Field(description="Playing each mark half the time")
+    best_response: OutcomeProbs = Field(
+        description=(
+            "Results against the rival that best exploits the policy, "
+            "playing each mark half the time"
+        )
+    )
+    exploitability: float = Field(
+        description=(
+            "Expected points per game a best-responding rival gains over "
+            "perfect play, which draws. 0 for perfect policies"
+        )
+    )
+
+
+class EvalSettings(BaseModel):
+    """
+    Settings for the periodic evaluation of the agent's greedy policy during
+    training, and for stopping training once it stops improving.
+    """
+    every: int = Field(gt=0, description="Episodes between evaluations")
+    games: int = Field(
+        default=1000,
+        gt=0,
+        description=(
+            "Games against each benchmark opponent per evaluation, or one "
+            "from each seat against deterministic opponents"
+        )
+    )
+    benchmarks: List[str] = Field(
+        default_factory=lambda: ["random", "perfect"],
+        description="Benchmark opponents, see 'evaluation.BENCHMARKS'"
+    )
+    patience: Optional[int] = Field(
+        default=5,
+        gt=0,
+        description=(
+            "Stop training after this many evaluations without improvement. "
+            "If None, never stop early"
+        )
+    )
+    min_delta: float = Field(
+        default=0.005,
+        ge=0.0,
+        description="Smallest rise of the mean score that counts as improvement"
+    )
+    q_tolerance: float = Field(
+        default=1e-3,
+        ge=0.0,
+        description=(
+            "Largest change of any Q-value between evaluations that counts "
+            "as converged"
+        )
+    )
+    random_seed: int = 0
+
+
+class EvalRecord(BaseModel):
+    """
+    Evaluation of the agent's greedy policy during training.
+    """
+    episodes: int
+    results: Dict[str, EvaluationResult]
+    score: float = Field(description="Mean score over the benchmarks")
+    max_q_change: float = Field(
+        description="Largest change of any Q-value since the last evaluation"
+    )
+
+
+class TimerStats(BaseModel):
+    """
+    Time spent in a part of the training loop.
+    """
+    calls: int = Field(description="Calls timed (episodes, for bookkeeping)")
+    seconds: float = Field(description="Time spent, excluding nested timers")
+    share: float = Field(description="Fraction of the run's time")
+
+
+class MetricsSample(BaseModel):
+    """
+    Progress of a training run at some point.
+    """
+    episodes: int
+    seconds: float
+    episodes_per_sec: float
+    states_visited: int = Field(description="States in the agent's Q-table")
+    peak_rss_mb: Optional[float] = None
+
+
+class RunMetrics(BaseModel):
+    """
+    Performance metrics of a training run (see 'metrics').
+    """
+    episodes: int
+    seconds: float
+    episodes_per_sec: float
+    timers: Dict[str, TimerStats] = Field(
+        description=(
+            "Time spent selecting moves, updating Q-values, stepping the "
+            "game (moves and win checks) and in bookkeeping (the rest)"
+        )
+    )
+    states_visited: int = Field(description="States in the agent's Q-table")
+    q_table_bytes: int
+    bytes_per_state: float = Field(
+        description="Q-table bytes per visited state"
+    )
+    peak_rss_mb: Optional[float] = Field(
+        default=None,
+        description="Peak resident memory of the training process"
+    )
+    samples: List[MetricsSample] = Field(
+        default_factory=list,
+        description="Periodic samples, to follow the growth of the Q-table"
+    )
+
+
+class ProfileReport(BaseModel):
+    """
+    Profile of a window of the episodes of a training run (see 'profiling').
+    """
+    first_episode: int = Field(description="Episodes played when it started")
+    last_episode: int = Field(description="Episodes played when it ended")
+    seconds: float = Field(description="Time of the window, while profiled")
+    seconds_per_episode: float = Field(
+        description="Profiled time per episode, to compare runs"
+    )
+    samples: int = Field(description="Stack samples taken")
+    pstats_file: str
+    collapsed_file: str
+
+
 class TrainSummary(BaseModel):
     """
     Summary of training run.
@@ -25,6 +199,192 @@ class TrainSummary(BaseModel):
     game_settings: GameSettings
     td_settings: TDSettings
     rival_td_settings: Optional[TDSettings] = None
-    episodes: List[EpisodeSummary]
+    episodes: List[EpisodeSummary] = Field(
+        default_factory=list,
+        description=(
+            "Episodes stored inline. Only used by runs saved before episode "
+            "logs, see 'episodes_file'"
+        )
+    )
+    episodes_file: Optional[str] = Field(
+        default=None,
+        description="Episode log (a folder of columns) in the run's output folder"
+    )
     agent_type: str
     rival_type: str
+    agent_class: Optional[str] = Field(
+        default=None,
+        description="Class name of the agent, for columnar episode logs"
+    )
+    rival_class: Optional[str] = Field(
+        default=None,
+        description="Class name of the rival, for columnar episode logs"
+    )
+    eval_settings: Optional[EvalSettings] = None
+    evaluations: List[EvalRecord] = Field(default_factory=list)
+    stopped_early: bool = False
+    metrics: Optional[RunMetrics] = None
+    profile: Optional[ProfileReport] = None
+
+
+ParamValue = Union[bool, int, float, str]
+
+
+class SweepParam(BaseModel):
+    """
+    Search space of a setting in a hyperparameter sweep. Either a list of
+    values or a range to sample from.
+    """
+    values: Optional[List[ParamValue]] = None
+    low: Optional[float] = None
+    high: Optional[float] = None
+    log: bool = Field(
+        default=False,
+        description="Sample the range uniformly on a log scale"
+    )
+    integer: bool = Field(
+        default=False,
+        description="Round the values sampled from the range"
+    )
+
+    @model_validator(mode="after")
+    def check_space(self) -> "SweepParam":
+        has_range = self.low is not None and self.high is not None
+        if (self.values is None) == (not has_range):
+            raise ValueError("Give either 'values' or both 'low' and 'high'")
+        if self.values is not None and len(self.values) == 0:
+            raise ValueError("Empty list of values")
+        return self
+
+
+class SweepSettings(BaseModel):
+    """
+    Settings for a hyperparameter sweep with successive halving.
+    """
+    agent_type: str = "q_learn"
+    opponent_type: str = "random"
+    td_settings: TDSettings = TDSettings()
+    opponent_td_settings: Optional[TDSettings] = None
+    game_settings: GameSettings = GameSettings()
+    params: Dict[str, SweepParam] = Field(
+        description=(
+            "Swept settings, as 'td.<field>' for TD settings and "
+            "'game.<field>' for game settings"
+        )
+    )
+    n_trials: Optional[int] = Field(
+        default=None,
+        gt=0,
+        description=(
+            "Number of random trials. If not given, run the full grid of "
+            "values"
+        )
+    )
+    min_episodes: int = Field(
+        default=5000,
+        gt=0,
+        description="Training episodes of every trial in the first rung"
+    )
+    n_rungs: int = Field(default=3, gt=0)
+    reduction_factor: int = Field(
+        default=2,
+        ge=2,
+        description=(
+            "Only the best 1 / reduction_factor trials go on to the next "
+            "rung, where the training budget is reduction_factor times larger"
+        )
+    )
+    eval_games: int = Field(
+        default=1000,
+        gt=0,
+        description="Games against a random player to evaluate each trial"
+    )
+    n_envs: Optional[int] = None
+    random_seed: int = 0
+
+
+class TrialResult(BaseModel):
+    """
+    Latest result of a trial in a sweep.
+    """
+    trial: str
+    params: Dict[str, ParamValue]
+    rung: int
+    episodes: int
+    score: float
+    evaluation: EvaluationResult
+
+
+class SweepSummary(BaseModel):
+    """
+    Summary of a hyperparameter sweep.
+    """
+    sweep_name: str
+    settings: SweepSettings
+    leaderboard: List[TrialResult]
+
+
+class PairResult(BaseModel):
+    """
+    Results of the games between two entrants of a tournament.
+    """
+    player: str
+    opponent: str
+    deterministic: bool = Field(
+        description=(
+            "Both entrants play deterministic policies, so each seat is "
+            "played once"
+        )
+    )
+    result: EvaluationResult = Field(description="From the player's side")
+
+
+class Standing(BaseModel):
+    """
+    Rating of an entrant of a tournament.
+    """
+    name: str
+    source: str = Field(description="Policy file or benchmark opponent")
+    rating: float = Field(description="Elo-scale Bradley-Terry rating")
+    ci_low: float
+    ci_high: float
+    games: int
+    score: float = Field(description="Points per game")
+
+
+class TournamentSummary(BaseModel):
+    """
+    Summary of a round-robin tournament between policies.
+    """
+    games: int = Field(description="Games per pair of stochastic entrants")
+    epsilon: float
+    confidence: float
+    prior_draws: float
+    cached_outcomes: int = Field(
+        description="Deterministic games taken from the outcome cache"
+    )
+    standings: List[Standing]
+    pairs: List[PairResult]
+
+
+class SPRTResult(BaseModel):
+    """
+    Result of a sequential probability ratio test between two players (see
+    'sprt').
+    """
+    result: EvaluationResult = Field(description="From the player's side")
+    score: float
+    score_low: float
+    score_high: float
+    elo: float = Field(description="Elo difference implied by the score")
+    elo_low: float
+    elo_high: float
+    llr: float = Field(description="Log-likelihood ratio of H1 against H0")
+    llr_lower: float = Field(description="H0 is accepted below this")
+    llr_upper: float = Field(description="H1 is accepted above this")
+    decision: Literal["H0", "H1", "inconclusive"]
+    elo0: float
+    elo1: float
+    alpha: float
+    beta: float
+    confidence: float
@@ -0,0 +1,291 @@
+"""
+Head-to-head comparisons of two players with a sequential probability ratio
+test (SPRT). Games are played in batches on a vectorized environment, and
+after each batch the log-likelihood ratio of the hypotheses 'the player is
+elo1 stronger than the opponent' (H1) and 'the player is elo0 stronger'
+(H0) is checked against the bounds given by the error rates. The test stops
+as soon as one of the bounds is crossed, which for clear differences takes
+far fewer games than a fixed-size evaluation.
+
+The log-likelihood ratio uses the normal approximation of the trinomial
+(win / draw / loss) model of the generalized SPRT: with mean score s and
+score variance v per game over N games, and s0, s1 the expected scores
+under each hypothesis,
+
+    LLR = N * (s1 - s0) * (2 * s - s0 - s1) / (2 * v)
+"""
+import os
+import json
+import math
+from pathlib import Path
+from statistics import NormalDist
+from typing import Optional, Union
+
+from . import schemas as sch
+from ..players import BasePlayer
+from ..schemas import GameSettings
+from ..constants import DEFAULT_GAME_CFG, DEFAULT_TD_CFG
+from ..players.learn_types import PLAYER_TYPES, instantiate_agent
+from .evaluation import BENCHMARKS, play_matches
+
+#: Smallest score variance used, so that decisive matchups (e.g. between
+#: deterministic players) stop after a batch instead of dividing by zero.
+MIN_VARIANCE: float = 1e-6
+
+H0: str = "H0"
+H1: str = "H1"
+INCONCLUSIVE: str = "inconclusive"
+
+
+def elo_to_score(elo: float) -> float:
+    """
+    Expected score of a player this many Elo points stronger than its
+    opponent.
+    :param elo:
+    :return:
+    """
+    return 1.0 / (1.0 + 10.0 ** (-elo / 400.0))
+
+
+def score_to_elo(score: float) -> float:
+    """
+    Elo difference of a player with this expected score.
+    :param score:
+    :return: Infinite for scores of 0 or 1.
+    """
+    if score <= 0.0:
+        return -math.inf
+    if score >= 1.0:
+        return math.inf
+    return 400.0 * math.log10(score / (1.0 - score))
+
+
+def sprt_llr(
+        result: sch.EvaluationResult,
+        elo0: float,
+        elo1: float) -> float:
+    """
+    Log-likelihood ratio of H1 (elo1) against H0 (elo0) given the results
+    so far.
+    :param result: Results from the player's side.
+    :param elo0:
+    :param elo1:
+    :return:
+    """
+    if result.games == 0:
+        return 0.0
+
+    score = result.score
+    variance = (
+        result.wins * (1.0 - score) ** 2
+        + result.draws * (0.5 - score) ** 2
+        + result.losses * score ** 2
+    ) / result.games
+    s0, s1 = elo_to_score(elo0), elo_to_score(elo1)
+    return (
+        result.games * (s1 - s0) * (2.0 * score - s0 - s1)
+        / (2.0 * max(variance, MIN_VARIANCE))
+    )
+
+
+def run_sprt(
+        player: BasePlayer,
+        opponent: BasePlayer,
+        elo0: float = 0.0,
+        elo1: float = 20.0,
+        alpha: float = 0.05,
+        beta: float = 0.05,
+        batch_games: int = 200,
+        max_games: int = 100000,
+        confidence: float = 0.95,
+        game_settings: Optional[GameSettings] = None) -> sch.SPRTResult:
+    """
+    Play batches of games between two players until the SPRT is decided.
+    Both players must support batched play (see 'BasePlayer.select_actions');
+    they don't learn from these games.
+    :param player: Player being evaluated.
+    :param opponent:
+    :param elo0: Elo difference under the null hypothesis.
+    :param elo1: Elo difference under the alternative hypothesis.
+    :param alpha: Probability of accepting H1 when H0 holds.
+    :param beta: Probability of accepting H0 when H1 holds.
+    :param batch_games: Games per batch, half from each seat.
+    :param max_games: Stop without a decision after this many games.
+    :param confidence: Confidence level of the score bounds.
+    :param game_settings:
+    :return:
+    """
+    if elo1 <= elo0:
+        raise ValueError("elo1 must be larger than elo0!")
+    if batch_games < 2 or batch_games % 2:
+        raise ValueError("Batches need an even number of games!")
+
+    lower = math.log(beta / (1.0 - alpha))
+    upper = math.log((1.0 - beta) / alpha)
+    total = sch.EvaluationResult(games=0, wins=0, draws=0, losses=0)
+    decision, llr = INCONCLUSIVE, 0.0
+    while total.games < max_games:
+        n_games = min(batch_games, max_games - total.games)
+        batch = play_matches(
+            player,
+            opponent,
+            max(n_games + n_games % 2, 2),
+            game_settings
+        )
+        total = sch.EvaluationResult(
+            games=total.games + batch.games,
+            wins=total.wins + batch.wins,
+            draws=total.draws + batch.draws,
+            losses=total.losses + batch.losses,
+        )
+        llr = sprt_llr(total, elo0, elo1)
+        if llr >= upper:
+            decision = H1
+            break
+        if llr <= lower:
+            decision = H0
+            break
+
+    score = total.score
+    stderr = math.sqrt((
+        total.wins * (1.0 - score) ** 2
+        + total.draws * (0.5 - score) ** 2
+        + total.losses * score ** 2
+    ) / total.games ** 2)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    low, high = max(score - z * stderr, 0.0), min(score + z * stderr, 1.0)
+    return sch.SPRTResult(
+        result=total,
+        score=score,
+        score_low=low,
+        score_high=high,
+        elo=score_to_elo(score),
+        elo_low=score_to_elo(low),
+        elo_high=score_to_elo(high),
+        llr=llr,
+        llr_lower=lower,
+        llr_upper=upper,
+        decision=decision,
+        elo0=elo0,
+        elo1=elo1,
+        alpha=alpha,
+        beta=beta,
+        confidence=confidence,
+    )
+
+
+def load_player(
+        spec: str,
+        policy_file: Optional[Union[str, Path]] = None,
+        epsilon: float = 0.0,
+        random_seed: int = 0,
+        td_settings_file: Union[str, Path] = DEFAULT_TD_CFG) -> BasePlayer:
+    """
+    Build a player to evaluate, with frozen weights.
+    :param spec: Benchmark opponent ('random' or 'perfect', see
+        'BENCHMARKS'), player type (see 'PLAYER_TYPES') or policy file, which
+        is played by a Q-learning player.
+    :param policy_file: Policy of a player type. If None, the player starts
+        from an empty policy.
+    :param epsilon: Probability of a random move of learned players.
+    :param random_seed:
+    :param td_settings_file: Settings of learned players.
+    :return:
+    """
+    if spec in BENCHMARKS:
+        return BENCHMARKS[spec](random_seed)
+    if spec not in PLAYER_TYPES:
+        if not os.path.isfile(spec):
+            raise KeyError("Unknown player '%s'" % spec)
+        spec, policy_file = "q_learn", spec
+
+    player, _ = instantiate_agent(
+        spec,
+        td_settings_file=td_settings_file,
+        policy_file=policy_file,
+        settings_update={
+            "epsilon_greedy": epsilon > 0.0,
+            "epsilon": epsilon,
+            "random_seed": random_seed,
+        },
+    )
+    player.frozen = True
+    return player
+
+
+def evaluate(
+        player: str,
+        opponent: str = "random",
+        player_policy: Optional[Union[str, Path]] = None,
+        opponent_policy: Optional[Union[str, Path]] = None,
+        epsilon: float = 0.0,
+        elo0: float = 0.0,
+        elo1: float = 20.0,
+        alpha: float = 0.05,
+        beta: float = 0.05,
+        batch_games: int = 200,
+        max_games: int = 100000,
+        confidence: float = 0.95,
+        random_seed: int = 0,
+        game_settings_file: Union[str, Path] = DEFAULT_GAME_CFG,
+        td_settings_file: Union[str, Path] = DEFAULT_TD_CFG,
+        output: Optional[Union[str, Path]] = None):
+    """
+    Compare two players with a sequential probability ratio test, and print
+    the score, its bounds and the number of games played.
+    :param player: Player being evaluated (see 'load_player').
+    :param opponent:
+    :param player_policy: Policy file of the player, if given by type.
+    :param opponent_policy: Policy file of the opponent, if given by type.
+    :param epsilon: Probability of a random move of learned players. Games
+        between greedy players repeat the same two games.
+    :param elo0: Elo difference of the player under H0.
+    :param elo1: Elo difference of the player under H1.
+    :param alpha: Probability of accepting H1 when H0 holds.
+    :param beta: Probability of accepting H0 when H1 holds.
+    :param batch_games: Games played at once between checks of the test.
+    :param max_games: Stop without a decision after this many games.
+    :param confidence: Confidence level of the score bounds.
+    :param random_seed:
+    :param game_settings_file:
+    :param td_settings_file: Settings of learned players.
+    :param output: If given, save the result to this JSON file.
+    :return:
+    """
+    if not os.path.isfile(game_settings_file):
+        raise FileNotFoundError("Game settings file not found")
+    with open(game_settings_file, "r") as f:
+        game_settings = GameSettings(**json.load(f))
+
+    players = [
+        load_player(spec, policy, epsilon, random_seed + k, td_settings_file)
+        for k, (spec, policy) in enumerate((
+            (player, player_policy),
+            (opponent, opponent_policy),
+        ))
+    ]
+    out = run_sprt(
+        *players,
+        elo0=elo0,
+        elo1=elo1,
+        alpha=alpha,
+        beta=beta,
+        batch_games=batch_games,
+        max_games=max_games,
+        confidence=confidence,
+        game_settings=game_settings,
+    )
+    if output is not None:
+        with open(output, "w") as f:
+            json.dump(out.model_dump(), f, indent=2)
+
+    r = out.result
+    print("Games: %d (W %d / D %d / L %d)" % (r.games, r.wins, r.draws, r.losses))
+    print("Score: %.4f [%.4f, %.4f]" % (out.score, out.score_low, out.score_high))
+    print("Elo: %.1f [%.1f, %.1f]" % (out.elo, out.elo_low, out.elo_high))
+    print("LLR: %.3f (bounds %.3f, %.3f)" % (out.llr, out.llr_lower, out.llr_upper))
+    print("Decision: %s" % {
+        H1: "H1 accepted, elo >= %g" % elo1,
+        H0: "H0 accepted, elo <= %g" % elo0,
+        INCONCLUSIVE: "inconclusive after %d games" % r.games,
+    }[out.decision])
@@ -0,0 +1,289 @@
+"""
+Hyperparameter sweeps with successive halving. All trials train for a small
+budget of episodes and their greedy policies are evaluated; only the best
+fraction goes on to the next rung, where it keeps training with a larger
+budget. Trials run in parallel on a process pool.
+"""
+import os
+import json
+import math
+import itertools
+import numpy as np
+import multiprocessing as mp
+from tqdm import tqdm
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+from . import schemas as sch
+from ..schemas import GameSettings
+from ..constants import OUTPUTS_DIR
+from ..players.random import random_rival
+from ..players.schemas import TDSettings
+from ..players.compiled import CompiledPlayer
+from .evaluation import evaluate_vs_random
+from .episode_log import EpisodeWriter, EPISODES_DIR
+from .train_agent import play_episodes, save_outputs
+from ..players.policy_io import load_binary_policy, save_binary_policy
+from ..players.learn_types import PLAYER_TYPES, BaseLearnedPlayer
+
+RIVAL_POLICY: str = "rival_policy.qtab"
+
+
+def sample_trials(settings: sch.SweepSettings) -> List[Dict[str, sch.ParamValue]]:
+    """
+    Get the parameters of the trials of a sweep: the full grid of values if
+    'n_trials' is not set, else that many random samples.
+    :param settings:
+    :return:
+    """
+    names = list(settings.params)
+    if settings.n_trials is None:
+        if any(p.values is None for p in settings.params.values()):
+            raise ValueError("Parameter ranges need a number of trials")
+        grid = itertools.product(*(settings.params[n].values for n in names))
+        return [dict(zip(names, values)) for values in grid]
+
+    rng = np.random.default_rng(settings.random_seed)
+    out = []
+    for _ in range(settings.n_trials):
+        params = {}
+        for name in names:
+            space = settings.params[name]
+            if space.values is not None:
+                params[name] = space.values[rng.integers(len(space.values))]
+                continue
+
+            if space.log:
+                value = math.exp(rng.uniform(math.log(space.low), math.log(space.high)))
+            else:
+                value = rng.uniform(space.low, space.high)
+            params[name] = round(value) if space.integer else float(value)
+        out.append(params)
+    return out
+
+
+def trial_settings(
+        settings: sch.SweepSettings,
+        params: Dict[str, sch.ParamValue]) -> Tuple[TDSettings, GameSettings]:
+    """
+    Apply the parameters of a trial to the base settings of the sweep.
+    :param settings:
+    :param params: Parameter name ('td.<field>' or 'game.<field>') -> value.
+    :return:
+    """
+    fields = {
+        "td": settings.td_settings.model_dump(),
+        "game": settings.game_settings.model_dump(),
+    }
+    for name, value in params.items():
+        scope, _, field = name.partition(".")
+        if scope not in fields or field not in fields[scope]:
+            raise KeyError("Unknown sweep parameter '%s'" % name)
+        fields[scope][field] = value
+
+    return TDSettings(**fields["td"]), GameSettings(**fields["game"])
+
+
+class RungTask(NamedTuple):
+    """
+    Training of a trial for one rung of the sweep.
+    """
+    folder: Path
+    trial: str
+    trial_id: int
+    rung: int
+    episodes: int
+    params: Dict[str, sch.ParamValue]
+    settings: sch.SweepSettings
+
+
+def _load_player(
+        cls,
+        policy_file: Optional[Path],
+        mark: str,
+        settings: TDSettings) -> BaseLearnedPlayer:
+    if policy_file is None:
+        return cls(mark=mark, settings=settings)
+    table, canonical = load_binary_policy(policy_file, mmap=False)
+    return cls.from_q_table(table, canonical=canonical, mark=mark, settings=settings)
+
+
+def _run_rung(task: RungTask) -> sch.TrialResult:
+    """
+    Train a trial for a rung, continuing from its previous policy, save its
+    outputs and evaluate its greedy policy.
+    """
+    sets = task.settings
+    td_settings, game_settings = trial_settings(sets, task.params)
+    seed = int(np.random.SeedSequence(
+        [td_settings.random_seed, task.trial_id, task.rung]
+    ).generate_state(1)[0])
+    td_settings = td_settings.model_copy(update={"random_seed": seed})
+
+    # Later rungs continue from the outputs of the previous one.
+    resume = task.rung > 0
+    agent = _load_player(
+        PLAYER_TYPES[sets.agent_type],
+        task.folder / "policy.qtab" if resume else None,
+        "X",
+        td_settings
+    )
+    rival_settings = None
+    if sets.opponent_type == "random":
+        rival = random_rival(seed)
+    else:
+        rival_settings = (sets.opponent_td_settings or td_settings).model_copy(
+            update={"random_seed": seed + 1}
+        )
+        rival = _load_player(
+            PLAYER_TYPES[sets.opponent_type],
+            task.folder / RIVAL_POLICY if resume else None,
+            "O",
+            rival_settings
+        )
+
+    total_episodes = task.episodes
+    if resume:
+        with open(task.folder / "summary.json", "r") as f:
+            total_episodes += sch.TrainSummary(**json.load(f)).total_episodes
+
+    summary = sch.TrainSummary(
+        total_episodes=total_episodes,
+        episodes_file=EPISODES_DIR,
+        game_settings=game_settings,
+        td_settings=td_settings,
+        rival_td_settings=rival_settings,
+        agent_type=sets.agent_type,
+        rival_type=sets.opponent_type,
+        agent_class=type(agent).__name__,
+        rival_class=type(rival).__name__,
+    )
+    with EpisodeWriter(task.folder / EPISODES_DIR, append=resume) as writer:
+        play_episodes(
+            game_settings=game_settings,
+            agent=agent,
+            rival=rival,
+            total_episodes=task.episodes,
+            writer=writer,
+            n_envs=sets.n_envs,
+            random_seed=seed,
+            show_progress=False,
+        )
+
+    save_outputs(task.folder, summary, agent)
+    if sets.opponent_type != "random":
+        save_binary_policy(
+            rival.agent_q_vals,
+            task.folder / RIVAL_POLICY,
+            canonical=rival.canonical
+        )
+
+    evaluation = evaluate_vs_random(
+        CompiledPlayer.from_player(agent),
+        n_games=sets.eval_games,
+        game_settings=game_settings,
+        random_seed=sets.random_seed,
+    )
+    return sch.TrialResult(
+        trial=task.trial,
+        params=task.params,
+        rung=task.rung,
+        episodes=total_episodes,
+        score=evaluation.score,
+        evaluation=evaluation,
+    )
+
+
+def _save_leaderboard(
+        folder: Path,
+        sweep_name: str,
+        settings: sch.SweepSettings,
+        results: Dict[int, sch.TrialResult]) -> List[sch.TrialResult]:
+    """
+    Rank the trials by the last rung they reached, then by score, and save
+    the leaderboard.
+    """
+    leaderboard = sorted(
+        results.values(),
+        key=lambda r: (-r.rung, -r.score, r.trial)
+    )
+    summary = sch.SweepSummary(
+        sweep_name=sweep_name,
+        settings=settings,
+        leaderboard=leaderboard,
+    )
+    with open(folder / "leaderboard.json", "w") as f:
+        json.dump(summary.model_dump(), f, indent=2)
+    return leaderboard
+
+
+def run_sweep(
+        sweep_file: Union[str, Path],
+        sweep_name: str,
+        workers: Optional[int] = None):
+    """
+    Run a hyperparameter sweep with successive halving. The outputs of each
+    trial are stored in 'outputs/{sweep_name}/{trial}', and the leaderboard
+    in 'outputs/{sweep_name}/leaderboard.json'.
+    :param sweep_file: JSON file with the sweep settings (see 'SweepSettings').
+    :param sweep_name:
+    :param workers: Number of trials to run in parallel. Defaults to the
+        number of CPUs.
+    :return:
+    """
+    if not os.path.isfile(sweep_file):
+        raise FileNotFoundError("Sweep settings file not found")
+
+    with open(sweep_file, "r") as f:
+        settings = sch.SweepSettings(**json.load(f))
+
+    for type_name in (settings.agent_type, settings.opponent_type):
+        if type_name != "random" and type_name not in PLAYER_TYPES:
+            raise KeyError("Unknown player type '%s'" % type_name)
+    if settings.agent_type == "random":
+        raise ValueError("The agent must be a learning player")
+
+    trials = sample_trials(settings)
+    for params in trials:
+        trial_settings(settings, params)
+
+    folder = OUTPUTS_DIR / sweep_name
+    names = ["trial-%03d" % i for i in range(len(trials))]
+    for name in names:
+        os.makedirs(folder / name, exist_ok=True)
+
+    alive = list(range(len(trials)))
+    results: Dict[int, sch.TrialResult] = {}
+    factor = settings.reduction_factor
+    trained = 0
+    with mp.Pool(workers) as pool:
+        for rung in range(settings.n_rungs):
+            budget = settings.min_episodes * factor ** rung
+            tasks = [
+                RungTask(
+                    folder=folder / names[i],
+                    trial=names[i],
+                    trial_id=i,
+                    rung=rung,
+                    episodes=budget - trained,
+                    params=trials[i],
+                    settings=settings,
+                )
+                for i in alive
+            ]
+            trained = budget
+
+            outcomes = pool.imap_unordered(_run_rung, tasks)
+            for result in tqdm(outcomes, total=len(tasks), desc="Rung %d" % rung):
+                results[names.index(result.trial)] = result
+
+            alive.sort(key=lambda i: (-results[i].score, i))
+            alive = alive[:math.ceil(len(alive) / factor)]
+            _save_leaderboard(folder, sweep_name, settings, results)
+
+    leaderboard = _save_leaderboard(folder, sweep_name, settings, results)
+    print("%-10s %5s %9s %7s  %s" % ("trial", "rung", "episodes", "score", "params"))
+    for r in leaderboard:
+        print("%-10s %5d %9d %7.4f  %s" % (
+            r.trial, r.rung, r.episodes, r.score, json.dumps(r.params)
+        ))
@@ -0,0 +1,459 @@
+"""
+Round-robin tournaments between policies, e.g. the outputs of many training
+runs. Every pair of entrants plays from both seats, and the entrants are
+rated with a Bradley-Terry model (draws count as half a win for each side)
+on the Elo scale, with confidence intervals.
+
+A game between two greedy policies is deterministic, so pairs of greedy
+policies play each seat once, and the outcomes are cached by the contents
+of the policies: later tournaments with the same policies don't play them
+again. Pairs with a stochastic entrant (a random player, or epsilon-greedy
+policies) play a batch of games on a process pool.
+"""
+import os
+import json
+import math
+import hashlib
+import itertools
+import numpy as np
+import multiprocessing as mp
+from tqdm import tqdm
+from pathlib import Path
+from functools import lru_cache
+from statistics import NormalDist
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+from . import schemas as sch
+from ..players import BasePlayer
+from ..constants import OUTPUTS_DIR
+from ..tablebase import load_tablebase
+from ..players.q_table import QTable
+from ..players.q_learn import QLearnPlayer
+from ..players.schemas import TDSettings
+from ..players.policy_io import load_q_table
+from ..players.compiled import CompiledPlayer, compile_policy
+from .evaluation import BENCHMARKS, play_matches
+
+#: Default folder of the tournament summaries and the outcome cache.
+TOURNAMENT_DIR: Path = OUTPUTS_DIR / "tournaments"
+CACHE_FILE: str = "outcomes.json"
+
+#: Rating of an entrant of average strength.
+MEAN_RATING: float = 1500.0
+ELO_SCALE: float = 400.0 / math.log(10.0)
+
+#: Policy files looked for in the run folders, by order of preference.
+POLICY_FILES = ("policy.qtab", "policy.json")
+
+
+class Entrant(NamedTuple):
+    """
+    Player of a tournament.
+    """
+    name: str
+    source: str
+    #: Hash of the compiled policy of deterministic entrants, else None.
+    key: Optional[str]
+
+
+class PairTask(NamedTuple):
+    """
+    Games between two stochastic entrants.
+    """
+    first: int
+    second: int
+    sources: Tuple[str, str]
+    games: int
+    epsilon: float
+    seeds: Tuple[int, int]
+
+
+class OutcomeCache:
+    """
+    Winners of the games between deterministic policies, by the hashes of
+    the policies playing 'X' and 'O'.
+    """
+
+    def __init__(self, path: Optional[Union[str, Path]] = None):
+        """
+        :param path: JSON file to load the cache from and save it to. If
+            None, the cache is kept in memory only.
+        """
+        self.__path = None if path is None else Path(path)
+        self.__winners: Dict[str, str] = {}
+        self.__hits = 0
+        if self.__path is not None and self.__path.is_file():
+            with open(self.__path, "r") as f:
+                self.__winners = json.load(f)
+
+    @property
+    def hits(self) -> int:
+        """
+        Outcomes found in the cache so far.
+        """
+        return self.__hits
+
+    def __len__(self) -> int:
+        return len(self.__winners)
+
+    def get(self, x_key: str, o_key: str) -> Optional[str]:
+        """
+        Cached winner of a game, None if it was not played before.
+        :param x_key:
+        :param o_key:
+        :return: 'X', 'O' or '-' for a draw.
+        """
+        winner = self.__winners.get("%s:%s" % (x_key, o_key))
+        if winner is not None:
+            self.__hits += 1
+        return winner
+
+    def put(self, x_key: str, o_key: str, winner: str):
+        """
+        Store the winner of a game.
+        :param x_key:
+        :param o_key:
+        :param winner:
+        :return:
+        """
+        self.__winners["%s:%s" % (x_key, o_key)] = winner
+
+    def save(self):
+        """
+        Save the cache to its file, if it has one.
+        """
+        if self.__path is None:
+            return
+        os.makedirs(self.__path.parent, exist_ok=True)
+        with open(self.__path, "w") as f:
+            json.dump(self.__winners, f)
+
+
+def find_policies(
+        policies: Optional[Union[str, List[str]]] = None,
+        runs_dir: Union[str, Path] = OUTPUTS_DIR) -> Dict[str, str]:
+    """
+    Find the entrants of a tournament.
+    :param policies: Policy files, run folders (paths, or names of folders in
+        'runs_dir') and benchmark opponents (see 'BENCHMARKS'), as a list or
+        separated by commas. If None, the policies of all the runs in
+        'runs_dir', including sweep trials.
+    :param runs_dir:
+    :return: Entrant name -> policy file or benchmark name.
+    """
+    runs_dir = Path(runs_dir)
+    if policies is None:
+        folders = sorted({
+            path.parent for name in POLICY_FILES
+            for path in runs_dir.rglob(name)
+        })
+        return {
+            folder.relative_to(runs_dir).as_posix(): str(_run_policy(folder))
+            for folder in folders
+        }
+
+    if isinstance(policies, str):
+        policies = [p.strip() for p in policies.split(",") if p.strip()]
+
+    out = {}
+    for item in policies:
+        item = str(item)
+        path = Path(item)
+        if item in BENCHMARKS:
+            name, source = item, item
+        elif path.is_file():
+            name = path.parent.name if path.stem == "policy" else path.stem
+            source = str(path)
+        elif path.is_dir() or (runs_dir / item).is_dir():
+            folder = path if path.is_dir() else runs_dir / item
+            name, source = folder.name, str(_run_policy(folder))
+        else:
+            raise FileNotFoundError("Policy '%s' not found" % item)
+
+        if name in out:
+            raise ValueError("Two entrants named '%s'" % name)
+        out[name] = source
+    return out
+
+
+def _run_policy(folder: Path) -> Path:
+    for name in POLICY_FILES:
+        if (folder / name).is_file():
+            return folder / name
+    raise FileNotFoundError("No policy in '%s'" % folder)
+
+
+@lru_cache(maxsize=None)
+def _load_table(source: str) -> Tuple[QTable, bool]:
+    return load_q_table(source, mmap=False)
+
+
+def _compiled_moves(source: str) -> np.ndarray:
+    """
+    Greedy move for each translated state of a deterministic entrant.
+    """
+    if source == "perfect":
+        return load_tablebase().moves
+    table, canonical = _load_table(source)
+    player = QLearnPlayer.from_q_table(table, canonical, "X", TDSettings())
+    return compile_policy(player)
+
+
+def _build_player(source: str, epsilon: float, seed: int) -> BasePlayer:
+    """
+    Player of an entrant for the games of a pair.
+    """
+    if source in BENCHMARKS:
+        return BENCHMARKS[source](seed)
+    if epsilon == 0.0:
+        return CompiledPlayer("X", _compiled_moves(source))
+
+    table, canonical = _load_table(source)
+    settings = TDSettings(epsilon=epsilon, random_seed=seed)
+    return QLearnPlayer.from_q_table(table, canonical, "X", settings)
+
+
+def _play_pair(task: PairTask) -> Tuple[int, int, sch.EvaluationResult]:
+    """
+    Play the games of a pair of stochastic entrants, half from each seat.
+    """
+    player, opponent = (
+        _build_player(source, task.epsilon, seed)
+        for source, seed in zip(task.sources, task.seeds)
+    )
+    return task.first, task.second, play_matches(player, opponent, task.games)
+
+
+def bradley_terry(
+        points: np.ndarray,
+        games: np.ndarray,
+        prior_draws: float = 1.0,
+        tol: float = 1e-10,
+        max_iter: int = 10000) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fit a Bradley-Terry model with the MM algorithm. A number of virtual
+    draws between every pair keeps the ratings finite when some entrant
+    wins or loses all its games.
+    :param points: Points of each entrant (rows) against each other one,
+        counting 1 for a win and 0.5 for a draw.
+    :param games: Games between each pair of entrants.
+    :param prior_draws:
+    :param tol: Stop once no log-strength changes by more than this.
+    :param max_iter:
+    :return: Ratings on the Elo scale with mean 'MEAN_RATING', and their
+        standard errors.
+    """
+    if prior_draws <= 0.0:
+        raise ValueError("The prior needs some virtual draws!")
+
+    off_diag = 1.0 - np.eye(points.shape[0])
+    games = games + prior_draws * off_diag
+    wins = (points + 0.5 * prior_draws * off_diag).sum(axis=1)
+
+    strength = np.ones(points.shape[0])
+    for _ in range(max_iter):
+        updated = wins / (games / (strength[:, None] + strength)).sum(axis=1)
+        updated /= np.exp(np.mean(np.log(updated)))
+        change = np.max(np.abs(np.log(updated / strength)))
+        strength = updated
+        if change < tol:
+            break
+
+    # Standard errors from the inverse of the Fisher information, whose
+    # null space is the (arbitrary) mean of the log-strengths.
+    probs = strength[:, None] / (strength[:, None] + strength)
+    weights = games * probs * probs.T
+    info = np.diag(weights.sum(axis=1)) - weights
+    errors = np.sqrt(np.maximum(np.diag(np.linalg.pinv(info)), 0.0))
+    return MEAN_RATING + ELO_SCALE * np.log(strength), ELO_SCALE * errors
+
+
+def run_tournament(
+        entrants: Dict[str, str],
+        games: int = 100,
+        epsilon: float = 0.0,
+        workers: Optional[int] = None,
+        cache: Optional[OutcomeCache] = None,
+        prior_draws: float = 1.0,
+        confidence: float = 0.95,
+        random_seed: int = 0,
+        show_progress: bool = True) -> sch.TournamentSummary:
+    """
+    Play a round-robin tournament and rate the entrants.
+    :param entrants: Name -> policy file or benchmark opponent (see
+        'find_policies').
+    :param games: Games between each pair with a stochastic entrant, half
+        from each seat.
+    :param epsilon: Probability of a random move of the policies. With 0,
+        policies play greedily, and pairs of them play each seat once.
+    :param workers: Processes for the stochastic pairs. Defaults to the
+        number of CPUs.
+    :param cache: Outcomes of deterministic games. If None, a new cache is
+        kept in memory.
+    :param prior_draws: Virtual draws between every pair (see
+        'bradley_terry').
+    :param confidence: Confidence level of the rating intervals.
+    :param random_seed:
+    :param show_progress:
+    :return:
+    """
+    if len(entrants) < 2:
+        raise ValueError("A tournament needs at least two entrants!")
+    if cache is None:
+        cache = OutcomeCache()
+
+    players = [
+        Entrant(
+            name=name,
+            source=source,
+            key=None if source == "random" or epsilon > 0.0 else
+            hashlib.sha1(_compiled_moves(source).tobytes()).hexdigest()[:16]
+        )
+        for name, source in entrants.items()
+    ]
+    results: Dict[Tuple[int, int], Tuple[bool, sch.EvaluationResult]] = {}
+    tasks = []
+    for i, j in itertools.combinations(range(len(players)), 2):
+        first, second = players[i], players[j]
+        if first.key is None or second.key is None:
+            seeds = np.random.SeedSequence([random_seed, i, j]).generate_state(2)
+            tasks.append(PairTask(
+                first=i,
+                second=j,
+                sources=(first.source, second.source),
+                games=games,
+                epsilon=epsilon,
+                seeds=(int(seeds[0]), int(seeds[1])),
+            ))
+            continue
+
+        winners = [
+            _deterministic_winner(x, o, cache)
+            for x, o in ((first, second), (second, first))
+        ]
+        results[i, j] = (True, sch.EvaluationResult(
+            games=2,
+            wins=int(winners[0] == "X") + int(winners[1] == "O"),
+            draws=winners.count("-"),
+            losses=int(winners[0] == "O") + int(winners[1] == "X"),
+        ))
+
+    if tasks:
+        with mp.Pool(min(workers or os.cpu_count(), len(tasks))) as pool:
+            outcomes = pool.imap_unordered(_play_pair, tasks)
+            for i, j, result in tqdm(
+                    outcomes,
+                    total=len(tasks),
+                    desc="Pairs",
+                    disable=not show_progress):
+                results[i, j] = (False, result)
+
+    n = len(players)
+    points, played = np.zeros((n, n)), np.zeros((n, n))
+    pairs = []
+    for (i, j), (deterministic, result) in sorted(results.items()):
+        points[i, j] = result.wins + 0.5 * result.draws
+        points[j, i] = result.losses + 0.5 * result.draws
+        played[i, j] = played[j, i] = result.games
+        pairs.append(sch.PairResult(
+            player=players[i].name,
+            opponent=players[j].name,
+            deterministic=deterministic,
+            result=result,
+        ))
+
+    ratings, errors = bradley_terry(points, played, prior_draws=prior_draws)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    standings = [
+        sch.Standing(
+            name=player.name,
+            source=player.source,
+            rating=float(ratings[k]),
+            ci_low=float(ratings[k] - z * errors[k]),
+            ci_high=float(ratings[k] + z * errors[k]),
+            games=int(played[k].sum()),
+            score=float(points[k].sum() / max(played[k].sum(), 1.0)),
+        )
+        for k, player in enumerate(players)
+    ]
+    standings.sort(key=lambda s: (-s.rating, s.name))
+    return sch.TournamentSummary(
+        games=games,
+        epsilon=epsilon,
+        confidence=confidence,
+        prior_draws=prior_draws,
+        cached_outcomes=cache.hits,
+        standings=standings,
+        pairs=pairs,
+    )
+
+
+def _deterministic_winner(x: Entrant, o: Entrant, cache: OutcomeCache) -> str:
+    """
+    Winner of the game between two deterministic entrants, played only if
+    it is not cached.
+    """
+    winner = cache.get(x.key, o.key)
+    if winner is None:
+        result = play_matches(
+            _build_player(x.source, 0.0, 0),
+            _build_player(o.source, 0.0, 0),
+            1
+        )
+        winner = "X" if result.wins else "O" if result.losses else "-"
+        cache.put(x.key, o.key, winner)
+    return winner
+
+
+def tournament(
+        policies: Optional[Union[str, List[str]]] = None,
+        name: str = "tournament",
+        games: int = 100,
+        epsilon: float = 0.0,
+        workers: Optional[int] = None,
+        prior_draws: float = 1.0,
+        confidence: float = 0.95,
+        random_seed: int = 0,
+        use_cache: bool = True):
+    """
+    Play a round-robin tournament between policies, print the standings and
+    save them to 'outputs/tournaments/{name}.json'.
+    :param policies: Entrants (see 'find_policies'). Defaults to the
+        policies of all the runs in 'outputs'.
+    :param name:
+    :param games: Games between each pair with a stochastic entrant.
+    :param epsilon: Probability of a random move of the policies.
+    :param workers: Processes for the stochastic pairs.
+    :param prior_draws: Virtual draws between every pair, to keep ratings
+        finite.
+    :param confidence: Confidence level of the rating intervals.
+    :param random_seed:
+    :param use_cache: Reuse (and extend) the outcomes of the deterministic
+        games of earlier tournaments.
+    :return:
+    """
+    entrants = find_policies(policies)
+    print("Tournament between %d entrants" % len(entrants))
+    cache = OutcomeCache(TOURNAMENT_DIR / CACHE_FILE if use_cache else None)
+    summary = run_tournament(
+        entrants,
+        games=games,
+        epsilon=epsilon,
+        workers=workers,
+        cache=cache,
+        prior_draws=prior_draws,
+        confidence=confidence,
+        random_seed=random_seed,
+    )
+    cache.save()
+
+    os.makedirs(TOURNAMENT_DIR, exist_ok=True)
+    with open(TOURNAMENT_DIR / ("%s.json" % name), "w") as f:
+        json.dump(summary.model_dump(), f, indent=2)
+
+    print("%-30s %8s %19s %6s %6s" % ("entrant", "rating", "interval", "games", "score"))
+    for s in summary.standings:
+        print("%-30s %8.1f [%8.1f, %8.1f] %6d %6.3f" % (
+            s.name, s.rating, s.ci_low, s.ci_high, s.games, s.score
+        ))
+    print("Cached outcomes used: %d" % summary.cached_outcomes)
@@ -1,32 +1,55 @@
 import os
 import json
-import random
+import numpy as np
 from tqdm import tqdm
 from pathlib import Path
-from typing import Union, Optional
-from datetime import datetime, timezone
+from typing import Union, Optional, List, Tuple
 
 from ..game import Game
 from . import schemas as sch
 from ..players import BasePlayer
 from ..schemas import GameSettings
-from ..players.random import RandomPlayer
-from ..players.learn_types import instantiate_agent, BaseLearnedPlayer
+from .. import state_space as ss
+from ..vec_game import VecGame, X_MARK, O_MARK
+from ..random_stream import RandomStream, stream_seed
+from ..players.random import random_rival
+from .hogwild import run_hogwild
+from .monitor import EvalMonitor
+from .metrics import Instrumentation, METRICS_FILE, GAME_STEP
+from .profiling import EpisodeProfiler, profile_window
+from .episode_log import EpisodeWriter, EpisodeRecord, EPISODES_DIR
+from .checkpoint import (
+    Checkpoint,
+    Checkpointer,
+    take_checkpoint,
+    restore_players,
+    load_checkpoint,
+    CHECKPOINT_FILE,
+)
+from ..players.learned_base import BaseTDPlayer
+from ..players.policy_io import save_binary_policy, BINARY_SUFFIX
+from ..players.learn_types import instantiate_agent, BaseLearnedPlayer, PLAYER_TYPES
 from ..constants import OUTPUTS_DIR, DEFAULT_GAME_CFG, DEFAULT_TD_CFG
 
+#: Key of the stream of seat draws, derived from the run's seed (see
+#: 'random_stream.stream_seed').
+SEATS_STREAM: int = 1
+
 
 def run_game(
         game_settings: GameSettings,
         agent: BaseLearnedPlayer,
-        rival: BasePlayer) -> sch.EpisodeSummary:
+        rival: BasePlayer,
+        seats: RandomStream) -> EpisodeRecord:
     """
     Run a game between the agent and the rival.
     :param game_settings:
     :param agent:
     :param rival:
+    :param seats: Random stream for the assignment of marks.
     :return:
     """
-    agent_mark = random.choice(("X", "O"))
+    agent_mark = seats.choice(("X", "O"))
     if agent_mark == "X":
         game = Game(
             game_settings,
@@ -45,14 +68,313 @@ def run_game(
     while done is None:
         done = game.make_move()
 
-    out = sch.EpisodeSummary(
-        agent_mark=agent_mark,
-        winner=done,
-        end_board=game.state,
-        x_player_type=type(game.players["X"]).__name__,
-        o_player_type=type(game.players["O"]).__name__,
+    return EpisodeRecord(
+        winner=ss.WINNER_MARKS.index(done),
+        agent_mark=X_MARK if agent_mark == "X" else O_MARK,
+        end_id=game.state_id,
+    )
+
+
+def run_vectorized(
+        game_settings: GameSettings,
+        agent: BaseLearnedPlayer,
+        rival: BasePlayer,
+        total_episodes: int,
+        n_envs: int = 1024,
+        random_seed: int = 0,
+        show_progress: bool = True,
+        writer: Optional[EpisodeWriter] = None,
+        checkpointer: Optional[Checkpointer] = None,
+        resume_from: Optional[Checkpoint] = None,
+        monitor: Optional[EvalMonitor] = None,
+        metrics: Optional[Instrumentation] = None,
+        profiler: Optional[EpisodeProfiler] = None) -> List[sch.EpisodeSummary]:
+    """
+    Run games between the agent and the rival on a batch of environments
+    stepped together. Both players must support batched play (see
+    'BasePlayer.select_actions'), and learners must not defer their updates
+    to the end of each episode (see 'TDSettings.deferred_updates').
+    :param game_settings:
+    :param agent:
+    :param rival:
+    :param total_episodes:
+    :param n_envs: Number of games played at the same time.
+    :param random_seed: Seed for the assignment of marks to the agent.
+    :param show_progress: Show a progress bar.
+    :param writer: If given, the episodes are written to this episode log as
+        they finish instead of being returned.
+    :param checkpointer: If given, checkpoint the run (including the games in
+        progress) when due. Needs a writer.
+    :param resume_from: Checkpoint of the same run to continue from. The
+        players must have been restored from it (see 'restore_players').
+    :param monitor: If given, evaluate the agent as it trains, and stop
+        (dropping the games in progress) once the evaluations plateau.
+    :param metrics: If given, time the game steps and sample the progress of
+        the run as it goes on.
+    :param profiler: If given, profile the run while in its window.
+    :return: Summaries of the episodes in the order they finished.
+    """
+    if checkpointer is not None and writer is None:
+        raise ValueError("Checkpoints need an episode log!")
+    if any(getattr(p, "deferred", False) for p in (agent, rival)):
+        raise ValueError("Deferred updates need games played one at a time!")
+
+    n_envs = max(1, min(n_envs, total_episodes))
+    rng = np.random.default_rng(random_seed)
+    vec = VecGame(n_envs, game_settings)
+    step = vec.step if metrics is None else metrics.wrap(vec.step, GAME_STEP)
+    agent_marks = rng.integers(X_MARK, O_MARK + 1, n_envs).astype(np.int8)
+    started = n_envs
+    finished = 0
+
+    players = (agent, rival)
+    learners = [isinstance(p, BaseTDPlayer) for p in players]
+    prev_views = [np.full(n_envs, -1, dtype=np.int32) for _ in players]
+    prev_actions = [np.zeros(n_envs, dtype=np.int64) for _ in players]
+    step_rewards = np.full(n_envs, game_settings.step_reward, dtype=np.float32)
+    no_done = np.zeros(n_envs, dtype=bool)
+
+    if resume_from is not None:
+        state = resume_from.run_state
+        if state is None or state["agent_marks"].shape != (n_envs,):
+            raise ValueError("Checkpoint does not match the environments!")
+
+        vec.restore(state["state_ids"], state["next_turn"], state["active"])
+        rng.bit_generator.state = state["rng"]
+        agent_marks = state["agent_marks"].copy()
+        prev_views = [v.copy() for v in state["prev_views"]]
+        prev_actions = [a.copy() for a in state["prev_actions"]]
+        started = state["started"]
+        finished = resume_from.episodes_done
+
+    end_ids, winners, ep_marks = [], [], []
+    progress = tqdm(
+        total=total_episodes,
+        initial=finished,
+        disable=not show_progress
+    )
+    if profiler is not None:
+        profiler.step(finished)
+    while np.any(vec.active):
+        state_ids = vec.state_ids
+        to_move = vec.active & (vec.next_turn == agent_marks)
+        moves = np.zeros(n_envs, dtype=np.int64)
+        for k, player in enumerate(players):
+            idx = np.flatnonzero(to_move if k == 0 else vec.active & ~to_move)
+            if idx.size == 0:
+                continue
+
+            views = state_ids[idx]
+            as_o = vec.next_turn[idx] == O_MARK
+            views[as_o] = ss.SWAP_ID[views[as_o]]
+
+            if learners[k]:
+                has_prev = prev_views[k][idx] >= 0
+                upd = idx[has_prev]
+                if upd.size > 0:
+                    player.observe_batch(
+                        prev_views[k][upd],
+                        prev_actions[k][upd],
+                        step_rewards[:upd.size],
+                        views[has_prev],
+                        no_done[:upd.size]
+                    )
+
+            actions = player.select_actions(views)
+            prev_views[k][idx] = views
+            prev_actions[k][idx] = actions
+            moves[idx] = actions
+
+        result = step(moves)
+        fin = np.flatnonzero(result.done)
+        if fin.size == 0:
+            continue
+
+        for k, player in enumerate(players):
+            marks = agent_marks[fin] if k == 0 else 3 - agent_marks[fin]
+            rewards = np.where(
+                marks == X_MARK,
+                result.x_rewards[fin],
+                result.o_rewards[fin]
+            )
+            if learners[k]:
+                player.observe_batch(
+                    prev_views[k][fin],
+                    prev_actions[k][fin],
+                    rewards,
+                    prev_views[k][fin],
+                    ~no_done[:fin.size]
+                )
+            prev_views[k][fin] = -1
+
+        if writer is not None:
+            writer.write_batch(
+                result.state_ids[fin],
+                result.winners[fin],
+                agent_marks[fin]
+            )
+        else:
+            end_ids.append(result.state_ids[fin])
+            winners.append(result.winners[fin])
+            ep_marks.append(agent_marks[fin].copy())
+        progress.update(fin.size)
+
+        n_new = min(fin.size, total_episodes - started)
+        started += n_new
+        agent_marks[fin] = rng.integers(X_MARK, O_MARK + 1, fin.size)
+        vec.deactivate(fin[n_new:])
+
+        finished += fin.size
+        if checkpointer is not None and checkpointer.due(finished):
+            writer.flush()
+            checkpointer.save(take_checkpoint(agent, rival, finished, run_state={
+                "state_ids": vec.state_ids.copy(),
+                "next_turn": vec.next_turn.copy(),
+                "active": vec.active.copy(),
+                "rng": rng.bit_generator.state,
+                "agent_marks": agent_marks.copy(),
+                "prev_views": [v.copy() for v in prev_views],
+                "prev_actions": [a.copy() for a in prev_actions],
+                "started": started,
+            }, monitor=monitor))
+
+        if metrics is not None:
+            metrics.step(finished)
+        if profiler is not None:
+            profiler.step(finished)
+        if monitor is not None and monitor.step(agent, finished):
+            break
+
+    progress.close()
+    if not end_ids:
+        return []
+    return _episode_summaries(
+        np.concatenate(end_ids),
+        np.concatenate(winners),
+        np.concatenate(ep_marks),
+        agent,
+        rival
     )
-    return out
+
+
+def _episode_summaries(
+        end_ids: np.ndarray,
+        winners: np.ndarray,
+        agent_marks: np.ndarray,
+        agent: BasePlayer,
+        rival: BasePlayer) -> List[sch.EpisodeSummary]:
+    """
+    Build the summaries of a batch of finished episodes.
+    """
+    agent_class, rival_class = type(agent).__name__, type(rival).__name__
+    return [
+        EpisodeRecord(*episode).to_summary(agent_class, rival_class)
+        for episode in zip(
+            winners.tolist(),
+            agent_marks.tolist(),
+            end_ids.tolist()
+        )
+    ]
+
+
+def play_episodes(
+        game_settings: GameSettings,
+        agent: BaseLearnedPlayer,
+        rival: BasePlayer,
+        total_episodes: int,
+        writer: EpisodeWriter,
+        n_envs: Optional[int] = None,
+        random_seed: int = 0,
+        show_progress: bool = True,
+        checkpointer: Optional[Checkpointer] = None,
+        resume_from: Optional[Checkpoint] = None,
+        monitor: Optional[EvalMonitor] = None,
+        metrics: Optional[Instrumentation] = None,
+        profiler: Optional[EpisodeProfiler] = None):
+    """
+    Play training episodes between the agent and the rival, one at a time or
+    on a vectorized environment, and write them to an episode log.
+    :param game_settings:
+    :param agent:
+    :param rival:
+    :param total_episodes:
+    :param writer:
+    :param n_envs: If given, play this many games at once on a vectorized
+        environment instead of one game at a time.
+    :param random_seed: Seed for the assignment of marks to the agent.
+    :param show_progress: Show a progress bar.
+    :param checkpointer: If given, checkpoint the run when due.
+    :param resume_from: Checkpoint of the same run to continue from. The
+        writer must hold the checkpointed episodes and no more (see
+        'EpisodeWriter'). Episodes played continue up to 'total_episodes', and
+        the monitor continues from the checkpointed evaluations.
+    :param monitor: If given, evaluate the agent as it trains, and stop once
+        the evaluations plateau.
+    :param metrics: If given, time the games and sample the progress of the
+        run as it goes on. The players are timed only if instrumented (see
+        'Instrumentation.instrument_players').
+    :param profiler: If given, profile the run while in its window.
+    :return:
+    """
+    done = 0
+    seats = RandomStream(stream_seed(random_seed, SEATS_STREAM))
+    if resume_from is not None:
+        restore_players(resume_from, agent, rival)
+        done = resume_from.episodes_done
+        if resume_from.rng_states["seats"] is not None:
+            seats.set_state(resume_from.rng_states["seats"])
+        if monitor is not None and resume_from.monitor_state is not None:
+            monitor.set_state(resume_from.monitor_state)
+            # Checkpoints are taken before the evaluation of their episode.
+            if monitor.step(agent, done):
+                return
+
+    if n_envs is not None:
+        run_vectorized(
+            game_settings=game_settings,
+            agent=agent,
+            rival=rival,
+            total_episodes=total_episodes,
+            n_envs=n_envs,
+            random_seed=random_seed,
+            show_progress=show_progress,
+            writer=writer,
+            checkpointer=checkpointer,
+            resume_from=resume_from,
+            monitor=monitor,
+            metrics=metrics,
+            profiler=profiler,
+        )
+        return
+
+    if profiler is not None:
+        profiler.step(done)
+    play = run_game if metrics is None else metrics.wrap(run_game, GAME_STEP)
+
+    progress = tqdm(
+        range(done + 1, total_episodes + 1),
+        initial=done,
+        total=total_episodes,
+        disable=not show_progress
+    )
+    for done in progress:
+        writer.write_record(play(game_settings, agent, rival, seats))
+        if checkpointer is not None and checkpointer.due(done):
+            writer.flush()
+            checkpointer.save(take_checkpoint(
+                agent,
+                rival,
+                done,
+                seats=seats,
+                monitor=monitor
+            ))
+        if metrics is not None:
+            metrics.step(done)
+        if profiler is not None:
+            profiler.step(done)
+        if monitor is not None and monitor.step(agent, done):
+            break
+    progress.close()
 
 
 def train_agent(
@@ -63,7 +385,21 @@ def train_agent(
         game_settings_file: Union[Path, str] = DEFAULT_GAME_CFG,
         td_settings_file: Union[Path, str] = DEFAULT_TD_CFG,
         opponent_settings_file: Optional[Union[Path, str]] = None,
-        policy_file: Optional[Union[str, Path]] = None,):
+        policy_file: Optional[Union[str, Path]] = None,
+        n_envs: Optional[int] = None,
+        workers: Optional[int] = None,
+        checkpoint_every: Optional[int] = None,
+        checkpoint_seconds: Optional[float] = None,
+        resume: bool = False,
+        eval_every: Optional[int] = None,
+        eval_games: int = 1000,
+        patience: Optional[int] = 5,
+        replay_size: Optional[int] = None,
+        metrics: bool = False,
+        metrics_every: Optional[int] = None,
+        profile: bool = False,
+        profile_start: int = 10000,
+        profile_episodes: int = 10000):
     """
     Train an agent against a random opponent.
     :param run_name:
@@ -74,8 +410,58 @@ def train_agent(
     :param td_settings_file:
     :param opponent_settings_file:
     :param policy_file:
+    :param n_envs: If given, play this many games at once on a vectorized
+        environment instead of one game at a time.
+    :param workers: If given, train on this many processes that share the
+        agent's Q-values (see 'hogwild').
+    :param checkpoint_every: Checkpoint the run every this many episodes.
+    :param checkpoint_seconds: Checkpoint the run every this many seconds.
+    :param resume: Continue the run from its last checkpoint, exactly as it
+        would have gone on without the interruption. The settings saved with
+        the run are used; all other arguments except the checkpoint
+        frequency are ignored.
+    :param eval_every: If given, evaluate the agent's greedy policy against
+        the benchmark opponents every this many episodes, on a separate
+        process. The evaluations are stored in the run summary.
+    :param eval_games: Games against each benchmark opponent per evaluation.
+    :param patience: Stop training after this many evaluations without
+        improvement (see 'EvalSettings'). If None, never stop early.
+    :param replay_size: If given, the agent learns with experience replay
+        from a buffer of this many transitions, overriding the TD settings
+        file (see 'TDSettings.replay_size').
+    :param metrics: Time the parts of the training loop and measure the
+        agent's Q-table, and store the results in the run summary.
+    :param metrics_every: Also sample the progress of the run every this many
+        episodes, appending the samples to 'metrics.jsonl' in the run's
+        folder. Implies 'metrics'.
+    :param profile: Profile a window of the run's episodes, saving the
+        profile and its stacks in the run's folder (see 'profiling').
+    :param profile_start: Episodes played when the profiled window starts,
+        so that the warm-up of the run is left out.
+    :param profile_episodes: Episodes in the profiled window.
     :return:
     """
+    if workers is not None and (
+            resume or checkpoint_every is not None or checkpoint_seconds is not None):
+        raise ValueError("Checkpoints are not supported with several workers")
+    if workers is not None and eval_every is not None:
+        raise ValueError("Evaluations are not supported with several workers")
+    if workers is not None and (metrics or metrics_every is not None):
+        raise ValueError("Metrics are not supported with several workers")
+    if workers is not None and profile:
+        raise ValueError("Profiling is not supported with several workers")
+
+    if resume:
+        _resume_training(
+            run_name,
+            checkpoint_every,
+            checkpoint_seconds,
+            metrics=metrics,
+            metrics_every=metrics_every,
+            profile=None if not profile else (profile_start, profile_episodes),
+        )
+        return
+
     if opponent_settings_file is None:
         opponent_settings_file = DEFAULT_TD_CFG
 
@@ -91,13 +477,13 @@ def train_agent(
     agent, td_settings = instantiate_agent(
         agent_type,
         policy_file=policy_file,
-        td_settings_file=td_settings_file
+        td_settings_file=td_settings_file,
+        settings_update=None if replay_size is None else {
+            "replay_size": replay_size
+        },
     )
     if opponent_type == "random":
-        rival = RandomPlayer(
-            "O",
-            random_seed=round(datetime.now(timezone.utc).timestamp())
-        )
+        rival = random_rival(td_settings.random_seed)
         rival_settings = None
     else:
         rival, rival_settings = instantiate_agent(
@@ -107,27 +493,260 @@ def train_agent(
         )
         print("Training against '%s' opponent!" % opponent_type)
 
-    episodes = []
-    for _ in tqdm(range(total_episodes)):
-        ep = run_game(
-            game_settings=game_settings,
-            agent=agent,
-            rival=rival,
-        )
-        episodes.append(ep)
-
+    folder = OUTPUTS_DIR / run_name
     out = sch.TrainSummary(
         total_episodes=total_episodes,
-        episodes=episodes,
+        episodes_file=EPISODES_DIR,
         game_settings=game_settings,
         td_settings=td_settings,
         rival_td_settings=rival_settings,
         agent_type=agent_type,
         rival_type=opponent_type,
+        agent_class=type(agent).__name__,
+        rival_class=type(rival).__name__,
+        eval_settings=None if eval_every is None else sch.EvalSettings(
+            every=eval_every,
+            games=eval_games,
+            patience=patience,
+            random_seed=td_settings.random_seed,
+        ),
+    )
+    # Save the run metadata first, so it is there even if the run crashes.
+    save_summary(folder, out)
+
+    if workers is not None:
+        run_hogwild(
+            game_settings=game_settings,
+            agent_type=agent_type,
+            agent=agent,
+            td_settings=td_settings,
+            rival_type=opponent_type,
+            rival=None if opponent_type == "random" else rival,
+            rival_td_settings=rival_settings,
+            total_episodes=total_episodes,
+            n_workers=workers,
+            episodes_file=folder / EPISODES_DIR,
+            n_envs=n_envs,
+        )
+        save_outputs(folder, out, agent)
+        return
+
+    _run_training(
+        folder,
+        out,
+        agent,
+        rival,
+        n_envs=n_envs,
+        checkpoint_every=checkpoint_every,
+        checkpoint_seconds=checkpoint_seconds,
+        metrics=metrics,
+        metrics_every=metrics_every,
+        profile=None if not profile else (profile_start, profile_episodes),
+    )
+
+
+def _resume_training(
+        run_name: str,
+        checkpoint_every: Optional[int],
+        checkpoint_seconds: Optional[float],
+        metrics: bool = False,
+        metrics_every: Optional[int] = None,
+        profile: Optional[Tuple[int, int]] = None):
+    """
+    Rebuild the players of a run from its summary and last checkpoint, and
+    continue it.
+    """
+    folder = OUTPUTS_DIR / run_name
+    if not (folder / "summary.json").is_file():
+        raise FileNotFoundError("Run summary not found")
+
+    with open(folder / "summary.json", "r") as f:
+        summary = sch.TrainSummary(**json.load(f))
+    checkpoint = load_checkpoint(folder)
+
+    agent = PLAYER_TYPES[summary.agent_type](
+        mark="X",
+        settings=summary.td_settings.model_copy(
+            update={"canonicalize": checkpoint.agent_canonical}
+        )
     )
+    if summary.rival_type == "random":
+        rival = random_rival(summary.td_settings.random_seed)
+    else:
+        rival = PLAYER_TYPES[summary.rival_type](
+            mark="X",
+            settings=summary.rival_td_settings.model_copy(
+                update={"canonicalize": checkpoint.rival_canonical}
+            )
+        )
 
-    with open(OUTPUTS_DIR / run_name / "summary.json", "w") as f:
-        json.dump(out.model_dump(), f)
+    n_envs = None
+    if checkpoint.run_state is not None:
+        n_envs = checkpoint.run_state["agent_marks"].shape[0]
+
+    print("Resuming from episode %d" % checkpoint.episodes_done)
+    _run_training(
+        folder,
+        summary,
+        agent,
+        rival,
+        n_envs=n_envs,
+        checkpoint_every=checkpoint_every,
+        checkpoint_seconds=checkpoint_seconds,
+        resume_from=checkpoint,
+        metrics=metrics,
+        metrics_every=metrics_every,
+        profile=profile,
+    )
 
-    with open(OUTPUTS_DIR / run_name / "policy.json", "w") as f:
+
+def _run_training(
+        folder: Path,
+        summary: sch.TrainSummary,
+        agent: BaseLearnedPlayer,
+        rival: BasePlayer,
+        n_envs: Optional[int] = None,
+        checkpoint_every: Optional[int] = None,
+        checkpoint_seconds: Optional[float] = None,
+        resume_from: Optional[Checkpoint] = None,
+        metrics: bool = False,
+        metrics_every: Optional[int] = None,
+        profile: Optional[Tuple[int, int]] = None):
+    """
+    Play the episodes of a run in this process, checkpointing, evaluating,
+    instrumenting and profiling it if asked to, and save its outputs. The
+    checkpoint is removed once the run is done. Evaluations of resumed runs
+    continue from the checkpoint, and their metrics start over from it.
+    :param profile: Start and number of episodes of the profiled window.
+    """
+    start = 0 if resume_from is None else resume_from.episodes_done
+    monitor = None
+    if summary.eval_settings is not None:
+        monitor = EvalMonitor(
+            summary.eval_settings,
+            summary.game_settings,
+            agent,
+            episodes_done=start
+        )
+
+    checkpointer = None
+    if checkpoint_every is not None or checkpoint_seconds is not None:
+        checkpointer = Checkpointer(
+            folder,
+            every_episodes=checkpoint_every,
+            every_seconds=checkpoint_seconds,
+            episodes_done=start,
+        )
+
+    instruments = None
+    if metrics or metrics_every is not None:
+        instruments = Instrumentation(
+            agent,
+            every=metrics_every,
+            path=None if metrics_every is None else folder / METRICS_FILE,
+            episodes_done=start,
+        )
+        instruments.instrument_players(agent, rival)
+
+    profiler = None
+    if profile is not None:
+        profiler = EpisodeProfiler(
+            folder,
+            profile_window(*profile, summary.total_episodes)
+        )
+
+    keep = None if resume_from is None else start
+    updates = {}
+    try:
+        with EpisodeWriter(folder / summary.episodes_file, keep=keep) as writer:
+            play_episodes(
+                game_settings=summary.game_settings,
+                agent=agent,
+                rival=rival,
+                total_episodes=summary.total_episodes,
+                writer=writer,
+                n_envs=n_envs,
+                random_seed=summary.td_settings.random_seed,
+                checkpointer=checkpointer,
+                resume_from=resume_from,
+                monitor=monitor,
+                metrics=instruments,
+                profiler=profiler,
+            )
+        episodes = start + writer.count
+
+        if profiler is not None:
+            report = profiler.finish(episodes)
+            if report is not None:
+                print("Profiled episodes %d to %d: %.3f ms per episode" % (
+                    report.first_episode,
+                    report.last_episode,
+                    1000 * report.seconds_per_episode
+                ))
+            updates["profile"] = report
+
+        if instruments is not None:
+            updates["metrics"] = instruments.finish(episodes)
+        if monitor is not None:
+            updates.update({
+                "total_episodes": episodes,
+                "evaluations": monitor.finish(agent, episodes),
+                "stopped_early": episodes < summary.total_episodes,
+            })
+            if updates["stopped_early"]:
+                print("Stopped early after %d episodes" % episodes)
+    finally:
+        if checkpointer is not None:
+            checkpointer.close()
+        if monitor is not None:
+            monitor.close()
+        if instruments is not None:
+            instruments.close()
+        if profiler is not None:
+            profiler.close()
+
+    summary = summary.model_copy(update=updates)
+    save_outputs(folder, summary, agent)
+    if (folder / CHECKPOINT_FILE).is_file():
+        os.remove(folder / CHECKPOINT_FILE)
+
+
+def save_summary(folder: Path, summary: sch.TrainSummary):
+    """
+    Save the summary of a training run. Summaries with an episode log only
+    hold the run metadata. Summaries are validated as they are saved, as the
+    updates made to them during the run (see 'model_copy') are not.
+    :param folder:
+    :param summary:
+    :return:
+    """
+    exclude = {"episodes"} if summary.episodes_file is not None else None
+    data = sch.TrainSummary.model_validate(summary.model_dump()).model_dump(
+        exclude=exclude
+    )
+    with open(folder / "summary.json", "w") as f:
+        json.dump(data, f)
+
+
+def save_outputs(
+        folder: Path,
+        summary: sch.TrainSummary,
+        agent: BaseLearnedPlayer):
+    """
+    Save the summary and the learned policy of a training run, the policy
+    both as JSON and in binary format.
+    :param folder:
+    :param summary:
+    :param agent:
+    :return:
+    """
+    save_summary(folder, summary)
+
+    with open(folder / "policy.json", "w") as f:
         json.dump(agent.dump_q_values().model_dump(), f)
+
+    save_binary_policy(
+        agent.agent_q_vals,
+        folder / ("policy" + BINARY_SUFFIX),
+        canonical=agent.canonical
+    )
@@ -0,0 +1,175 @@
+import numpy as np
+from typing import NamedTuple, Optional
+
+from . import state_space as ss
+from .schemas import GameSettings
+
+#: Marks as stored in 'VecGame.next_turn'.
+X_MARK: int = 1
+O_MARK: int = 2
+
+
+class VecStep(NamedTuple):
+    """
+    Result of stepping a batch of games.
+    """
+    state_ids: np.ndarray  #: State reached by each game (before any reset)
+    winners: np.ndarray  #: Winner code of each reached state (see 'state_space')
+    done: np.ndarray  #: Whether each game finished with this move
+    x_rewards: np.ndarray  #: Reward of the 'X' player in each game
+    o_rewards: np.ndarray  #: Reward of the 'O' player in each game
+
+
+class VecGame:
+    """
+    Batch of TicTacToe game environments that are stepped together. Boards
+    are held as state ids of the precomputed state table, so legal moves,
+    transitions and wins of all the games are found with array lookups.
+    """
+
+    def __init__(
+            self,
+            n_games: int,
+            settings: GameSettings,
+            auto_reset: bool = True):
+        """
+        :param n_games: Number of games in the batch.
+        :param settings:
+        :param auto_reset: Reset games to the empty board as soon as they
+            finish.
+        """
+        if n_games < 1:
+            raise ValueError("Need at least one game!")
+
+        self.__ids = np.full(n_games, ss.EMPTY_ID, dtype=np.int32)
+        self.__turn = np.full(n_games, X_MARK, dtype=np.int8)
+        self.__active = np.ones(n_games, dtype=bool)
+        self.__settings = settings
+        self.__auto_reset = auto_reset
+
+    @property
+    def n_games(self) -> int:
+        """
+        Number of games in the batch.
+        """
+        return self.__ids.shape[0]
+
+    @property
+    def settings(self) -> GameSettings:
+        """
+        Game reward settings.
+        """
+        return self.__settings
+
+    @property
+    def state_ids(self) -> np.ndarray:
+        """
+        Current state id of each game.
+        """
+        return self.__ids
+
+    @property
+    def boards(self) -> np.ndarray:
+        """
+        Boards of the games as an array of shape (n_games, 9). Cells are 0
+        for empty, 1 for 'X' and 2 for 'O'.
+        """
+        return ss.BOARD_CELLS[self.__ids]
+
+    @property
+    def legal_mask(self) -> np.ndarray:
+        """
+        Legal moves of each game as a boolean array of shape (n_games, 9).
+        """
+        return ss.LEGAL_MASK[self.__ids]
+
+    @property
+    def next_turn(self) -> np.ndarray:
+        """
+        Which player has the next turn in each game. 1 for X, 2 for O.
+        """
+        return self.__turn
+
+    @property
+    def active(self) -> np.ndarray:
+        """
+        Whether each game takes part in the next steps.
+        """
+        return self.__active
+
+    def reset(self, which: Optional[np.ndarray] = None):
+        """
+        Reset the given games (all if None) to the empty board.
+        :param which: Boolean mask or indices of the games.
+        """
+        if which is None:
+            which = slice(None)
+        self.__ids[which] = ss.EMPTY_ID
+        self.__turn[which] = X_MARK
+
+    def restore(
+            self,
+            state_ids: np.ndarray,
+            next_turn: np.ndarray,
+            active: np.ndarray):
+        """
+        Restore the state of all the games, e.g. from a checkpoint.
+        :param state_ids: Current state id of each game.
+        :param next_turn: Player with the next turn in each game (1 for X, 2
+            for O).
+        :param active: Whether each game takes part in the next steps.
+        """
+        if state_ids.shape != (self.n_games,):
+            raise ValueError("State does not match the number of games!")
+
+        self.__ids = state_ids.astype(np.int32)
+        self.__turn = next_turn.astype(np.int8)
+        self.__active = active.astype(bool)
+
+    def deactivate(self, which: np.ndarray):
+        """
+        Stop stepping the given games. Their moves are ignored from then on.
+        :param which: Boolean mask or indices of the games.
+        """
+        self.__active[which] = False
+
+    def step(self, moves: np.ndarray) -> VecStep:
+        """
+        The player to move in each active game claims the given cell.
+        :param moves: Cell index for each game. Ignored for inactive games.
+        :return:
+        """
+        active = self.__active
+        moves = np.where(active, moves, 0)
+        next_ids = ss.NEXT_STATE[self.__ids, moves]
+        if np.any(next_ids[active] < 0):
+            raise ValueError("Illegal move in batch!")
+
+        next_ids = np.where(active, next_ids, self.__ids)
+        winners = ss.WINNER[next_ids]
+        done = active & (winners != ss.ONGOING)
+
+        sets = self.__settings
+        x_rewards = np.full(self.n_games, sets.step_reward, dtype=np.float32)
+        o_rewards = x_rewards.copy()
+        x_rewards[done] = sets.draw_reward
+        o_rewards[done] = sets.draw_reward
+        x_won = done & (winners == ss.X_WINS)
+        o_won = done & (winners == ss.O_WINS)
+        x_rewards[x_won] = sets.win_reward
+        o_rewards[x_won] = sets.lose_reward
+        x_rewards[o_won] = sets.lose_reward
+        o_rewards[o_won] = sets.win_reward
+
+        self.__ids = next_ids.copy()
+        self.__turn = np.where(active, 3 - self.__turn, self.__turn).astype(np.int8)
+        if self.__auto_reset:
+            self.reset(done)
+
+        return VecStep(
+            state_ids=next_ids,
+            winners=winners,
+            done=done,
+            x_rewards=x_rewards,
+            o_rewards=o_rewards,
+        )
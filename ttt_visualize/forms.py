@@ -6,12 +6,23 @@ from pathlib import Path
 from typing import Optional
 
 from tic_tac_toe.constants import OUTPUTS_DIR
+from tic_tac_toe.players.policy_io import BINARY_SUFFIX
+
+
+def __is_run(folder: Path) -> bool:
+    """
+    Check whether a folder holds the outputs of a training run.
+    """
+    has_policy = (folder / "policy.json").is_file() \
+        or (folder / ("policy" + BINARY_SUFFIX)).is_file()
+    return has_policy and (folder / "summary.json").is_file()
 
 
 def __list_runs() -> List[str]:
     """
     List the output directories of training runs. Each one must contain
-    a `policy.json` file and a `summary.json` file.
+    a policy file (`policy.json` or `policy.qtab`) and a `summary.json` file.
+    The trials of sweeps are listed as `{sweep name}/{trial}`.
     :return: List of training run names.
     """
     if not os.path.isdir(OUTPUTS_DIR):
@@ -19,8 +30,14 @@ def __list_runs() -> List[str]:
 
     out = []
     for fp in OUTPUTS_DIR.iterdir():
-        if (fp / "policy.json").is_file() and (fp / "summary.json").is_file():
+        if __is_run(fp):
             out.append(fp.parts[-1])
+        elif fp.is_dir():
+            out.extend(
+                "/".join(sub.parts[-2:])
+                for sub in sorted(fp.iterdir())
+                if __is_run(sub)
+            )
 
     return out
 
@@ -3,26 +3,47 @@ import streamlit as st
 from typing import Tuple
 
 from tic_tac_toe import constants as const
-from tic_tac_toe.players.schemas import TabularPolicy
+from tic_tac_toe.players.q_table import QTable
+from tic_tac_toe.players.policy_io import load_q_table, BINARY_SUFFIX
+from tic_tac_toe.training import episode_log
 from tic_tac_toe.training.schemas import TrainSummary
+from tic_tac_toe.training.episode_log import EpisodeColumns
 
 
-@st.cache_data
-def load_summary_policy(run_name: str) -> Tuple[TabularPolicy, TrainSummary]:
+@st.cache_resource
+def load_policy(run_name: str) -> Tuple[QTable, bool]:
     """
-    Load the learned policy (Q-vals, really...) and the run summary for the
-    given run.
+    Load the learned policy (Q-vals, really...) of the given run. The binary
+    policy file is preferred when present, and memory mapped, so the table
+    is shared between sessions instead of copied; older runs with only a
+    'policy.json' file are converted on load.
     :param run_name:
-    :return:
+    :return: Q-table, whether it stores states in canonical form.
     """
     folder = const.OUTPUTS_DIR / run_name
+    policy_file = folder / ("policy" + BINARY_SUFFIX)
+    if not policy_file.is_file():
+        policy_file = folder / "policy.json"
+    return load_q_table(policy_file, mmap=True)
 
-    with (folder / "policy.json").open("r") as f:
-        policy = TabularPolicy(**json.load(f))
-
-    with (folder / "summary.json").open("r") as f:
-        summary = TrainSummary(**json.load(f))
 
-    return policy, summary
+@st.cache_data
+def load_summary(run_name: str) -> TrainSummary:
+    """
+    Load the summary of the given run.
+    :param run_name:
+    :return:
+    """
+    with (const.OUTPUTS_DIR / run_name / "summary.json").open("r") as f:
+        return TrainSummary(**json.load(f))
 
 
+def load_run_episodes(run_name: str, summary: TrainSummary) -> EpisodeColumns:
+    """
+    Load the episodes of a run by column. Columnar episode logs are memory
+    mapped.
+    :param run_name:
+    :param summary:
+    :return:
+    """
+    return episode_log.load_run_episodes(const.OUTPUTS_DIR / run_name, summary)
@@ -1,17 +1,28 @@
 import numpy as np
-import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 from typing import Optional, TypedDict, Tuple
 
 from tic_tac_toe.schemas import PLAYS
+from tic_tac_toe.vec_game import X_MARK
 from tic_tac_toe.training.schemas import TrainSummary
-from tic_tac_toe.players.schemas import TabularPolicy
+from tic_tac_toe.training.episode_log import EpisodeColumns, to_columns
+from tic_tac_toe import state_space as ss
+from tic_tac_toe.players.q_table import QTable
+from tic_tac_toe.state_space import X_WINS, O_WINS, DRAW
+
+#: Most points plotted per curve, whatever the length of the run.
+MAX_POINTS: int = 2000
+
+#: Episodes in the window of the rolling rates.
+RATE_WINDOW: int = 1000
 
 
 class ParsedSummary(TypedDict):
     """
-    Parsed training summary for plotting and display.
+    Parsed training summary for plotting and display. Outcomes are boolean
+    masks over the episodes.
     """
     agent_wins: np.ndarray
     agent_losses: np.ndarray
@@ -22,78 +33,111 @@ class ParsedSummary(TypedDict):
     played_as_x: int
 
 
-def parse_summary(run: TrainSummary) -> ParsedSummary:
+def parse_summary(
+        run: TrainSummary,
+        episodes: Optional[EpisodeColumns] = None) -> ParsedSummary:
     """
     Parse the summary data.
     :param run:
+    :param episodes: Episodes of the run by column, e.g. as loaded from its
+        episode log. Defaults to the episodes stored in the summary.
     :return:
     """
-    wins = []
-    losses = []
-    draws = []
-    as_x = 0
-
-    for episode in run.episodes:
-        agent_mark = episode.agent_mark
-        if agent_mark == "X":
-            as_x += 1
-
-        if agent_mark == episode.winner:
-            wins.append(1.0)
-            losses.append(0.0)
-            draws.append(0.0)
-        elif episode.winner not in ("X", "O"):
-            wins.append(0.0)
-            losses.append(0.0)
-            draws.append(1.0)
-        else:
-            wins.append(0.0)
-            losses.append(1.0)
-            draws.append(0.0)
+    if episodes is None:
+        episodes = to_columns(run.episodes)
+
+    # Winner code of the agent's wins and losses in each episode.
+    agent_x = episodes.agent_mark == X_MARK
+    agent_wins = np.where(agent_x, X_WINS, O_WINS)
+    agent_losses = np.where(agent_x, O_WINS, X_WINS)
 
     out = ParsedSummary(
-        agent_wins=np.array(wins),
-        agent_losses=np.array(losses),
-        agent_draws=np.array(draws),
+        agent_wins=episodes.winner == agent_wins,
+        agent_losses=episodes.winner == agent_losses,
+        agent_draws=episodes.winner == DRAW,
         opponent_type=run.rival_type,
         agent_type=run.agent_type,
-        total_episodes=run.total_episodes,
-        played_as_x=as_x,
+        total_episodes=len(episodes),
+        played_as_x=int(np.count_nonzero(agent_x)),
     )
     return out
 
 
+def minmax_downsample(values: np.ndarray, max_points: int = MAX_POINTS) -> np.ndarray:
+    """
+    Pick the points of a curve to plot: the lowest and highest points of
+    each bucket of consecutive points, and the first and last points. This
+    keeps the peaks and valleys of the curve, as well as its shape.
+    :param values:
+    :param max_points: Most points to pick.
+    :return: Indices of the picked points, in order.
+    """
+    n = values.shape[0]
+    if n <= max_points:
+        return np.arange(n)
+
+    # Two points per bucket, and room for the last partial bucket and the
+    # ends of the curve.
+    size = -(-n // max(max_points // 2 - 2, 1))
+    full = n - n % size
+    buckets = values[:full].reshape(-1, size)
+    starts = np.arange(0, full, size)
+    picked = [
+        starts + np.argmin(buckets, axis=1),
+        starts + np.argmax(buckets, axis=1),
+        np.array([0, n - 1]),
+    ]
+    if full < n:
+        tail = values[full:]
+        picked.append(full + np.array([np.argmin(tail), np.argmax(tail)]))
+    return np.unique(np.concatenate(picked))
+
+
+def rolling_rate(outcome: np.ndarray, window: int = RATE_WINDOW) -> np.ndarray:
+    """
+    Rate of an outcome over the last episodes up to each episode, from the
+    cumulative sums of the outcome.
+    :param outcome: Boolean mask of the episodes with the outcome.
+    :param window: Episodes in the window (fewer for the first episodes).
+    :return:
+    """
+    sums = np.cumsum(outcome, dtype=np.int64)
+    sums[window:] -= sums[:-window].copy()
+    lengths = np.minimum(np.arange(1, outcome.shape[0] + 1), window)
+    return (sums / lengths).astype(np.float32)
+
+
 def plot_policy_state(
         state: str,
         agent_mark: PLAYS,
-        qs: TabularPolicy) -> Optional[go.Figure]:
+        table: QTable,
+        canonical: bool = False) -> Optional[go.Figure]:
     """
     Plot the policy's values for the given state as a heatmap.
     :param state:
     :param agent_mark:
-    :param qs:
+    :param table: Q-values of the policy (see 'policy_io.load_q_table').
+    :param canonical: Whether the table stores states in canonical form.
     :return:
     """
-    # Translate state
-    mapping = {
-        agent_mark: "1",
-        ("O" if agent_mark == "X" else "X"): "2",
-        "-": "0"
-    }
-    mapped_state = "".join(mapping[c] for c in state)
-
-    if mapped_state not in qs.states:
+    state_id = ss.BOARD_TO_ID.get(state)
+    if state_id is None:
+        # Not a reachable board
+        return None
+
+    sid, sym = ss.view_id(state_id, agent_mark), 0
+    if canonical:
+        sid, sym = ss.CANONICAL_ID_LIST[sid], ss.CANONICAL_SYM_LIST[sid]
+    if not table.visited[sid]:
         # State not visited
         return None
 
-    values = []
-    action_vals = qs.states[mapped_state]
-    for i in range(9):
-        key = str(i)
-        if key in action_vals:
-            values.append(action_vals[key])
-        else:
-            values.append(np.nan)
+    # Map the actions back from the stored frame, with NaN for illegal ones.
+    row = table.values[sid]
+    values = [np.nan] * 9
+    for a, cell in enumerate(ss.SYMMETRIES_LIST[sym]):
+        if np.isfinite(row[a]):
+            values[cell] = float(row[a])
 
     values_arr = np.array(values).reshape((3, 3))
     fig = px.imshow(
@@ -106,44 +150,54 @@ def plot_policy_state(
     return fig
 
 
-def plot_summary(train_summary: TrainSummary) -> Tuple[go.Figure, ParsedSummary]:
+def plot_summary(
+        train_summary: TrainSummary,
+        episodes: Optional[EpisodeColumns] = None,
+        rate_window: int = RATE_WINDOW,
+        max_points: int = MAX_POINTS
+        ) -> Tuple[go.Figure, ParsedSummary]:
     """
-    Plot summary of the training run.
+    Plot summary of the training run: the total wins, losses and draws of
+    the agent, and their rates over a rolling window. Long runs are
+    downsampled (see 'minmax_downsample').
     :param train_summary:
+    :param episodes: Episodes of the run (see 'parse_summary').
+    :param rate_window: Episodes in the window of the rates.
+    :param max_points: Most points plotted per curve.
     :return:
     """
-    parsed = parse_summary(train_summary)
-    df = pd.DataFrame({
-        "episode": np.arange(parsed["total_episodes"]),
-        "total_wins": np.cumsum(parsed["agent_wins"]),
-        "total_losses": np.cumsum(parsed["agent_losses"]),
-        "total_draws": np.cumsum(parsed["agent_draws"]),
-    })
-    group = parsed["total_episodes"] > 30000
-    if group:
-        df["episode"] = np.floor(df["episode"] / 1000)
-        df = df.groupby("episode", as_index=False).agg("max")
-
-    fig = px.line(
-        df,
-        x="episode",
-        y="total_wins",
-        title="Training Run"
-    )
-    fig.add_trace(
-        go.Scatter(
-            x=df["episode"],
-            y=df["total_losses"],
-            mode="lines",
-            name="total_losses"
+    parsed = parse_summary(train_summary, episodes)
+    fig = make_subplots(
+        rows=2,
+        cols=1,
+        shared_xaxes=True,
+        subplot_titles=(
+            "Totals",
+            "Rates over the last %d episodes" % rate_window
         )
     )
-    fig.add_trace(
-        go.Scatter(
-            x=df["episode"],
-            y=df["total_draws"],
-            mode="lines",
-            name="total_draws"
+    colors = px.colors.qualitative.Plotly
+    for k, outcome in enumerate(("wins", "losses", "draws")):
+        mask = parsed["agent_" + outcome]
+        curves = (
+            ("total_" + outcome, np.cumsum(mask, dtype=np.int64)),
+            (outcome + "_rate", rolling_rate(mask, rate_window)),
         )
-    )
+        for row, (name, values) in enumerate(curves, start=1):
+            idx = minmax_downsample(values, max_points)
+            fig.add_trace(
+                go.Scatter(
+                    x=idx,
+                    y=values[idx],
+                    mode="lines",
+                    name=name,
+                    legendgroup=outcome,
+                    line={"color": colors[k]}
+                ),
+                row=row,
+                col=1
+            )
+
+    fig.update_layout(title="Training Run")
+    fig.update_xaxes(title_text="episode", row=2, col=1)
     return fig, parsed